@@ -0,0 +1,11 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""Same as `webmushra-tools assign`, see webmushra_tools/assignment_service.py."""
+
+import sys
+
+from webmushra_tools.cli import run
+
+if __name__ == "__main__":
+    sys.exit(run("assign"))
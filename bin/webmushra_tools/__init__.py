@@ -0,0 +1,10 @@
+# -*- coding: utf-8 -*-
+
+"""Tools to prepare, run and analyze webMUSHRA evaluations.
+
+Each tool is a module with a main() function, run by `webmushra-tools
+<command>` (see cli.py) or by the scripts of the same name in bin/.
+
+"""
+
+__version__ = "0.1.0"
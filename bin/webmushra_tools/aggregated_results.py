@@ -0,0 +1,55 @@
+# -*- coding: utf-8 -*-
+
+"""Print mean and standard error of the ratings of each competitor."""
+
+import argparse
+import glob
+
+from .results_store import read_results
+from .trial_table import join_trials, read_trial_tables
+
+DEFAULT_IGNORE_NAMES = [
+    "A23KAJRDVCVGOE",
+    "A1N3YG2X9SO4PN",
+]
+
+DEFAULT_COMPETITORS = ["original", "vocoder_waveglow", "vocoder_wavernn_nvidia",
+                       "vocoder_wavernn_fatchord", "vocoder_fatchord"]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--competitors", default=DEFAULT_COMPETITORS, nargs="+", type=str)
+    parser.add_argument("--ignore_names", default=DEFAULT_IGNORE_NAMES, nargs="*", type=str,
+                        help="raters whose ratings are ignored.")
+    parser.add_argument("--trial_tables", default=None, nargs="+", type=str,
+                        help="<config>.trials.csv written by generate_config*.py. defaults to ./configs/*.trials.csv.")
+    parser.add_argument("results_dir", nargs="?", default="./results/subjective_evalaution", type=str,
+                        help="directory of lss.csv (and the store of ingest_results.py).")
+    args = parser.parse_args()
+
+    df = read_results(args.results_dir, columns=["name", "trial_id", "stimuli_rating"])
+    competitors = args.competitors
+
+    trial_tables = args.trial_tables or sorted(glob.glob("./configs/*.trials.csv"))
+    if trial_tables:
+        # exact labels from the tables written by generate_config*.py
+        df['competitor'] = join_trials(df['trial_id'], read_trial_tables(trial_tables))
+        df = df[df['competitor'].isin(competitors)]
+    else:
+        def get_competitor_name(name):
+            for comp in competitors:
+                if f"_{comp}_" in name:
+                    return comp
+
+        # match once per unique trial id instead of once per row
+        df['competitor'] = df['trial_id'].astype("category").map(get_competitor_name)
+    df = df.drop(df[df['name'].isin(args.ignore_names)].index)
+    df['rating'] = df['stimuli_rating'].astype("float64")
+
+    print(df.groupby(["competitor"])['rating'].mean())
+    print(df.groupby(["competitor"])['rating'].sem())
+
+
+if __name__ == "__main__":
+    main()
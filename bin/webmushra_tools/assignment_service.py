@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+"""Hand out subset configs to workers adaptively (see subset_assigner.py).
+
+    GET /next?worker=<id>    {"config": "<name>.yaml"} or {"config": null} if no work is left
+    GET /start?worker=<id>   redirect to <base_url>?config=<name>.yaml
+    GET /status              ratings and intervals of the systems
+
+The ratings are read from lss.csv written by write.php / results_receiver.py,
+or from the database of results_receiver.py --backend sqlite, and only the
+rows added since the last request are read.
+
+"""
+
+import argparse
+import asyncio
+import glob
+import json
+import os
+
+from urllib.parse import parse_qs, quote, urlsplit
+
+from .monitor_results import CsvTailer
+from .results_receiver import make_response, read_request
+from .subset_assigner import SubsetAssigner, read_configs
+
+
+def parse_rating(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        # " NA " if not rated
+        return None
+
+
+class RatingSource(object):
+    """New ratings from lss.csv or the results database."""
+
+    def __init__(self, csv_path=None, db_path=None, test_id=None):
+        self.tailer = CsvTailer(csv_path) if csv_path is not None else None
+        self.conn = None
+        if db_path is not None:
+            from . import results_db
+            self.conn = results_db.connect(db_path, readonly=True)
+            self.read_new_ratings = results_db.read_new_ratings
+        self.test_id = test_id
+        self.last_id = 0
+        self.num_resets = 0
+        self.started_over = False
+
+    def read(self):
+        """Return new (worker, trial id, rating).
+
+        If lss.csv was replaced or truncated, it is read again from the start
+        and started_over is set, so that the ratings read before are discarded.
+
+        """
+        if self.tailer is not None:
+            rows = self.tailer.read_rows()
+            self.started_over = self.tailer.num_resets != self.num_resets
+            self.num_resets = self.tailer.num_resets
+            return [(row["name"], row["trial_id"], parse_rating(row["stimuli_rating"])) for row in rows]
+        rows = self.read_new_ratings(self.conn, self.test_id, "lss", self.last_id)
+        if rows:
+            self.last_id = rows[-1][0]
+        return [(rater, trial_id, None if rating is None else int(rating)) for _, rater, trial_id, rating in rows]
+
+
+def add_new_ratings(assigner, source):
+    """Add the new ratings of source, and discard the ratings added before if source started over."""
+    ratings = source.read()
+    if source.started_over:
+        assigner.reset_ratings()
+    for worker, trial_id, rating in ratings:
+        assigner.add_rating(worker, trial_id, rating)
+
+
+def handler(assigner, source, base_url):
+    async def handle(reader, writer):
+        try:
+            request = await read_request(reader, 2 ** 16)
+            if request is None:
+                writer.close()
+                return
+            _, path, _ = request
+            url = urlsplit(path)
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            add_new_ratings(assigner, source)
+
+            if url.path in ["/next", "/start"]:
+                if not query.get("worker"):
+                    raise ValueError("worker is required.")
+                config = assigner.next_config(query["worker"])
+                if url.path == "/start" and config is not None:
+                    response = make_response(302, headers={"Location": f"{base_url}?config={quote(config)}"})
+                elif url.path == "/start":
+                    response = make_response(200, b"Thank you, there is no task left.")
+                else:
+                    body = json.dumps({"config": config}).encode("utf-8")
+                    response = make_response(200, body, "application/json")
+            elif url.path == "/status":
+                response = make_response(200, json.dumps(assigner.summary(), indent=2).encode("utf-8"),
+                                         "application/json")
+            else:
+                response = make_response(404)
+        except (ValueError, KeyError, asyncio.IncompleteReadError) as e:
+            response = make_response(400, str(e).encode("utf-8"))
+        try:
+            writer.write(response)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+    return handle
+
+
+async def serve(host, port, assigner, source, base_url):
+    server = await asyncio.start_server(handler(assigner, source, base_url), host, port)
+    print(f"assigning {len(assigner.configs)} configs on http://{host}:{port}/.")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="0.0.0.0", type=str)
+    parser.add_argument("--port", default=8890, type=int)
+    parser.add_argument("--base_url", default="http://localhost:8888/", type=str,
+                        help="url of webMUSHRA which /start redirects to.")
+    parser.add_argument("--target_width", default=0.2, type=float,
+                        help="systems whose confidence interval is narrower are not assigned any more.")
+    parser.add_argument("--confidence", default=0.95, type=float)
+    parser.add_argument("--min_ratings", default=30, type=int)
+    parser.add_argument("--lease_seconds", default=3600, type=float,
+                        help="assignments not submitted within this time are given up.")
+    parser.add_argument("--db", default=None, type=str,
+                        help="read ratings from the database of results_receiver.py --backend sqlite.")
+    parser.add_argument("--test_id", default=None, type=str,
+                        help="test id in --db. defaults to the name of results_dir.")
+    parser.add_argument("configs_dir", type=str, help="directory of the configs and their trial tables.")
+    parser.add_argument("results_dir", type=str, help="e.g. results/<testId>.")
+    args = parser.parse_args()
+
+    configs = read_configs(glob.glob(os.path.join(args.configs_dir, "*.trials.csv")))
+    if not configs:
+        parser.error(f"no trial tables in {args.configs_dir}, see generate_config_en.py.")
+    assigner = SubsetAssigner(configs, args.target_width, args.confidence, args.min_ratings, args.lease_seconds)
+    if args.db is not None:
+        if not os.path.isfile(args.db):
+            parser.error(f"{args.db} does not exist, start results_receiver.py --backend sqlite first.")
+        test_id = args.test_id or os.path.basename(os.path.normpath(args.results_dir))
+        source = RatingSource(db_path=args.db, test_id=test_id)
+    else:
+        source = RatingSource(csv_path=os.path.join(args.results_dir, "lss.csv"))
+    try:
+        asyncio.run(serve(args.host, args.port, assigner, source, args.base_url))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
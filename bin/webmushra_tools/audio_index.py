@@ -0,0 +1,337 @@
+# -*- coding: utf-8 -*-
+
+"""Index the format of stimuli and validate them before they are deployed.
+
+Only the headers of WAV / FLAC files are read, so that the sample rate,
+channels, frames and duration of a large corpus are known in seconds. With
+--full, the samples are also scanned for the peak and the number of clipped
+samples. The results are kept in an on-disk index keyed by size and mtime, so
+that only new or modified files are read again.
+
+    $ webmushra-tools validate --index audio_index.json --full configs/resources/samples_stereo
+
+generate_config*.py, batch_generate_config.py, generate_design.py and
+divide_audio_dir.py check the files with this index (see preflight) before
+writing anything, instead of webMUSHRA failing to decode a stimulus in a
+participant's browser, or stimuli of different sample rates being rated together.
+
+"""
+
+import argparse
+import collections
+import json
+import os
+import struct
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+from .file_scanner import RACY_SECONDS, ScanIndex, find_files
+from .tracing import span
+from .wav_io import read_wav_header
+
+AUDIO_INDEX_VERSION = 1
+
+AUDIO_QUERIES = ["*.wav", "*.flac"]
+
+# webMUSHRA plays stereo stimuli, see convert_mono_to_stereo.py
+DEFAULT_CHANNELS = 2
+
+
+def read_flac_header(path):
+    """Read the format of flac file from its STREAMINFO block.
+
+    Args:
+        path (str): Path of flac file.
+
+    Returns:
+        dict: channels, sampwidth, sample_rate and num_frames
+            (0 if unknown to the encoder).
+
+    """
+    with open(path, "rb") as f:
+        if f.read(4) != b"fLaC":
+            raise ValueError(f"{path}: not a flac file.")
+        block_header = f.read(4)
+        if len(block_header) < 4 or block_header[0] & 0x7F != 0:
+            raise ValueError(f"{path}: no STREAMINFO block.")
+        streaminfo = f.read(34)
+    if len(streaminfo) < 34:
+        raise ValueError(f"{path}: truncated STREAMINFO block.")
+    # 20 bits sample rate, 3 bits channels - 1, 5 bits bits per sample - 1, 36 bits frames
+    packed = struct.unpack(">Q", streaminfo[10:18])[0]
+    return {
+        "channels": ((packed >> 41) & 0x7) + 1,
+        "sampwidth": (((packed >> 36) & 0x1F) + 8) // 8,
+        "sample_rate": packed >> 44,
+        "num_frames": packed & 0xFFFFFFFFF,
+    }
+
+
+def scan_samples(path, header):
+    """Compute the peak (relative to full scale) and the number of clipped samples."""
+    import numpy as np
+
+    from .wav_io import read_wav
+
+    if path.endswith(".flac"):
+        import soundfile
+
+        shift = 32 - 8 * header["sampwidth"]
+        data = soundfile.read(path, dtype="int32", always_2d=True)[0] >> shift
+    elif header.get("is_float"):
+        data = np.memmap(path, dtype=f"<f{header['sampwidth']}", mode="r", offset=header["data_offset"],
+                         shape=(header["num_frames"] * header["channels"],))
+        if data.size == 0:
+            return 0.0, 0
+        return float(np.abs(data).max()), int(np.count_nonzero(np.abs(data) >= 1.0))
+    elif header["sampwidth"] == 3:
+        data = read_wav(path)[0]
+    else:
+        dtype = {1: np.uint8, 2: "<i2", 4: "<i4"}[header["sampwidth"]]
+        data = np.memmap(path, dtype=dtype, mode="r", offset=header["data_offset"],
+                         shape=(header["num_frames"] * header["channels"],))
+    if header["sampwidth"] == 1:
+        data = data.astype(np.int16) - 128
+    if data.size == 0:
+        return 0.0, 0
+    scale = 2 ** (8 * header["sampwidth"] - 1)
+    low, high = int(data.min()), int(data.max())
+    num_clipped = int(np.count_nonzero(data == -scale) + np.count_nonzero(data == scale - 1))
+    return max(-low, high) / scale, num_clipped
+
+
+def read_audio_info(path, full=False):
+    """Read the format of audio file.
+
+    Args:
+        path (str): Path of wav or flac file.
+        full (bool): If True, also scan the samples for the peak and clipping.
+
+    Returns:
+        dict: format, sample_rate, channels, sampwidth, num_frames, is_float and
+            duration (and peak and num_clipped if full), or error if the file
+            cannot be read. The peak is relative to full scale.
+
+    """
+    info = {"format": os.path.splitext(path)[1][1:].lower()}
+    try:
+        if info["format"] == "flac":
+            header = read_flac_header(path)
+        else:
+            header = read_wav_header(path, allow_float=True)
+            block_align = header["channels"] * header["sampwidth"]
+            num_available = (os.path.getsize(path) - header["data_offset"]) // max(block_align, 1)
+            if num_available < header["num_frames"]:
+                raise ValueError(f"{path}: truncated, {num_available} of {header['num_frames']} frames.")
+        if header["channels"] == 0 or header["sample_rate"] == 0 or header["sampwidth"] == 0:
+            raise ValueError(f"{path}: invalid format {header}.")
+        info.update({k: header[k] for k in ["sample_rate", "channels", "sampwidth", "num_frames"]})
+        info["is_float"] = header.get("is_float", False)
+        info["duration"] = header["num_frames"] / header["sample_rate"]
+        if full:
+            info["peak"], info["num_clipped"] = scan_samples(path, header)
+    except (OSError, ValueError, struct.error) as e:
+        info["error"] = str(e)
+    except ImportError as e:
+        info["error"] = f"{path}: {e}."
+    return info
+
+
+def _read_audio_info(job):
+    return read_audio_info(*job)
+
+
+class AudioIndex(object):
+    """On-disk index of the formats of audio files.
+
+    Args:
+        path (str): Path of index json. If None, the index is kept in memory
+            only and every file is read.
+
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.files = {}
+        self.dirty = False
+        if path is not None and os.path.exists(path):
+            with open(path) as f:
+                index = json.load(f)
+            if index.get("version") == AUDIO_INDEX_VERSION:
+                self.files = index["files"]
+
+    def update(self, paths, full=False, jobs=1):
+        """Read the files which are new or modified since they were indexed.
+
+        Args:
+            paths (list): Paths of audio files.
+            full (bool): If True, also scan the samples (see read_audio_info).
+            jobs (int): Number of processes.
+
+        Returns:
+            list: Info of each path (see read_audio_info).
+            int: Number of files read.
+
+        """
+        keys = [os.path.abspath(path) for path in paths]
+        stale = []
+        for path, key in zip(paths, keys):
+            try:
+                stat = os.stat(path)
+            except OSError as e:
+                self.files[key] = {"size": None, "mtime_ns": None, "error": str(e)}
+                continue
+            entry = self.files.get(key)
+            if (entry is None or entry["size"] != stat.st_size or entry["mtime_ns"] != stat.st_mtime_ns
+                    or (full and "peak" not in entry and "error" not in entry)):
+                stale.append((path, key, stat))
+
+        jobs_ = [(path, full) for path, _, _ in stale]
+        with span("read_audio_info", files=len(jobs_), full=full):
+            if jobs > 1 and len(stale) > 1:
+                with ProcessPoolExecutor(max_workers=jobs) as executor:
+                    infos = list(executor.map(_read_audio_info, jobs_,
+                                              chunksize=max(1, len(jobs_) // (jobs * 16))))
+            else:
+                infos = [_read_audio_info(job) for job in jobs_]
+
+        now = time.time()
+        for (_, key, stat), info in zip(stale, infos):
+            info.update({"size": stat.st_size, "mtime_ns": stat.st_mtime_ns})
+            self.files[key] = info
+            # files modified within the mtime granularity may change unnoticed
+            if now - stat.st_mtime_ns / 1e9 > RACY_SECONDS:
+                self.dirty = True
+            else:
+                info["mtime_ns"] = None
+        return [self.files[key] for key in keys], len(stale)
+
+    def save(self):
+        """Write the index atomically if it has been updated."""
+        if self.path is None or not self.dirty:
+            return
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": AUDIO_INDEX_VERSION, "files": self.files}, f)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+
+def validate(paths, infos, channels=DEFAULT_CHANNELS, sample_rates=None, min_duration=0.0, max_clipped=0):
+    """Check the formats of audio files.
+
+    Args:
+        paths (list): Paths of audio files.
+        infos (list): Info of each path (see read_audio_info).
+        channels (int): Expected number of channels. If None, not checked.
+        sample_rates (list): Allowed sample rates. If None, not checked.
+        min_duration (float): Minimum duration in seconds. Empty files are always invalid.
+        max_clipped (int): Maximum number of clipped samples. Checked only if
+            the samples were scanned and it is not None.
+
+    Returns:
+        list: Problems as (path, message).
+
+    """
+    problems = []
+    for path, info in zip(paths, infos):
+        if "error" in info:
+            problems.append((path, info["error"]))
+            continue
+        if channels is not None and info["channels"] != channels:
+            problems.append((path, f"{info['channels']} channels instead of {channels}."))
+        if sample_rates is not None and info["sample_rate"] not in sample_rates:
+            problems.append((path, f"sample rate {info['sample_rate']} is not one of {sample_rates}."))
+        if info["num_frames"] == 0 or info["duration"] < min_duration:
+            problems.append((path, f"too short ({info['duration']:.3f} sec)."))
+        if max_clipped is not None and info.get("num_clipped", 0) > max_clipped:
+            problems.append((path, f"{info['num_clipped']} clipped samples (peak {info['peak']:.3f})."))
+    return problems
+
+
+def print_problems(problems, max_lines=20):
+    for path, message in problems[:max_lines]:
+        print(f"{path}: {message}" if not message.startswith(path) else message)
+    if len(problems) > max_lines:
+        print(f"... and {len(problems) - max_lines} more problems.")
+
+
+def preflight(paths, index_path=None, jobs=1, channels=DEFAULT_CHANNELS, sample_rates=None):
+    """Validate the stimuli of a config or subsets by their headers.
+
+    Args:
+        paths (list): Paths of audio files.
+        index_path (str): Path of the index json (see AudioIndex).
+        jobs (int): Number of processes to read the headers.
+        channels (int): Expected number of channels.
+        sample_rates (list): Allowed sample rates. If None, all files must have
+            the same sample rate, and files of another rate than the most
+            common one are problems.
+
+    Returns:
+        list: Info of each path (see read_audio_info).
+        list: Problems as (path, message), which are also printed.
+
+    """
+    start = time.perf_counter()
+    index = AudioIndex(index_path)
+    infos, num_read = index.update(paths, jobs=jobs)
+    index.save()
+    if sample_rates is None:
+        counts = collections.Counter(info["sample_rate"] for info in infos if "error" not in info)
+        sample_rates = [counts.most_common(1)[0][0]] if counts else None
+    # clipping is reported by the validate command, but does not stop deployment
+    problems = validate(paths, infos, channels, sample_rates, max_clipped=None)
+    print_problems(problems)
+    print(f"validated {len(paths)} audio files ({num_read} headers read) in "
+          f"{time.perf_counter() - start:.2f} sec, {len(problems)} problems.")
+    return infos, problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index", default=None, type=str,
+                        help="json index of audio formats to read only new or modified files.")
+    parser.add_argument("--full", default=False, action="store_true",
+                        help="also scan the samples for the peak and clipping.")
+    parser.add_argument("--channels", default=DEFAULT_CHANNELS, type=int, help="expected channels, 0 to skip.")
+    parser.add_argument("--sample_rates", default=None, nargs="+", type=int, help="allowed sample rates.")
+    parser.add_argument("--min_duration", default=0.0, type=float, help="minimum duration in seconds.")
+    parser.add_argument("--max_clipped", default=0, type=int, help="maximum clipped samples of each file.")
+    parser.add_argument("--jobs", default=os.cpu_count(), type=int)
+    parser.add_argument("--scan_index", default=None, type=str,
+                        help="json index of directory listings to speed up repeated scans.")
+    parser.add_argument("root_dirs", nargs="+", type=str, help="directories of wav / flac files.")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    scan_index = ScanIndex(args.scan_index)
+    paths = sorted(path for root_dir in args.root_dirs for query in AUDIO_QUERIES
+                   for path in find_files(root_dir, query, index=scan_index))
+    scan_index.save()
+
+    index = AudioIndex(args.index)
+    infos, num_read = index.update(paths, args.full, args.jobs)
+    index.save()
+    elapsed = time.perf_counter() - start
+    print(f"indexed {len(paths)} files ({num_read} read) in {elapsed:.2f} sec "
+          f"({num_read / max(elapsed, 1e-9):.1f} files/sec, {args.jobs} jobs).")
+
+    formats = collections.Counter((info["sample_rate"], info["channels"], 8 * info["sampwidth"], info["is_float"])
+                                  for info in infos if "error" not in info)
+    for (sample_rate, channels, bits, is_float), count in sorted(formats.items()):
+        print(f"{sample_rate} Hz, {channels} channels, {bits} bit{' float' if is_float else ''}: {count} files")
+    print(f"total duration: {sum(info.get('duration', 0.0) for info in infos) / 3600:.2f} hours")
+
+    problems = validate(paths, infos, args.channels or None, args.sample_rates, args.min_duration,
+                        args.max_clipped)
+    print_problems(problems, max_lines=len(problems))
+    print(f"{len({path for path, _ in problems})} of {len(paths)} files have problems.")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    main()
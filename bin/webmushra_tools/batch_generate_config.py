@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+
+"""Generate configs of all subsets in a single process.
+
+Same as running generate_config_en.py (or generate_config.py) for each
+<subset_root_dir>/subset_<i>, writing <outdir>/<prefix><i>.yaml
+(and its trial table <outdir>/<prefix><i>.trials.csv).
+
+"""
+
+import argparse
+import importlib
+import os
+import re
+
+from concurrent.futures import ProcessPoolExecutor
+
+from .audio_index import preflight
+from .config_writer import dump_config, write_precompressed
+from .file_scanner import ScanIndex, find_files
+from .manifest import Manifest, hash_params
+from .transcode_audio import AUDIO_VARIANTS
+from .tracing import span
+from .trial_table import trial_table_path, write_trial_table
+
+GENERATORS = {
+    "en": "generate_config_en",
+    "ja": "generate_config",
+}
+
+
+def generate(lang, wav_path_list, outpath, sample_audio_path=None, seed=777, compact=False, precompress=False,
+             audio_variants=None, waveform_peaks=False):
+    """Generate a single subset config."""
+    generator = importlib.import_module(f".{GENERATORS[lang]}", __package__)
+    trials = []
+    config = generator.make_config(wav_path_list, sample_audio_path, seed=seed, compact=compact,
+                                   audio_variants=audio_variants, waveform_peaks=waveform_peaks, trials=trials)
+    with open(outpath, "w") as f:
+        dump_config(config, f)
+    write_trial_table(trials, trial_table_path(outpath))
+    if precompress:
+        write_precompressed(outpath)
+    return outpath
+
+
+def _generate(job):
+    return generate(*job)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lang", default="en", choices=sorted(GENERATORS))
+    parser.add_argument("--sample_audio_path", default=None, type=str, nargs="+")
+    parser.add_argument("--seed", default=777, type=int)
+    parser.add_argument("--prefix", default="naturalness_MOS_sample_subset_", type=str,
+                        help="filename prefix of configs, followed by the subset index.")
+    parser.add_argument("--compact", default=False, action="store_true",
+                        help="define response scales once and refer to them by name.")
+    parser.add_argument("--precompress", default=False, action="store_true",
+                        help="also write .gz (and .br) compressed configs.")
+    parser.add_argument("--audio_variants", default=None, nargs="+", choices=sorted(AUDIO_VARIANTS),
+                        help="variants made by transcode_audio.py to load instead of wav, in order of preference.")
+    parser.add_argument("--waveform_peaks", default=False, action="store_true",
+                        help="load waveform peaks sidecars written by compute_waveform_peaks.py.")
+    parser.add_argument("--jobs", default=1, type=int)
+    parser.add_argument("--manifest", default=None, type=str,
+                        help="manifest json to skip generation if the config is up to date.")
+    parser.add_argument("--scan_index", default=None, type=str,
+                        help="json index of directory listings to speed up repeated scans.")
+    parser.add_argument("--audio_index", default=None, type=str,
+                        help="json index of audio formats to validate only new or modified files.")
+    parser.add_argument("--sample_rates", default=None, nargs="+", type=int,
+                        help="allowed sample rates of the wav files. by default, all of them must have the same rate.")
+    parser.add_argument("--skip_validation", default=False, action="store_true",
+                        help="do not validate the formats of the wav files.")
+    parser.add_argument("subset_root_dir")
+    parser.add_argument("outdir")
+    args = parser.parse_args()
+
+    # We assume that <subset_root_dir>/subset_<i>/<model_or_method_name_dir>/<wav_files>
+    # E.g.
+    #   subset_root_dir = "./configs/resources/samples_stereo_subset"
+    #   outdir = "./configs"
+    scan_index = ScanIndex(args.scan_index)
+    wav_filenames = sorted(find_files(args.subset_root_dir, include_root_dir=False, index=scan_index))
+    scan_index.save()
+    subset_wav_path_dict = {}
+    for wav in wav_filenames:
+        m = re.match(r"subset_(\d+)/", wav)
+        if m is not None:
+            subset_wav_path_dict.setdefault(int(m.group(1)), []).append(f"{args.subset_root_dir}/{wav}")
+    if not args.skip_validation:
+        _, problems = preflight([path for paths in subset_wav_path_dict.values() for path in paths],
+                                args.audio_index, args.jobs, sample_rates=args.sample_rates)
+        if problems:
+            parser.error(f"found {len(problems)} problems in the wav files, see above.")
+
+    # configs only depend on the arguments, the file listing and the generator scripts
+    manifest = Manifest(args.manifest)
+    package_dir = os.path.dirname(os.path.abspath(__file__))
+    generator_paths = [os.path.join(package_dir, f"{GENERATORS[args.lang]}.py"),
+                       os.path.join(package_dir, "config_generator.py")]
+    jobs = []
+    params = {}
+    for subset, wav_path_list in sorted(subset_wav_path_dict.items()):
+        outpath = f"{args.outdir}/{args.prefix}{subset}.yaml"
+        params[outpath] = {
+            "args": {
+                "lang": args.lang,
+                "sample_audio_path": args.sample_audio_path,
+                "seed": args.seed,
+                "compact": args.compact,
+                "precompress": args.precompress,
+                "audio_variants": args.audio_variants,
+                "waveform_peaks": args.waveform_peaks,
+            },
+            "wavs": hash_params(wav_path_list),
+        }
+        if manifest.is_fresh("config", outpath, generator_paths, params[outpath]):
+            continue
+        jobs.append((args.lang, wav_path_list, outpath, args.sample_audio_path, args.seed,
+                     args.compact, args.precompress, args.audio_variants, args.waveform_peaks))
+    print(f"{len(subset_wav_path_dict) - len(jobs)} configs are up to date.")
+
+    os.makedirs(args.outdir, exist_ok=True)
+    with span("write_configs", files=len(jobs)):
+        if args.jobs > 1:
+            executor = ProcessPoolExecutor(max_workers=args.jobs)
+            outpaths = executor.map(_generate, jobs, chunksize=max(1, len(jobs) // (args.jobs * 4)))
+        else:
+            executor = None
+            outpaths = map(_generate, jobs)
+        for outpath in outpaths:
+            manifest.record("config", outpath, generator_paths, params[outpath])
+        if executor is not None:
+            executor.shutdown()
+    manifest.save()
+
+    print(f"successfully generated {len(jobs)} configs.")
+
+
+if __name__ == "__main__":
+    main()
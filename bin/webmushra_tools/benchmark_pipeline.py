@@ -0,0 +1,322 @@
+# -*- coding: utf-8 -*-
+
+"""Benchmark the pipeline end-to-end on a synthetic corpus.
+
+Builds <workdir>/samples/<system>/<utt>.wav (N systems x M utterances
+of noise bursts) and a synthetic results/subjective_evalaution/lss.csv with K
+raters and R ratings of these files, whose trial ids and trial table
+(configs/corpus.trials.csv) are named as generate_config*.py names them, then
+runs each stage as a separate process:
+
+    stereo          convert_mono_to_stereo.py
+    divide          divide_audio_dir.py
+    config          generate_config_en.py
+    concat          concat_gt_and_conv_audio.py
+    summarize       summarize_results.py
+    aggregated      aggregated_results.py
+    screen          screen_raters.py
+
+For each stage the wall time, the peak RSS and the throughput (files/sec or
+rows/sec) are written as json, e.g. benchmark_<commit>.json. Use --compare
+with the json of another commit to print the speedup of each stage. The
+corpus is 16 bit PCM, or 32 bit float with --sample_format float32 like most
+real stimuli.
+
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+from .tracing import span
+from .trial_table import label_stimuli, trial_id, trial_row, write_trial_table
+from .wav_io import write_wav
+
+# the scripts in bin/ which run the commands of the package
+BIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# named like the systems of aggregated_results.py, so that it finds them
+SYSTEM_NAMES = ["original", "vocoder_waveglow", "vocoder_wavernn_nvidia", "vocoder_wavernn_fatchord",
+                "vocoder_fatchord"]
+
+
+# a process inherits the peak RSS of its parent at fork (Linux keeps it across exec), so each stage is
+# forked from this minimal interpreter instead of the benchmark process. It writes the exit code, wall time
+# and rusage of the stage (including the workers the stage waited for) as json to the fd of argv[1].
+LAUNCHER = """
+import json, os, sys, time
+start = time.perf_counter()
+pid = os.fork()
+if pid == 0:
+    os.execv(sys.argv[2], sys.argv[2:])
+_, status, rusage = os.wait4(pid, 0)
+with os.fdopen(int(sys.argv[1]), "w") as f:
+    json.dump({"returncode": os.waitstatus_to_exitcode(status), "wall_sec": time.perf_counter() - start,
+               "maxrss_kb": rusage.ru_maxrss, "user_sec": rusage.ru_utime, "sys_sec": rusage.ru_stime}, f)
+"""
+
+SAMPLE_FORMATS = ["pcm16", "float32"]
+
+STAGES = ["stereo", "divide", "config", "concat", "summarize", "aggregated", "screen"]
+
+# stages whose outputs are the inputs of each stage
+PREREQUISITES = {
+    "divide": ["stereo"],
+    "config": ["divide"],
+    "concat": ["stereo"],
+}
+
+
+def system_names(num_systems):
+    return SYSTEM_NAMES[:num_systems] + [f"system_{i}" for i in range(len(SYSTEM_NAMES), num_systems)]
+
+
+def make_corpus(root_dir, num_systems, num_utts, duration=3.0, sample_rate=24000, seed=0, sample_format="pcm16"):
+    """Write mono wav files of noise bursts, 16 bit PCM or 32 bit float (see SAMPLE_FORMATS).
+
+    Returns:
+        list: Written wav paths.
+
+    """
+    rng = np.random.default_rng(seed)
+    num_frames = int(duration * sample_rate)
+    envelope = np.abs(np.sin(np.linspace(0, 6 * np.pi, num_frames)))
+    paths = []
+    for system in system_names(num_systems):
+        os.makedirs(os.path.join(root_dir, system), exist_ok=True)
+        for utt in range(num_utts):
+            data = rng.normal(0, 3000, num_frames) * envelope
+            path = os.path.join(root_dir, system, f"{utt:04d}.wav")
+            write_samples(path, data.reshape(-1, 1), sample_rate, sample_format)
+            paths.append(path)
+    return paths
+
+
+def write_samples(path, data, sample_rate, sample_format="pcm16"):
+    """Write samples in 16 bit scale as 16 bit PCM or 32 bit float."""
+    if sample_format == "float32":
+        write_wav(path, (data / 2 ** 15).astype(np.float32), sample_rate, 4)
+    else:
+        write_wav(path, data.astype(np.int16), sample_rate, 2)
+
+
+def make_beep(path, sample_rate, duration=0.5, pad=0.25, sample_format="pcm16"):
+    """Write a stereo beep padded with silence."""
+    t = np.arange(int(duration * sample_rate)) / sample_rate
+    silence = np.zeros(int(pad * sample_rate))
+    beep = np.concatenate([silence, 8000 * np.sin(2 * np.pi * 1000 * t), silence])
+    write_samples(path, np.repeat(beep.reshape(-1, 1), 2, axis=1), sample_rate, sample_format)
+
+
+def make_results(path, trial_table, wav_paths, num_raters, num_ratings, seed=0):
+    """Write a synthetic lss.csv of the corpus whose ratings depend on the system, and its trial table.
+
+    The trial ids and labels are made from the wav paths as generate_config*.py
+    makes them (see trial_table.py), so that the analysis joins them.
+
+    Args:
+        path (str): Output lss.csv.
+        trial_table (str): Output trial table.
+        wav_paths (list): Wav paths of the corpus (see make_corpus).
+        num_raters (int): Number of raters.
+        num_ratings (int): Number of rows.
+        seed (int): Random seed.
+
+    Returns:
+        int: Number of written rows.
+
+    """
+    rng = np.random.default_rng(seed)
+    labels = label_stimuli(wav_paths)
+    systems = list(dict.fromkeys(labels[wav_path][0] for wav_path in wav_paths))
+    trial_ids = [trial_id(wav_path) for wav_path in wav_paths]
+    trial_system = np.array([systems.index(labels[wav_path][0]) for wav_path in wav_paths])
+    trial_idx = rng.integers(0, len(wav_paths), num_ratings)
+    rater_idx = rng.integers(0, num_raters, num_ratings)
+    quality = np.linspace(4.5, 2.5, len(systems))
+    ratings = np.clip(np.round(quality[trial_system[trial_idx]] + rng.normal(0, 0.8, num_ratings)), 1, 5).astype(int)
+    times = rng.integers(3000, 20000, num_ratings)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        f.write("session_test_id,name,trial_id,stimuli_rating,stimuli,rating_time\n")
+        for t, r, rating, ms in zip(trial_idx, rater_idx, ratings, times):
+            f.write(f"subjective_evalaution,R{r:06d},{trial_ids[t]},\" {rating} \",C1,{ms}\n")
+    os.makedirs(os.path.dirname(trial_table), exist_ok=True)
+    write_trial_table([trial_row(wav_path, "naturalness", i, None, labels[wav_path])
+                       for i, wav_path in enumerate(wav_paths)], trial_table)
+    return num_ratings
+
+
+def run_stage(name, command, num_items, unit, cwd=None, log=None):
+    """Run a stage as a child process and measure it.
+
+    The stage is run by LAUNCHER, so that the peak RSS is the maximum of the stage
+    process and the workers it waited for, not of this process. If tracing is
+    enabled, the stage process writes its spans to the same trace.
+
+    """
+    read_fd, write_fd = os.pipe()
+    with span(f"benchmark {name}", items=num_items, unit=unit):
+        process = subprocess.Popen([sys.executable, "-S", "-c", LAUNCHER, str(write_fd)] + command, cwd=cwd,
+                                   stdout=log, stderr=subprocess.STDOUT, pass_fds=(write_fd,))
+        os.close(write_fd)
+        with os.fdopen(read_fd) as f:
+            usage = f.read()
+        process.wait()
+    usage = json.loads(usage) if usage else {"returncode": process.returncode}
+    if usage["returncode"] != 0:
+        print(f"{name:>12} failed with exit code {usage['returncode']}, see benchmark.log.")
+        return {"stage": name, "failed": usage["returncode"]}
+    elapsed = usage["wall_sec"]
+    result = {
+        "stage": name,
+        "wall_sec": elapsed,
+        "peak_rss_mb": usage["maxrss_kb"] / 1024,
+        "user_sec": usage["user_sec"],
+        "sys_sec": usage["sys_sec"],
+        "num_items": num_items,
+        "unit": unit,
+        "throughput": num_items / max(elapsed, 1e-9),
+    }
+    print(f"{name:>12} {elapsed:>9.2f} sec {result['peak_rss_mb']:>9.1f} MB "
+          f"{result['throughput']:>12.1f} {unit}/sec")
+    return result
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=BIN_DIR,
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num_systems", default=5, type=int)
+    parser.add_argument("--num_utts", default=100, type=int, help="number of utterances per system.")
+    parser.add_argument("--duration", default=3.0, type=float, help="seconds per utterance.")
+    parser.add_argument("--sample_rate", default=24000, type=int)
+    parser.add_argument("--sample_format", default="pcm16", choices=SAMPLE_FORMATS,
+                        help="sample format of the corpus. most real stimuli are float32.")
+    parser.add_argument("--num_wavs_in_each_subset", default=25, type=int)
+    parser.add_argument("--num_raters", default=1000, type=int)
+    parser.add_argument("--num_ratings", default=1000000, type=int)
+    parser.add_argument("--jobs", default=os.cpu_count(), type=int)
+    parser.add_argument("--stages", default=None, nargs="+",
+                        choices=STAGES,
+                        help="stages to measure. defaults to all. prerequisites are run but not recorded.")
+    parser.add_argument("--output", default=None, type=str,
+                        help="result json. defaults to benchmark_<commit>.json.")
+    parser.add_argument("--compare", default=None, type=str, help="result json of a previous run to compare with.")
+    parser.add_argument("--keep", default=False, action="store_true", help="keep the work directory.")
+    parser.add_argument("workdir", type=str)
+    args = parser.parse_args()
+
+    workdir = os.path.abspath(args.workdir)
+    samples = os.path.join(workdir, "samples")
+    stereo = os.path.join(workdir, "samples_stereo")
+    subsets = os.path.join(workdir, "samples_stereo_subset")
+    results_dir = os.path.join(workdir, "results", "subjective_evalaution")
+    # found by aggregated_results.py in ./configs
+    trial_table = os.path.join(workdir, "configs", "corpus.trials.csv")
+    systems = system_names(args.num_systems)
+    num_wavs = args.num_systems * args.num_utts
+    measured = args.stages or STAGES
+    stages = set(measured)
+    for stage in reversed(STAGES):
+        if stage in stages:
+            stages.update(PREREQUISITES.get(stage, []))
+
+    # only directories made by this script are overwritten and removed
+    marker = os.path.join(workdir, ".benchmark_pipeline")
+    if os.path.exists(workdir) and os.listdir(workdir):
+        if not os.path.exists(marker):
+            parser.error(f"{workdir} is not empty and was not made by this script.")
+        shutil.rmtree(workdir)
+    os.makedirs(workdir, exist_ok=True)
+    open(marker, "w").close()
+
+    start = time.perf_counter()
+    wav_paths = make_corpus(samples, args.num_systems, args.num_utts, args.duration, args.sample_rate,
+                            sample_format=args.sample_format)
+    make_beep(os.path.join(workdir, "beep.wav"), args.sample_rate, sample_format=args.sample_format)
+    make_results(os.path.join(results_dir, "lss.csv"), trial_table, wav_paths, args.num_raters, args.num_ratings)
+    print(f"made synthetic corpus ({num_wavs} files) and {args.num_ratings} ratings "
+          f"in {time.perf_counter() - start:.2f} sec.")
+
+    python = [sys.executable]
+
+    def bin_path(name):
+        return os.path.join(BIN_DIR, name)
+
+    commands = {
+        "stereo": (python + [bin_path("convert_mono_to_stereo.py"), "--jobs", str(args.jobs), samples, stereo],
+                   num_wavs, "files", None),
+        "divide": (python + [bin_path("divide_audio_dir.py"),
+                             "--num_wavs_in_each_subset", str(args.num_wavs_in_each_subset), stereo, subsets],
+                   num_wavs, "files", None),
+        "config": (python + [bin_path("generate_config_en.py"), os.path.join(subsets, "subset_0"),
+                             os.path.join(workdir, "config.yaml")],
+                   args.num_systems * min(args.num_wavs_in_each_subset, args.num_utts), "pages", None),
+        "concat": (python + [bin_path("concat_gt_and_conv_audio.py"),
+                             "--beep_wav", os.path.join(workdir, "beep.wav"),
+                             "--gt_wavdir", os.path.join(stereo, systems[0]),
+                             "--root_outdir", os.path.join(workdir, "samples_stereo_concat"),
+                             "--jobs", str(args.jobs),
+                             "--conv_wavdirs"] + [os.path.join(stereo, system) for system in systems[1:]],
+                   (args.num_systems - 1) * args.num_utts, "files", None),
+        "summarize": (python + [bin_path("summarize_results.py"), results_dir, "--gt_method", systems[0],
+                                "--trial_tables", trial_table],
+                      args.num_ratings, "rows", None),
+        "aggregated": (python + [bin_path("aggregated_results.py"), "--competitors"] + systems,
+                       args.num_ratings, "rows", workdir),
+        "screen": (python + [bin_path("screen_raters.py"), "--gt_method", systems[0], "--trial_tables", trial_table,
+                             "--wav_dirs", samples, "--report", os.path.join(workdir, "raters.csv"), results_dir],
+                   args.num_ratings, "rows", None),
+    }
+
+    report = {
+        "commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "params": {k: v for k, v in vars(args).items() if k not in ["output", "compare", "keep", "workdir"]},
+        "stages": {},
+    }
+    print(f"{'stage':>12} {'wall':>13} {'peak RSS':>12} {'throughput':>17}")
+    with open(os.path.join(workdir, "benchmark.log"), "w") as log:
+        for stage in [stage for stage in STAGES if stage in stages]:
+            command, num_items, unit, cwd = commands[stage]
+            result = run_stage(stage, command, num_items, unit, cwd, log)
+            if stage in measured:
+                report["stages"][stage] = result
+
+    output = args.output or f"benchmark_{report['commit'] or 'unknown'}.json"
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {output}.")
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        print(f"speedup over {baseline.get('commit')}:")
+        for stage, result in report["stages"].items():
+            base = baseline["stages"].get(stage, {})
+            if "wall_sec" in result and "wall_sec" in base:
+                print(f"{stage:>12} {base['wall_sec'] / max(result['wall_sec'], 1e-9):>7.2f}x "
+                      f"(peak RSS {base['peak_rss_mb']:.1f} -> {result['peak_rss_mb']:.1f} MB)")
+
+    if not args.keep:
+        shutil.rmtree(workdir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+# -*- coding: utf-8 -*-
+
+"""Single entry point of the tools.
+
+    $ webmushra-tools <command> [options of the command]
+    $ webmushra-tools --time-imports summarize results/<testId>
+    $ webmushra-tools --profile trace.json generate-batch ...
+
+Only the module of the command is imported. The commands which only read
+the headers of wav files or write configs (validate, divide, generate,
+generate-batch, bundle, ...) do not load numpy: wav_io, audio_index and
+compute_waveform_peaks import it in the functions which read samples. The
+analysis commands (summarize, compare, screen, ingest) import pandas (and with
+it pyarrow) and design imports numpy when the module is loaded, since every
+run needs them; scipy is imported by the functions which need it.
+
+"""
+
+import argparse
+import builtins
+import importlib.util
+import sys
+import time
+
+from . import __version__, tracing
+
+# command -> (module, description)
+COMMANDS = {
+    "prepare": ("convert_mono_to_stereo", "convert mono wav files to padded stereo"),
+    "validate": ("audio_index", "index the formats of wav / flac files and validate them"),
+    "divide": ("divide_audio_dir", "divide wav files into subsets"),
+    "concat": ("concat_gt_and_conv_audio", "concatenate ground truth, beep and converted audio"),
+    "transcode": ("transcode_audio", "write flac / opus / aac variants of wav files"),
+    "peaks": ("compute_waveform_peaks", "write waveform peaks sidecars"),
+    "generate": ("generate_config_en", "generate a config with english instructions"),
+    "generate-ja": ("generate_config", "generate a config with japanese instructions"),
+    "generate-batch": ("batch_generate_config", "generate the configs of all subsets"),
+    "bundle": ("deploy_bundle", "bundle configs and stimuli with content-hashed file names"),
+    "design": ("generate_design", "generate the configs of a balanced design"),
+    "ingest": ("ingest_results", "convert new result rows into the parquet store"),
+    "summarize": ("summarize_results", "print mean and confidence interval of each system"),
+    "aggregate": ("aggregated_results", "print mean and standard error of each competitor"),
+    "compare": ("compare_systems", "pairwise significance tests between systems"),
+    "screen": ("screen_raters", "screen raters and write a cleaned dataset"),
+    "monitor": ("monitor_results", "print running statistics while results arrive"),
+    "receive": ("results_receiver", "receive results in place of service/write.php"),
+    "export-db": ("export_results_db", "export the results database as csv"),
+    "load-test": ("load_test_receiver", "load test of the results receiver"),
+    "assign": ("assignment_service", "assign subset configs to workers adaptively"),
+    "simulate-assign": ("simulate_assignment", "simulate assignment policies"),
+    "benchmark": ("benchmark_pipeline", "benchmark the pipeline on a synthetic corpus"),
+    "trace": ("tracing", "summarize and compare traces written with --profile"),
+}
+
+
+class ImportTimer(object):
+    """Measure the time of the imports done while it is active.
+
+    Each import is measured including the imports it triggers, and nested
+    imports are not counted again, so the times add up to the total.
+
+    """
+
+    def __init__(self):
+        self.times = {}
+        self.depth = 0
+        self.original = None
+
+    def __enter__(self):
+        self.original = builtins.__import__
+        builtins.__import__ = self._import
+        return self
+
+    def __exit__(self, *exc):
+        builtins.__import__ = self.original
+
+    def measure(self, name, load):
+        start = time.perf_counter()
+        self.depth += 1
+        try:
+            return load()
+        finally:
+            self.depth -= 1
+            if self.depth == 0:
+                self.times[name] = self.times.get(name, 0.0) + time.perf_counter() - start
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        def load():
+            return self.original(name, globals, locals, fromlist, level)
+
+        module_name = name
+        if level > 0:
+            package = (globals or {}).get("__package__") or ""
+            module_name = importlib.util.resolve_name("." * level + name, package) if name else package
+        if module_name in sys.modules:
+            return load()
+        return self.measure(module_name, load)
+
+    def report(self, elapsed, file=sys.stderr):
+        total = sum(self.times.values())
+        print(f"imports took {total:.3f} sec of {elapsed:.3f} sec:", file=file)
+        for name, seconds in sorted(self.times.items(), key=lambda item: -item[1]):
+            if seconds >= 0.001:
+                print(f"{seconds:>9.3f} sec  {name}", file=file)
+
+
+def run(command, argv=None, time_imports=False):
+    """Run a command with its arguments (defaults to sys.argv[1:])."""
+    module_name, _ = COMMANDS[command]
+    argv = sys.argv[1:] if argv is None else argv
+    # argparse of the command uses sys.argv, and shows the command in its usage
+    sys.argv = [f"webmushra-tools {command}"] + list(argv)
+    tracing.process_name(sys.argv[0])
+    with tracing.span(command, argv=" ".join(argv)):
+        return _run(module_name, time_imports)
+
+
+def _run(module_name, time_imports):
+    if not time_imports:
+        return importlib.import_module(f".{module_name}", __package__).main()
+
+    start = time.perf_counter()
+    timer = ImportTimer()
+    with timer:
+        try:
+            module = timer.measure(f"{__package__}.{module_name}",
+                                   lambda: importlib.import_module(f".{module_name}", __package__))
+            return module.main()
+        finally:
+            timer.report(time.perf_counter() - start)
+
+
+def main():
+    width = max(len(command) for command in COMMANDS)
+    parser = argparse.ArgumentParser(
+        prog="webmushra-tools",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="commands:\n" + "\n".join(f"  {command:<{width}}  {description}"
+                                         for command, (_, description) in COMMANDS.items())
+               + "\n\nrun `webmushra-tools <command> -h` for the options of each command.")
+    parser.add_argument("--version", action="version", version=f"%(prog)s {__version__}")
+    parser.add_argument("--time-imports", default=False, action="store_true",
+                        help="print the time spent on importing modules to stderr.")
+    parser.add_argument("--profile", default=None, metavar="TRACE",
+                        help="write the spans of the stages to this trace (see webmushra_tools/tracing.py).")
+    parser.add_argument("--profile-dir", default=None, metavar="DIR",
+                        help="also dump a cProfile of each span to this directory.")
+    parser.add_argument("command", choices=list(COMMANDS), metavar="command")
+    parser.add_argument("args", nargs=argparse.REMAINDER, help="options of the command.")
+    args = parser.parse_args()
+    if args.profile_dir is not None and args.profile is None:
+        parser.error("--profile-dir requires --profile.")
+    if args.profile is not None:
+        tracing.enable(args.profile, args.profile_dir)
+    return run(args.command, args.args, args.time_imports)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
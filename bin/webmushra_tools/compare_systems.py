@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+
+"""Pairwise significance tests between all systems.
+
+Runs a paired bootstrap over raters and utterances, the Mann-Whitney U test
+and the Wilcoxon signed-rank test on every pair of systems (see
+pairwise_stats.py), corrects the p-values for multiple comparisons and prints
+a significance matrix: the difference of the means of the row and column
+system, marked with * if significant.
+
+    $ ./bin/compare_systems.py --trial_tables ./configs/*.trials.csv -- results/<testId>
+
+"""
+
+import argparse
+import os
+import time
+
+from .mos_stats import extract_system
+from .pairwise_stats import (CORRECTIONS, TESTS, RatingMatrix, compare_systems, extract_utterance,
+                            significance_matrix)
+from .results_db import read_ratings
+from .results_store import read_results
+from .trial_table import join_trials, read_trial_tables
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--methods", default=None, nargs="+", type=str,
+                        help="methods contained in the trial ids. with --trial_tables, "
+                             "the systems to compare (default: all).")
+    parser.add_argument("--trial_tables", default=None, nargs="+", type=str,
+                        help="<config>.trials.csv written by generate_config*.py to label trials exactly.")
+    parser.add_argument("--num_bootstrap", default=10000, type=int)
+    parser.add_argument("--confidence", default=0.95, type=float)
+    parser.add_argument("--correction", default="holm", choices=CORRECTIONS)
+    parser.add_argument("--alpha", default=0.05, type=float)
+    parser.add_argument("--test", default="bootstrap", choices=TESTS, help="test of the significance matrix.")
+    parser.add_argument("--jobs", default=os.cpu_count(), type=int)
+    parser.add_argument("--seed", default=0, type=int)
+    parser.add_argument("--pairs_csv", default=None, type=str, help="write all tests of all pairs.")
+    parser.add_argument("--matrix_csv", default=None, type=str, help="write the significance matrix.")
+    parser.add_argument("--db", default=None, type=str,
+                        help="read ratings from the database of results_receiver.py --backend sqlite.")
+    parser.add_argument("--test_id", default=None, type=str,
+                        help="test id in --db. defaults to the name of results_dir.")
+    parser.add_argument("results_dir", nargs="?", default="~/results/subjective_evalaution", type=str,
+                        help="directory of lss.csv (and the store of ingest_results.py).")
+    args = parser.parse_args()
+    if args.db is not None and not os.path.isfile(args.db):
+        parser.error(f"{args.db} does not exist.")
+
+    start = time.perf_counter()
+    if args.db is not None:
+        test_id = args.test_id or os.path.basename(os.path.normpath(args.results_dir))
+        result = read_ratings(args.db, test_id)[["name", "trial_id", "stimuli_rating"]]
+    else:
+        result = read_results(os.path.expanduser(args.results_dir), columns=["name", "trial_id", "stimuli_rating"])
+    result = result.dropna(subset=["stimuli_rating"]).reset_index(drop=True)
+    if args.trial_tables is not None:
+        table = read_trial_tables(args.trial_tables)
+        systems = join_trials(result["trial_id"], table)
+        utterances = join_trials(result["trial_id"], table, "utt_id")
+        if args.methods is not None:
+            systems = systems.cat.set_categories(args.methods)
+    else:
+        if args.methods is None:
+            parser.error("--methods or --trial_tables is required.")
+        systems = extract_system(result["trial_id"], args.methods)
+        utterances = extract_utterance(result["trial_id"], args.methods)
+    matrix = RatingMatrix(result["name"], utterances, systems, result["stimuli_rating"])
+    print(f"read {len(matrix.rating)} ratings of {len(matrix.systems)} systems "
+          f"in {time.perf_counter() - start:.2f} sec.")
+
+    start = time.perf_counter()
+    pairs = compare_systems(matrix, args.num_bootstrap, args.confidence, args.correction, args.jobs, args.seed)
+    print(f"compared {len(pairs)} pairs with {args.num_bootstrap} resamples "
+          f"in {time.perf_counter() - start:.2f} sec ({args.jobs} jobs).")
+
+    significance = significance_matrix(pairs, matrix.systems, args.test, args.alpha)
+    print(f"difference of the means (row - column), * if p < {args.alpha} "
+          f"({args.test}, {args.correction} corrected):")
+    print(significance.to_string())
+    if args.pairs_csv is not None:
+        pairs.to_csv(args.pairs_csv, index=False)
+    if args.matrix_csv is not None:
+        significance.to_csv(args.matrix_csv)
+
+
+if __name__ == "__main__":
+    main()
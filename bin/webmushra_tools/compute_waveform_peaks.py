@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+
+"""Precompute waveform peaks and durations of stimuli.
+
+For each <name>.wav under the root directory, <name>.peaks.json is written:
+
+    {
+        "sampleRate": <int>,
+        "length": <number of frames>,
+        "duration": <seconds>,
+        "numPeaks": <int>,
+        "peaks": <base64 of int8 [min_0, max_0, min_1, max_1, ...] scaled by 127>
+    }
+
+The peaks are computed from the average of all channels. With `waveformPeaks: true`
+in the config (generate_config_en.py --waveform_peaks), webMUSHRA draws waveforms
+from the sidecars instead of scanning the decoded audio.
+
+"""
+
+import argparse
+import base64
+import json
+import os
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+from .file_scanner import ScanIndex, find_files
+from .manifest import Manifest
+from .tracing import span
+from .wav_io import read_wav, to_float
+
+PEAKS_EXTENSION = "peaks.json"
+
+
+def peaks_path(wav_path):
+    """Return path of peaks sidecar of wav file."""
+    return f"{os.path.splitext(wav_path)[0]}.{PEAKS_EXTENSION}"
+
+
+def compute_peaks(samples, num_peaks=1024):
+    """Compute min / max of samples in equally sized blocks.
+
+    Args:
+        samples (ndarray): Float samples with shape (#frames,).
+        num_peaks (int): Number of blocks. Limited to the number of frames.
+
+    Returns:
+        ndarray: Min of each block.
+        ndarray: Max of each block.
+
+    """
+    import numpy as np
+
+    num_peaks = max(1, min(num_peaks, len(samples)))
+    if len(samples) == 0:
+        return np.zeros(1), np.zeros(1)
+    starts = np.arange(num_peaks) * len(samples) // num_peaks
+    return np.minimum.reduceat(samples, starts), np.maximum.reduceat(samples, starts)
+
+
+def write_peaks(wav_path, out_path, num_peaks=1024):
+    """Write peaks sidecar of a PCM or IEEE float wav file.
+
+    Returns:
+        float: Duration of the wav file in seconds.
+
+    """
+    import numpy as np
+
+    data, sr, sampwidth = read_wav(wav_path)
+    mins, maxs = compute_peaks(to_float(data, sampwidth).mean(axis=1), num_peaks)
+    peaks = np.empty(len(mins) * 2, dtype=np.int8)
+    peaks[0::2] = np.clip(np.round(mins * 127), -127, 127)
+    peaks[1::2] = np.clip(np.round(maxs * 127), -127, 127)
+    sidecar = {
+        "sampleRate": sr,
+        "length": len(data),
+        "duration": len(data) / sr,
+        "numPeaks": len(mins),
+        "peaks": base64.b64encode(peaks.tobytes()).decode("ascii"),
+    }
+    with open(out_path, "w") as f:
+        json.dump(sidecar, f, separators=(",", ":"))
+    return sidecar["duration"]
+
+
+def _write_peaks(job):
+    return write_peaks(*job)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num_peaks", default=1024, type=int,
+                        help="number of min / max pairs per file.")
+    parser.add_argument("--jobs", default=os.cpu_count(), type=int)
+    parser.add_argument("--manifest", default=None, type=str,
+                        help="manifest json to skip files which are already up to date.")
+    parser.add_argument("--scan_index", default=None, type=str,
+                        help="json index of directory listings to speed up repeated scans.")
+    parser.add_argument("root_wav_dir", type=str)
+    args = parser.parse_args()
+
+    scan_index = ScanIndex(args.scan_index)
+    wav_filenames = sorted(find_files(args.root_wav_dir, index=scan_index))
+    scan_index.save()
+
+    manifest = Manifest(args.manifest)
+    params = {"num_peaks": args.num_peaks}
+    jobs = []
+    for wav_path in wav_filenames:
+        out_path = peaks_path(wav_path)
+        if not manifest.is_fresh("peaks", out_path, [wav_path], params):
+            jobs.append((wav_path, out_path, args.num_peaks))
+    if len(jobs) < len(wav_filenames):
+        print(f"{len(wav_filenames) - len(jobs)} files are up to date.")
+
+    start = time.perf_counter()
+    chunksize = max(1, len(jobs) // (args.jobs * 16))
+    with span("compute_peaks", files=len(jobs)), ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        durations = list(executor.map(_write_peaks, jobs, chunksize=chunksize))
+    elapsed = time.perf_counter() - start
+
+    for wav_path, out_path, _ in jobs:
+        manifest.record("peaks", out_path, [wav_path], params)
+    manifest.save()
+
+    print(f"computed peaks of {len(jobs)} files ({sum(durations) / 3600:.2f} hours) in {elapsed:.2f} sec "
+          f"({len(jobs) / max(elapsed, 1e-9):.1f} files/sec, {args.jobs} jobs).")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+
+"""Concatenate ground truth, beep and converted audio for speaker similarity evaluation.
+
+Files are paired by file name (e.g. <gt_wavdir>/p225_001.wav and
+<conv_wavdir>/p225_001.wav), so a missing file only drops its own pair. The
+samples of the inputs are memory-mapped and copied into a preallocated
+output file, so PCM and IEEE float files are written in their own format,
+and the beep is kept in memory, one per format (sample rate, channels,
+sample width and float or not). Beeps of --beep_wav are used for their
+format, and generated for the other formats.
+
+"""
+
+import argparse
+import os
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .file_scanner import ScanIndex, find_files
+from .tracing import span
+from .wav_io import from_float, read_wav, read_wav_header, to_bytes, to_float, wav_header_bytes
+
+DEFAULT_BEEP_WAVS = ["configs/resources/beep_stereo_pad_8khz.wav", "configs/resources/beep_stereo_pad_24khz.wav"]
+
+# (sample width, is float) of the formats beeps of --beep_wav are converted to
+SAMPLE_FORMATS = [(1, False), (2, False), (3, False), (4, False), (4, True)]
+
+# beep sample bytes of each (sample_rate, channels, sampwidth, is_float) in this process
+_beeps = {}
+
+
+def make_beep(sample_rate, channels, sampwidth, is_float=False, frequency=1000, duration=0.2, pad=0.6,
+              amplitude=0.4):
+    """Make a beep padded with silence.
+
+    Returns:
+        ndarray: Integer (or float if is_float) samples with shape (#frames, #channels).
+
+    """
+    t = np.arange(int(duration * sample_rate)) / sample_rate
+    # 10 ms fade in and out to avoid clicks
+    fade = np.minimum(1, np.minimum(t, t[::-1]) / 0.01)
+    silence = np.zeros(int(pad * sample_rate))
+    beep = np.concatenate([silence, amplitude * fade * np.sin(2 * np.pi * frequency * t), silence])
+    return from_float(np.repeat(beep.reshape(-1, 1), channels, axis=1), sampwidth, is_float)
+
+
+def load_beeps(beep_wavs):
+    """Load beep wav files into the cache of this process, converted to the sample formats and channels."""
+    for path in beep_wavs:
+        data, sample_rate, sampwidth = read_wav(path)
+        is_float = data.dtype.kind == "f"
+        _beeps[(sample_rate, data.shape[1], sampwidth, is_float)] = to_bytes(data, sampwidth, is_float)
+        for channels in [1, 2]:
+            for width, float_ in SAMPLE_FORMATS:
+                if (sample_rate, channels, width, float_) not in _beeps:
+                    mixed = to_float(data, sampwidth).mean(axis=1, keepdims=True)
+                    _beeps[(sample_rate, channels, width, float_)] = to_bytes(
+                        from_float(np.repeat(mixed, channels, axis=1), width, float_), width, float_)
+
+
+def get_beep(sample_rate, channels, sampwidth, is_float=False):
+    key = (sample_rate, channels, sampwidth, is_float)
+    if key not in _beeps:
+        _beeps[key] = to_bytes(make_beep(sample_rate, channels, sampwidth, is_float), sampwidth, is_float)
+    return _beeps[key]
+
+
+def stem_index(wav_paths):
+    """Map file stem to wav path.
+
+    Raises:
+        ValueError: If two files have the same stem (in different sub directories).
+
+    """
+    index = {}
+    for path in wav_paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        if stem in index:
+            raise ValueError(f"{path} and {index[stem]} have the same file name.")
+        index[stem] = path
+    return index
+
+
+def concat_pair(args):
+    """Write gt + beep + conv. Returns the number of written frames."""
+    gt_wav, conv_wav, out_wav = args
+    # the samples are copied as bytes, so any format works as long as both files have it
+    gt, conv = read_wav_header(gt_wav, allow_float=True), read_wav_header(conv_wav, allow_float=True)
+    fmt = (gt["sample_rate"], gt["channels"], gt["sampwidth"], gt["is_float"])
+    if (conv["sample_rate"], conv["channels"], conv["sampwidth"], conv["is_float"]) != fmt:
+        raise ValueError(f"{gt_wav} and {conv_wav} have different formats.")
+    sample_rate, channels, sampwidth, is_float = fmt
+    beep = get_beep(sample_rate, channels, sampwidth, is_float)
+    frame_bytes = channels * sampwidth
+    num_frames = gt["num_frames"] + len(beep) // frame_bytes + conv["num_frames"]
+
+    header = wav_header_bytes(num_frames, channels, sample_rate, sampwidth, is_float)
+    with open(out_wav, "wb") as f:
+        f.write(header)
+        f.truncate(len(header) + num_frames * frame_bytes)
+    out = np.memmap(out_wav, dtype=np.uint8, mode="r+", offset=len(header), shape=(num_frames * frame_bytes,))
+    position = 0
+    for source in [(gt_wav, gt), beep, (conv_wav, conv)]:
+        if isinstance(source, bytes):
+            data = np.frombuffer(source, dtype=np.uint8)
+        else:
+            path, info = source
+            if info["num_frames"] == 0:
+                continue
+            data = np.memmap(path, dtype=np.uint8, mode="r", offset=info["data_offset"],
+                             shape=(info["num_frames"] * frame_bytes,))
+        out[position:position + len(data)] = data
+        position += len(data)
+    out.flush()
+    del out
+    return num_frames
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--beep_wav", default=DEFAULT_BEEP_WAVS, nargs="+", type=str,
+                        help="beep wav files inserted between two audios, used for their sample rate. "
+                             "beeps of other sample rates are generated.")
+    parser.add_argument("--seed", default=777, type=int)
+    parser.add_argument("--gt_wavdir", type=str, required=True)
+    parser.add_argument("--conv_wavdirs", nargs="+", type=str, required=True)
+    parser.add_argument("--root_outdir", type=str, required=True)
+    parser.add_argument("--jobs", default=os.cpu_count(), type=int)
+    parser.add_argument("--scan_index", default=None, type=str,
+                        help="json index of directory listings to speed up repeated scans.")
+    args = parser.parse_args()
+
+    # We assume that <root_wav_dir>/<model_or_method_name_dir>/<wav_files>
+    gt_wavdir = args.gt_wavdir
+    root_outdir = args.root_outdir
+    if args.beep_wav is DEFAULT_BEEP_WAVS:
+        beep_wavs = [path for path in args.beep_wav if os.path.exists(path)]
+    else:
+        beep_wavs = args.beep_wav
+        for path in beep_wavs:
+            if not os.path.exists(path):
+                parser.error(f"{path} does not exist.")
+    conv_wavdirs = args.conv_wavdirs
+
+    start = time.perf_counter()
+    scan_index = ScanIndex(args.scan_index)
+    gt_index = stem_index(find_files(gt_wavdir, index=scan_index))
+    tasks = []
+    for conv_wavdir in conv_wavdirs:
+        outdir = f"{root_outdir}/{os.path.basename(conv_wavdir)}"
+        conv_index = stem_index(find_files(conv_wavdir, index=scan_index))
+        missing = sorted(set(gt_index) ^ set(conv_index))
+        if missing:
+            print(f"{conv_wavdir}: {len(missing)} files are not in both directories "
+                  f"(e.g. {missing[0]}) and skipped.")
+
+        os.makedirs(outdir, exist_ok=True)
+        for stem in sorted(set(gt_index) & set(conv_index)):
+            conv_wav = conv_index[stem]
+            tasks.append((gt_index[stem], conv_wav, f"{outdir}/{os.path.basename(conv_wav)}"))
+    scan_index.save()
+
+    with span("concat_pairs", files=len(tasks)):
+        if args.jobs > 1:
+            with ProcessPoolExecutor(max_workers=args.jobs, initializer=load_beeps,
+                                     initargs=(beep_wavs,)) as executor:
+                list(executor.map(concat_pair, tasks, chunksize=max(1, len(tasks) // (4 * args.jobs))))
+        else:
+            load_beeps(beep_wavs)
+            for task in tasks:
+                concat_pair(task)
+    elapsed = time.perf_counter() - start
+    print(f"concatenated {len(tasks)} files in {elapsed:.2f} sec ({len(tasks) / max(elapsed, 1e-9):.1f} files/sec).")
+
+
+if __name__ == "__main__":
+    main()
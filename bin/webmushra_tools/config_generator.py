@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+
+"""Config generation shared by generate_config.py (Japanese) and generate_config_en.py (English).
+
+The language modules define the pages (make_first_page, make_page, ...) and
+the response scales, and this module orders them into a config.
+
+"""
+
+import argparse
+import random
+
+from .audio_index import preflight
+from .config_writer import compact_pages, dump_config, write_precompressed
+from .file_scanner import ScanIndex, find_files
+from .manifest import Manifest, hash_params
+from .transcode_audio import AUDIO_VARIANTS
+from .tracing import span
+from .trial_table import label_stimuli, trial_row, trial_table_path, write_trial_table
+
+
+def make_pages(pages, wav_path_list, sample_audio_path=None, similarity_wav_path_list=None, seed=777, trials=None):
+    """Generate pages of the evaluation.
+
+    Args:
+        pages (module): Module of the language, which makes each page
+            (e.g. generate_config_en).
+        wav_path_list (list): Sorted wav paths to be evaluated.
+        sample_audio_path (list): Wav paths of real-human speech samples for volume check.
+        similarity_wav_path_list (list): Sorted wav paths for speaker similarity evaluation.
+        seed (int): Random seed of page order. If None, the pages keep the given order.
+        trials (list): If given, rows of the trial table (see trial_table.py)
+            are appended to it as the rating pages are generated.
+
+    Yields:
+        dict: Page config.
+
+    """
+    wav_path_list = list(wav_path_list)
+    if seed is not None:
+        random.Random(seed).shuffle(wav_path_list)
+    yield pages.make_first_page()
+    yield pages.make_explanation_page()
+    if sample_audio_path is not None:
+        for sample_wav in sample_audio_path:
+            yield pages.make_volume_page(sample_wav)
+    page_index = 2 + len(sample_audio_path or [])
+    labels = label_stimuli(wav_path_list) if trials is not None else None
+    for idx, wav_path in enumerate(wav_path_list, 1):
+        if trials is not None:
+            trials.append(trial_row(wav_path, "naturalness", page_index + idx - 1, seed, labels[wav_path]))
+        yield pages.make_page(idx, len(wav_path_list), wav_path)
+
+    if similarity_wav_path_list is not None:
+        page_index += len(wav_path_list) + 2
+        wav_path_list = list(similarity_wav_path_list)
+        if seed is not None:
+            random.Random(seed).shuffle(wav_path_list)
+        yield pages.make_similarity_first_page()
+        yield pages.make_similarity_explanation_page()
+        labels = label_stimuli(wav_path_list) if trials is not None else None
+        for idx, wav_path in enumerate(wav_path_list, 1):
+            if trials is not None:
+                trials.append(trial_row(wav_path, "similarity", page_index + idx - 1, seed, labels[wav_path]))
+            yield pages.make_similarity_page(idx, len(wav_path_list), wav_path)
+
+    yield pages.make_finish_page()
+
+
+def make_config(pages, wav_path_list, sample_audio_path=None, similarity_wav_path_list=None, seed=777, compact=False,
+                audio_variants=None, waveform_peaks=False, trials=None):
+    """Make config whose pages are generated lazily (see make_pages).
+
+    pages is the module of the language (see make_pages). If compact is
+    True, the response scales are defined once in "responses" and pages refer
+    to them by name. audio_variants is the list of variants (see
+    transcode_audio.py) the browser should load instead of wav files. If
+    waveform_peaks is True, the browser loads the sidecars written by
+    compute_waveform_peaks.py. trials is passed to make_pages.
+
+    """
+    config = {
+        "testname": "Subjective evaluation",
+        "testId": "subjective_evalaution",
+        "bufferSize": 2048,
+        "stopOnErrors": True,
+        "showButtonPreviousPage": False,
+        "remoteService": "service/write.php",
+        "pages": make_pages(pages, wav_path_list, sample_audio_path, similarity_wav_path_list, seed, trials),
+    }
+    if audio_variants:
+        config["audioVariants"] = [AUDIO_VARIANTS[variant] for variant in audio_variants]
+    if waveform_peaks:
+        config["waveformPeaks"] = True
+    if compact:
+        config["responses"] = {
+            "naturalness": pages.response_template(),
+            "similarity": pages.similarity_response_template(),
+        }
+        config["pages"] = compact_pages(config["pages"], config["responses"])
+    return config
+
+
+def main(pages):
+    """Generate a config with the pages of a language module."""
+    parser = argparse.ArgumentParser(description=pages.__doc__)
+    parser.add_argument("--sample_audio_path", default=None, type=str, nargs="+")
+    parser.add_argument("--seed", default=777, type=int)
+    parser.add_argument("--similarity_root_wav_dir", default=None, type=str)
+    parser.add_argument("--compact", default=False, action="store_true",
+                        help="define response scales once and refer to them by name.")
+    parser.add_argument("--precompress", default=False, action="store_true",
+                        help="also write .gz (and .br) compressed configs.")
+    parser.add_argument("--audio_variants", default=None, nargs="+", choices=sorted(AUDIO_VARIANTS),
+                        help="variants made by transcode_audio.py to load instead of wav, in order of preference.")
+    parser.add_argument("--waveform_peaks", default=False, action="store_true",
+                        help="load waveform peaks sidecars written by compute_waveform_peaks.py.")
+    parser.add_argument("--manifest", default=None, type=str,
+                        help="manifest json to skip generation if the config is up to date.")
+    parser.add_argument("--scan_index", default=None, type=str,
+                        help="json index of directory listings to speed up repeated scans.")
+    parser.add_argument("--audio_index", default=None, type=str,
+                        help="json index of audio formats to validate only new or modified files.")
+    parser.add_argument("--sample_rates", default=None, nargs="+", type=int,
+                        help="allowed sample rates of the wav files. by default, all of them must have the same rate.")
+    parser.add_argument("--skip_validation", default=False, action="store_true",
+                        help="do not validate the formats of the wav files.")
+    parser.add_argument("--jobs", default=1, type=int, help="processes to read the wav headers.")
+    parser.add_argument("root_wav_dir")
+    parser.add_argument("outpath")
+    args = parser.parse_args()
+
+    scan_index = ScanIndex(args.scan_index)
+    wav_path_list = sorted(find_files(args.root_wav_dir, index=scan_index))
+    similarity_wav_path_list = None
+    if args.similarity_root_wav_dir is not None:
+        similarity_wav_path_list = sorted(find_files(args.similarity_root_wav_dir, index=scan_index))
+    scan_index.save()
+    if not args.skip_validation:
+        _, problems = preflight(wav_path_list + (similarity_wav_path_list or []), args.audio_index,
+                                args.jobs, sample_rates=args.sample_rates)
+        if problems:
+            parser.error(f"found {len(problems)} problems in the wav files, see above.")
+
+    # the config only depends on the arguments, the file listing and the scripts
+    sources = [pages.__file__, __file__]
+    manifest = Manifest(args.manifest)
+    params = {
+        # options which do not change the config
+        "args": {k: v for k, v in vars(args).items()
+                 if k not in ["manifest", "scan_index", "audio_index", "skip_validation", "sample_rates", "jobs"]},
+        "wavs": hash_params([wav_path_list, similarity_wav_path_list]),
+    }
+    if manifest.is_fresh("config", args.outpath, sources, params):
+        print(f"{args.outpath} is up to date.")
+        return
+
+    trials = []
+    config = make_config(pages, wav_path_list, args.sample_audio_path, similarity_wav_path_list, args.seed,
+                         args.compact, args.audio_variants, args.waveform_peaks, trials)
+    with span("write_config", files=1):
+        with open(args.outpath, "w") as f:
+            dump_config(config, f)
+        write_trial_table(trials, trial_table_path(args.outpath))
+        if args.precompress:
+            write_precompressed(args.outpath)
+
+    manifest.record("config", args.outpath, sources, params)
+    manifest.save()
+
@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*-
+
+"""Streaming writer of webMUSHRA yaml configs."""
+
+import gzip
+
+import yaml
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+try:
+    from yaml import CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeDumper
+
+
+def dump_config(config, f):
+    """Write config as yaml.
+
+    The output is the same as `yaml.safe_dump(config, f, allow_unicode=True)`,
+    but the pages are written one by one, so that `config["pages"]` can be a
+    generator, and the libyaml dumper is used if available.
+
+    Args:
+        config (dict): Config. "pages" is a list or an iterator of page dicts.
+        f (file): Output text stream.
+
+    """
+    for key in sorted(config):
+        if key != "pages":
+            yaml.dump({key: config[key]}, f, Dumper=SafeDumper, allow_unicode=True)
+            continue
+        f.write("pages:\n")
+        for page in config["pages"]:
+            yaml.dump([page], f, Dumper=SafeDumper, allow_unicode=True)
+
+
+def compact_pages(pages, responses):
+    """Replace response scales of pages by their names.
+
+    webMUSHRA expands the names with the scales defined in `config["responses"]`.
+
+    Args:
+        pages (iterable): Page dicts.
+        responses (dict): Map from name to response scale.
+
+    Yields:
+        dict: Page whose "response" is the name of the scale if it is one of responses.
+
+    """
+    for page in pages:
+        for name, response in responses.items():
+            if page.get("response") == response:
+                page = dict(page, response=name)
+                break
+        yield page
+
+
+def write_precompressed(path):
+    """Write gzip (and brotli if available) compressed siblings of path.
+
+    Args:
+        path (str): File to be compressed.
+
+    Returns:
+        list: Written paths.
+
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    outpaths = [f"{path}.gz"]
+    with open(f"{path}.gz", "wb") as f:
+        f.write(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        outpaths.append(f"{path}.br")
+        with open(f"{path}.br", "wb") as f:
+            f.write(brotli.compress(data, mode=brotli.MODE_TEXT))
+    return outpaths
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+
+"""Convert monaural audio to padded stereo audio.
+
+In-process replacement of convert_mono_to_stereo.sh, i.e.
+`sox -M <wav> <wav> -c 2 <out> pad 0 <pad> pad <pad>` for every file.
+
+"""
+
+import argparse
+import math
+import os
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .file_scanner import ScanIndex, find_files
+from .manifest import Manifest
+from .tracing import span
+from .wav_io import from_float, read_wav, to_float, write_wav
+
+
+def resample(data, sampwidth, orig_sr, target_sr):
+    """Resample integer or float samples with polyphase filtering."""
+    from scipy.signal import resample_poly
+
+    gcd = math.gcd(orig_sr, target_sr)
+    y = resample_poly(to_float(data, sampwidth), target_sr // gcd, orig_sr // gcd, axis=0)
+    return from_float(y, sampwidth, data.dtype.kind == "f")
+
+
+def convert(wav_path, out_path, pad=0.1, sample_rate=None):
+    """Convert a single wav file to padded stereo.
+
+    The sample format (PCM or IEEE float) and width of the input are kept.
+
+    Args:
+        wav_path (str): Input wav path.
+        out_path (str): Output wav path.
+        pad (float): Length of silence in seconds added to both ends.
+        sample_rate (int): Target sampling rate. If None, keep the original.
+
+    Returns:
+        int: Number of bytes written.
+
+    """
+    data, sr, sampwidth = read_wav(wav_path)
+    is_float = data.dtype.kind == "f"
+    if data.shape[1] > 1:
+        mixed = data.mean(axis=1, keepdims=True)
+        data = (mixed if is_float else np.round(mixed)).astype(data.dtype)
+    if sample_rate is not None and sample_rate != sr:
+        data = resample(data, sampwidth, sr, sample_rate)
+        sr = sample_rate
+
+    num_pad = int(round(pad * sr))
+    silence = 128 if sampwidth == 1 and not is_float else 0
+    out = np.full((num_pad * 2 + len(data), 2), silence, dtype=data.dtype)
+    out[num_pad:num_pad + len(data)] = data
+
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    write_wav(out_path, out, sr, sampwidth)
+    return os.path.getsize(out_path)
+
+
+def _convert(job):
+    return convert(*job)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--pad", default=0.1, type=float,
+                        help="silence in seconds added to the beginning and the end.")
+    parser.add_argument("--sample_rate", default=None, type=int,
+                        help="resample all files to this rate.")
+    parser.add_argument("--jobs", default=os.cpu_count(), type=int)
+    parser.add_argument("--manifest", default=None, type=str,
+                        help="manifest json to skip files which are already up to date.")
+    parser.add_argument("--scan_index", default=None, type=str,
+                        help="json index of directory listings to speed up repeated scans.")
+    parser.add_argument("root_wav_dir", type=str)
+    parser.add_argument("outdir", type=str)
+    args = parser.parse_args()
+
+    # We assume that <root_wav_dir>/<model_or_method_name_dir>/<wav_files>
+    # and make the same tree under <outdir>.
+    scan_index = ScanIndex(args.scan_index)
+    wav_filenames = sorted(find_files(args.root_wav_dir, include_root_dir=False, index=scan_index))
+    scan_index.save()
+    manifest = Manifest(args.manifest)
+    params = {"pad": args.pad, "sample_rate": args.sample_rate}
+    jobs = []
+    for wav in wav_filenames:
+        wav_path, out_path = f"{args.root_wav_dir}/{wav}", f"{args.outdir}/{wav}"
+        if not manifest.is_fresh("stereo", out_path, [wav_path], params):
+            jobs.append((wav_path, out_path, args.pad, args.sample_rate))
+    if len(jobs) < len(wav_filenames):
+        print(f"{len(wav_filenames) - len(jobs)} files are up to date.")
+
+    start = time.perf_counter()
+    chunksize = max(1, len(jobs) // (args.jobs * 16))
+    with span("convert", files=len(jobs)), ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        num_bytes = sum(executor.map(_convert, jobs, chunksize=chunksize))
+    elapsed = time.perf_counter() - start
+
+    for wav_path, out_path, _, _ in jobs:
+        manifest.record("stereo", out_path, [wav_path], params)
+    manifest.save()
+
+    print(f"converted {len(jobs)} files ({num_bytes / 2 ** 20:.1f} MiB) in {elapsed:.2f} sec "
+          f"({len(jobs) / max(elapsed, 1e-9):.1f} files/sec, {args.jobs} jobs).")
+
+
+if __name__ == "__main__":
+    main()
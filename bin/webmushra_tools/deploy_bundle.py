@@ -0,0 +1,318 @@
+# -*- coding: utf-8 -*-
+
+"""Build a deploy bundle of configs and stimuli with content-hashed file names.
+
+Every stimulus referred to by the configs ("stimuli", "reference" and
+"stimulus" of each page) is materialized as <outdir>/stimuli/<digest>.wav,
+together with its siblings which the browser derives from the wav url
+(<name>.flac / .opus / .m4a of transcode_audio.py and <name>.peaks.json of
+compute_waveform_peaks.py) under the same digest. The digest covers the
+contents of the wav file and all of its siblings, so a url never changes its
+contents and the stimuli can be cached forever by browsers and CDNs.
+
+The configs are rewritten to refer to <base_url><digest>.wav and written to
+<outdir>/configs with their trial tables. <outdir>/bundle.json records every
+file of the bundle, so that re-building into the same directory only writes
+the new or changed files (--changed_list lists them for uploading).
+
+    $ webmushra-tools bundle --base_url https://<bucket>/stimuli/ --outdir ./bundle ./configs/*.yaml
+
+A local directory acts as the bucket, e.g. serve <outdir> with `php -S` and
+use --base_url http://localhost:8888/stimuli/.
+
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+import yaml
+
+from .compute_waveform_peaks import PEAKS_EXTENSION
+from .config_writer import dump_config, write_precompressed
+from .divide_audio_dir import materialize
+from .manifest import Manifest, hash_file
+from .tracing import span
+from .transcode_audio import AUDIO_VARIANTS
+from .trial_table import trial_table_path
+
+BUNDLE_VERSION = 1
+
+# keys of a page which refer to audio files
+URL_KEYS = ["reference", "stimulus", "stimuli"]
+
+SIBLING_EXTENSIONS = [variant["extension"] for variant in AUDIO_VARIANTS.values()] + [PEAKS_EXTENSION]
+
+# served from <outdir>/stimuli by apache (see configs/.htaccess for the configs)
+STIMULI_HTACCESS = """\
+# Stimuli of the bundle are named by the hash of their contents and never change.
+<IfModule mod_headers.c>
+  Header set Cache-Control "public, max-age=31536000, immutable"
+</IfModule>
+"""
+
+
+def is_local(url):
+    return "://" not in url and not url.startswith("//")
+
+
+def local_path(url, root="."):
+    """Return the path of a local url, "/x" is relative to root if it exists there."""
+    path = os.path.join(root, url.lstrip("/"))
+    if url.startswith("/") and not os.path.exists(path):
+        return url
+    return path
+
+
+def iter_pages(pages):
+    """Iterate over page dicts, including the pages of random groups (["random", page, ...])."""
+    for page in pages:
+        if isinstance(page, list):
+            yield from iter_pages(page)
+        elif isinstance(page, dict):
+            yield page
+
+
+def page_urls(page):
+    """Return the audio urls of a page."""
+    urls = []
+    for key in URL_KEYS:
+        value = page.get(key)
+        if isinstance(value, dict):
+            urls.extend(value.values())
+        elif isinstance(value, str):
+            urls.append(value)
+    return urls
+
+
+def rewrite_page(page, url_map):
+    """Replace the audio urls of a page (in place) by url_map."""
+    for key in URL_KEYS:
+        value = page.get(key)
+        if isinstance(value, dict):
+            page[key] = {name: url_map.get(url, url) for name, url in value.items()}
+        elif isinstance(value, str):
+            page[key] = url_map.get(value, value)
+
+
+def sibling_paths(path):
+    """Return the path and its existing siblings, e.g. [x.wav, x.flac, x.peaks.json]."""
+    stem, ext = os.path.splitext(path)
+    if ext.lower() != ".wav":
+        return [path]
+    return [path] + [f"{stem}.{ext}" for ext in SIBLING_EXTENSIONS if os.path.exists(f"{stem}.{ext}")]
+
+
+def hash_files(paths, manifest, jobs=1):
+    """Hash files by the cache of manifest, hashing the stale ones by jobs processes."""
+    stale = []
+    for path in paths:
+        st = os.stat(path)
+        entry = manifest.files.get(path)
+        if entry is None or entry["size"] != st.st_size or entry["mtime_ns"] != st.st_mtime_ns:
+            stale.append((path, st))
+    with span("hash_files", files=len(stale)):
+        if jobs > 1 and len(stale) > 1:
+            with ProcessPoolExecutor(max_workers=jobs) as executor:
+                hashes = list(executor.map(hash_file, [path for path, _ in stale],
+                                           chunksize=max(1, len(stale) // (jobs * 16))))
+        else:
+            hashes = [hash_file(path) for path, _ in stale]
+    for (path, st), digest in zip(stale, hashes):
+        manifest.files[path] = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": digest}
+    return {path: manifest.files[path]["hash"] for path in paths}
+
+
+def blob_digest(paths, hashes):
+    """Digest of a stimulus and its siblings, which names all of them in the bundle."""
+    h = hashlib.blake2b(digest_size=16)
+    for path in paths:
+        h.update(f"{os.path.splitext(path)[1].lower()}:{hashes[path]}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+class Bundle(object):
+    """Files of a bundle directory and their hashes.
+
+    Args:
+        outdir (str): Bundle directory, which acts as the bucket.
+
+    """
+
+    def __init__(self, outdir):
+        self.outdir = outdir
+        self.path = os.path.join(outdir, "bundle.json")
+        self.previous = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                bundle = json.load(f)
+            if bundle.get("version") == BUNDLE_VERSION:
+                self.previous = bundle["files"]
+        self.files = {}
+        self.changed = []
+
+    def is_current(self, relpath, digest):
+        return self.previous.get(relpath) == digest and os.path.exists(os.path.join(self.outdir, relpath))
+
+    def add_file(self, relpath, digest, src, mode="copy"):
+        """Materialize src at relpath unless it is already there with the same digest."""
+        if self.files.get(relpath) == digest:
+            # stimuli with the same contents share the file
+            return False
+        self.files[relpath] = digest
+        if self.is_current(relpath, digest):
+            return False
+        dst = os.path.join(self.outdir, relpath)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        materialize(src, dst, mode)
+        self.changed.append(relpath)
+        return True
+
+    def add_data(self, relpath, data):
+        """Write data at relpath unless it is already there with the same contents."""
+        digest = hashlib.blake2b(data, digest_size=16).hexdigest()
+        self.files[relpath] = digest
+        if self.is_current(relpath, digest):
+            return False
+        dst = os.path.join(self.outdir, relpath)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        with open(f"{dst}.tmp", "wb") as f:
+            f.write(data)
+        os.replace(f"{dst}.tmp", dst)
+        self.changed.append(relpath)
+        return True
+
+    def stale_files(self):
+        """Files of the previous bundle which are not in this one."""
+        return sorted(set(self.previous) - set(self.files))
+
+    def save(self, base_url):
+        with open(f"{self.path}.tmp", "w") as f:
+            json.dump({"version": BUNDLE_VERSION, "base_url": base_url, "files": self.files}, f, indent=1,
+                      sort_keys=True)
+        os.replace(f"{self.path}.tmp", self.path)
+
+
+def build_bundle(config_paths, outdir, base_url, root=".", mode="copy", manifest=None, jobs=1, precompress=False):
+    """Bundle configs and their stimuli.
+
+    Args:
+        config_paths (list): Paths of yaml configs.
+        outdir (str): Bundle directory.
+        base_url (str): Url of <outdir>/stimuli/ as seen from the browser.
+        root (str): Directory the local urls of the configs are relative to
+            (the directory of webMUSHRA's index.html).
+        mode (str): How to materialize stimuli, see divide_audio_dir.materialize.
+        manifest (Manifest): Cache of file hashes.
+        jobs (int): Number of processes to hash files.
+        precompress (bool): If True, also write compressed configs (see config_writer.py).
+
+    Returns:
+        Bundle: Files of the bundle, with the changed and stale files.
+
+    """
+    manifest = manifest or Manifest()
+    configs = {}
+    with span("load_configs", files=len(config_paths)):
+        for config_path in config_paths:
+            with open(config_path) as f:
+                configs[config_path] = yaml.safe_load(f)
+
+    urls = sorted({url for config in configs.values() for page in iter_pages(config.get("pages", []))
+                   for url in page_urls(page) if is_local(url)})
+    siblings = {url: sibling_paths(local_path(url, root)) for url in urls}
+    missing = [url for url, paths in siblings.items() if not os.path.exists(paths[0])]
+    if missing:
+        raise FileNotFoundError(f"{len(missing)} stimuli do not exist in {root}, e.g. {missing[0]}.")
+    hashes = hash_files([path for paths in siblings.values() for path in paths], manifest, jobs)
+
+    bundle = Bundle(outdir)
+    url_map = {}
+    with span("write_stimuli", files=len(hashes), mode=mode):
+        for url, paths in siblings.items():
+            digest = blob_digest(paths, hashes)
+            stem = os.path.splitext(os.path.basename(paths[0]))[0]
+            for path in paths:
+                # x.peaks.json -> <digest>.peaks.json
+                relpath = f"stimuli/{digest}{os.path.basename(path)[len(stem):]}"
+                bundle.add_file(relpath, hashes[path], path, mode)
+            url_map[url] = f"{base_url}{digest}{os.path.splitext(paths[0])[1]}"
+    bundle.add_data("stimuli/.htaccess", STIMULI_HTACCESS.encode("utf-8"))
+
+    with span("write_configs", files=len(configs)):
+        for config_path, config in configs.items():
+            for page in iter_pages(config.get("pages", [])):
+                rewrite_page(page, url_map)
+            f = io.StringIO()
+            dump_config(config, f)
+            relpath = f"configs/{os.path.basename(config_path)}"
+            changed = bundle.add_data(relpath, f.getvalue().encode("utf-8"))
+            if precompress:
+                # the compressed configs are recorded with the digest of the config
+                outpaths = [f"{relpath}.gz", f"{relpath}.br"]
+                if changed or not any(bundle.is_current(path, bundle.files[relpath]) for path in outpaths):
+                    outpaths = [os.path.relpath(path, outdir)
+                                for path in write_precompressed(os.path.join(outdir, relpath))]
+                    bundle.changed.extend(outpaths)
+                for path in outpaths:
+                    if os.path.exists(os.path.join(outdir, path)):
+                        bundle.files[path] = bundle.files[relpath]
+            if os.path.exists(trial_table_path(config_path)):
+                trial_table = trial_table_path(config_path)
+                bundle.add_file(trial_table_path(relpath), hash_file(trial_table), trial_table)
+    return bundle
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base_url", type=str, required=True,
+                        help="url of <outdir>/stimuli/ as seen from the browser, e.g. https://<bucket>/stimuli/.")
+    parser.add_argument("--outdir", type=str, required=True, help="bundle directory, which acts as the bucket.")
+    parser.add_argument("--root", default=".", type=str,
+                        help="directory the local urls of the configs are relative to (webMUSHRA's root).")
+    parser.add_argument("--mode", default="copy", choices=["copy", "hardlink", "symlink", "reflink"],
+                        help="how to materialize stimuli in the bundle. fall back to copy if linking fails.")
+    parser.add_argument("--precompress", default=False, action="store_true",
+                        help="also write .gz (and .br) compressed configs.")
+    parser.add_argument("--changed_list", default=None, type=str,
+                        help="write the paths (relative to outdir) of the new or changed files to upload.")
+    parser.add_argument("--prune", default=False, action="store_true",
+                        help="remove the files of the previous bundle which are no longer referred to.")
+    parser.add_argument("--manifest", default=None, type=str,
+                        help="manifest json to cache the hashes of stimuli.")
+    parser.add_argument("--jobs", default=1, type=int, help="processes to hash stimuli.")
+    parser.add_argument("configs", nargs="+", type=str, help="yaml configs written by generate_config*.py.")
+    args = parser.parse_args()
+
+    if not args.base_url.endswith("/"):
+        parser.error("--base_url should end with /.")
+    start = time.perf_counter()
+    manifest = Manifest(args.manifest)
+    bundle = build_bundle(args.configs, args.outdir, args.base_url, args.root, args.mode, manifest, args.jobs,
+                          args.precompress)
+    manifest.save()
+
+    stale = bundle.stale_files()
+    if args.prune:
+        for relpath in stale:
+            path = os.path.join(args.outdir, relpath)
+            if os.path.lexists(path):
+                os.remove(path)
+    bundle.save(args.base_url)
+    if args.changed_list is not None:
+        with open(args.changed_list, "w") as f:
+            f.writelines(f"{relpath}\n" for relpath in bundle.changed + ["bundle.json"])
+
+    num_stimuli = sum(1 for relpath in bundle.files if relpath.startswith("stimuli/"))
+    print(f"bundled {len(args.configs)} configs and {num_stimuli} stimuli files in "
+          f"{time.perf_counter() - start:.2f} sec: {len(bundle.changed)} files new or changed, "
+          f"{len(stale)} stale files{' removed' if args.prune else ''}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+
+import argparse
+import errno
+import fcntl
+import heapq
+import math
+import os
+import random
+import shutil
+
+from .audio_index import AudioIndex, preflight
+from .file_scanner import ScanIndex, find_files
+from .manifest import Manifest
+from .tracing import span
+
+
+# ioctl request of FICLONE on linux, i.e. _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+
+
+def reflink(src, dst):
+    """Make copy-on-write clone of src (btrfs, xfs, ...)."""
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError:
+            fdst.close()
+            os.remove(dst)
+            raise
+
+
+def materialize(src, dst, mode="copy"):
+    """Materialize src at dst without copying bytes if possible.
+
+    Args:
+        src (str): Source file.
+        dst (str): Destination file.
+        mode (str): One of "copy", "hardlink", "symlink" and "reflink".
+            If linking fails (e.g. across devices), fall back to copy.
+
+    Returns:
+        str: Mode actually used.
+
+    """
+    if os.path.lexists(dst):
+        os.remove(dst)
+    try:
+        if mode == "hardlink":
+            os.link(src, dst)
+        elif mode == "symlink":
+            os.symlink(os.path.relpath(src, os.path.dirname(dst)), dst)
+        elif mode == "reflink":
+            reflink(src, dst)
+        else:
+            shutil.copy(src, dst)
+        return mode
+    except OSError as e:
+        if mode == "copy" or e.errno == errno.ENOENT:
+            raise
+        shutil.copy(src, dst)
+        return "copy"
+
+
+def remove_output(path, root):
+    """Remove an output file, and its parent directories under root which became empty.
+
+    Args:
+        path (str): Output file.
+        root (str): Output root directory, which is kept.
+
+    """
+    if os.path.lexists(path):
+        os.remove(path)
+    root = os.path.abspath(root)
+    parent = os.path.dirname(os.path.abspath(path))
+    while parent != root and parent.startswith(os.path.join(root, "")):
+        try:
+            os.rmdir(parent)
+        except OSError:
+            break
+        parent = os.path.dirname(parent)
+
+
+def partition_by_shuffle(num_utts, num_utts_in_each_subset, seed=777):
+    """Divide utterances into subsets of the given size in a seeded random order.
+
+    Args:
+        num_utts (int): Number of utterances.
+        num_utts_in_each_subset (int): Size of each subset, except the last one.
+        seed (int): Random seed.
+
+    Returns:
+        list: Indexes of the utterances in each subset.
+
+    """
+    idxs = list(range(num_utts))
+    random.seed(seed)
+    random.shuffle(idxs)
+    return [idxs[offset: offset + num_utts_in_each_subset] for offset in range(0, num_utts, num_utts_in_each_subset)]
+
+
+def partition_by_duration(durations, num_subsets, seed=777, equal_sizes=True):
+    """Divide utterances into subsets of balanced total duration.
+
+    Longest processing time first: the utterances are assigned from the
+    longest to the subset with the least total duration which is not full yet.
+    With equal_sizes (the default), subset sizes differ by at most one. The cap
+    may force an utterance into a subset which does not have the least total,
+    so the totals are balanced greedily but not within a stated bound. Without
+    it, every utterance goes to the subset of the least total, and the totals
+    differ by at most the longest utterance.
+    Utterances of the same duration are ordered by the seed, so the result is
+    deterministic. O(N log N) for N utterances.
+
+    Args:
+        durations (list): Duration of each utterance.
+        num_subsets (int): Number of subsets.
+        seed (int): Random seed to break ties.
+        equal_sizes (bool): If True, cap the size of each subset.
+
+    Returns:
+        list: Indexes of the utterances in each subset.
+
+    """
+    order = list(range(len(durations)))
+    random.Random(seed).shuffle(order)
+    order.sort(key=lambda idx: -durations[idx])
+
+    num_subsets = max(1, min(num_subsets, len(durations)))
+    capacities = [len(durations) // num_subsets + (i < len(durations) % num_subsets) for i in range(num_subsets)]
+    if not equal_sizes:
+        capacities = [len(durations)] * num_subsets
+    subsets = [[] for _ in range(num_subsets)]
+    # (total duration, subset), the subset breaks ties
+    heap = [(0.0, i) for i in range(num_subsets)]
+    for idx in order:
+        total, i = heapq.heappop(heap)
+        subsets[i].append(idx)
+        if len(subsets[i]) < capacities[i]:
+            heapq.heappush(heap, (total + durations[idx], i))
+    return [sorted(subset) for subset in subsets]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seed", default=777, type=int)
+    parser.add_argument("--num_wavs_in_each_subset", default=5, type=int)
+    parser.add_argument("--partition", default="shuffle", choices=["shuffle", "duration"],
+                        help="shuffle: subsets of shuffled utterances. duration: subsets of balanced total duration "
+                             "of the utterances of all models, needs the wav headers.")
+    parser.add_argument("--manifest", default=None, type=str,
+                        help="manifest json to skip files which are already up to date.")
+    parser.add_argument("--mode", default="copy", choices=["copy", "hardlink", "symlink", "reflink"],
+                        help="how to materialize files in subsets. fall back to copy if linking fails.")
+    parser.add_argument("--scan_index", default=None, type=str,
+                        help="json index of directory listings to speed up repeated scans.")
+    parser.add_argument("--audio_index", default=None, type=str,
+                        help="json index of audio formats to validate only new or modified files.")
+    parser.add_argument("--sample_rates", default=None, nargs="+", type=int,
+                        help="allowed sample rates of the wav files. by default, all of them must have the same rate.")
+    parser.add_argument("--skip_validation", default=False, action="store_true",
+                        help="do not validate the formats of the wav files.")
+    parser.add_argument("--jobs", default=1, type=int, help="processes to read the wav headers.")
+    parser.add_argument("root_wav_dir", type=str)
+    parser.add_argument("outdir", type=str)
+    args = parser.parse_args()
+
+    # We assume that <root_wav_dir>/<model_or_method_name_dir>/<wav_files>
+    # E.g.
+    #   root_wav_dir = "configs/resources/samples_stereo"
+    #   outdir = "configs/resources/samples_stereo_subset"
+    seed = args.seed
+    num_wavs_in_each_subset = args.num_wavs_in_each_subset
+    outdir = args.outdir
+    root_wav_dir = args.root_wav_dir
+    manifest = Manifest(args.manifest)
+
+    scan_index = ScanIndex(args.scan_index)
+    wav_filenames = sorted(find_files(root_wav_dir, include_root_dir=False, index=scan_index))
+    scan_index.save()
+    wav_infos = None
+    if not args.skip_validation:
+        wav_infos, problems = preflight([f"{root_wav_dir}/{f}" for f in wav_filenames], args.audio_index, args.jobs,
+                                        sample_rates=args.sample_rates)
+        if problems:
+            parser.error(f"found {len(problems)} problems in the wav files, see above.")
+    elif args.partition == "duration":
+        audio_index = AudioIndex(args.audio_index)
+        wav_infos = audio_index.update([f"{root_wav_dir}/{f}" for f in wav_filenames], jobs=args.jobs)[0]
+        audio_index.save()
+
+    # group files by model in one pass
+    wav_filename_dict = {}
+    for f in wav_filenames:
+        model = os.path.dirname(f)
+        if model == '':
+            continue
+        wav_filename_dict.setdefault(model, []).append(f)
+    wav_filename_dict = dict(sorted(wav_filename_dict.items()))
+
+    # check all models have the same number of utterances
+    prev_num_model_wavs = None
+    for model, wavs in wav_filename_dict.items():
+        num_model_wavs = len(wavs)
+        print(f"{model} has {num_model_wavs} wav files.")
+        if prev_num_model_wavs is not None:
+            assert prev_num_model_wavs == num_model_wavs, f"{model} has different number of wavfiles."
+        prev_num_model_wavs = num_model_wavs
+
+    # listening time of each utterance, i.e. of the wavs of all models
+    utt_durations = None
+    if wav_infos is not None:
+        missing = [(f, info.get("error", "no duration")) for f, info in zip(wav_filenames, wav_infos)
+                   if "duration" not in info]
+        if missing and args.partition == "duration":
+            for f, reason in missing:
+                print(f"{root_wav_dir}/{f}: {reason}")
+            parser.error(f"could not read the duration of {len(missing)} wav files, see above.")
+        if not missing:
+            wav_durations = {f: info["duration"] for f, info in zip(wav_filenames, wav_infos)}
+            utt_durations = [sum(wav_durations[wavs[j]] for wavs in wav_filename_dict.values())
+                             for j in range(num_model_wavs)]
+
+    # make each subset
+    num_fallbacks = 0
+    num_subsets = math.ceil(num_model_wavs / num_wavs_in_each_subset)
+    if args.partition == "duration":
+        subset_idxs = partition_by_duration(utt_durations, num_subsets, seed)
+    else:
+        subset_idxs = partition_by_shuffle(num_model_wavs, num_wavs_in_each_subset, seed)
+    if utt_durations is not None:
+        subset_durations = [sum(utt_durations[j] for j in idxs) for idxs in subset_idxs]
+        print(f"duration of subsets: min {min(subset_durations):.1f} sec, max {max(subset_durations):.1f} sec, "
+              f"mean {sum(subset_durations) / len(subset_durations):.1f} sec.")
+    num_materialized = 0
+    out_paths = set()
+    params = {"mode": args.mode}
+    with span("materialize", mode=args.mode) as s:
+        for i, idxs in enumerate(subset_idxs):
+            print(f"making subset {i}...")
+            subset_outdir = f"{outdir}/subset_{i}"
+            for model, wavs in wav_filename_dict.items():
+                subset_wavs = [wavs[j] for j in idxs]
+                subset_model_outdir = f"{subset_outdir}/{model}"
+                os.makedirs(subset_model_outdir, exist_ok=True)
+                for wav in subset_wavs:
+                    wav_path = f"{root_wav_dir}/{wav}"
+                    out_path = f"{subset_model_outdir}/{os.path.basename(wav)}"
+                    out_paths.add(out_path)
+                    if manifest.is_fresh("subset", out_path, [wav_path], params):
+                        continue
+                    if materialize(wav_path, out_path, args.mode) != args.mode:
+                        num_fallbacks += 1
+                    num_materialized += 1
+                    manifest.record("subset", out_path, [wav_path], params)
+        s.set(files=num_materialized, fallbacks=num_fallbacks)
+
+    # files of the previous layout which are not assigned anymore, e.g. after changing the seed or the subset size
+    stale_paths = manifest.drop_stale("subset", out_paths, root=outdir)
+    for path in stale_paths:
+        remove_output(path, outdir)
+    if stale_paths:
+        print(f"removed {len(stale_paths)} files of the previous subsets.")
+
+    manifest.save()
+
+    if num_fallbacks > 0:
+        print(f"could not {args.mode} {num_fallbacks} files, copied them instead.")
+    print("successfully finshed making subsets.")
+
+
+if __name__ == "__main__":
+    main()
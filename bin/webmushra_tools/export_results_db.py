@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+"""Export the results database of results_receiver.py --backend sqlite as csv.
+
+Writes <outdir>/<testId>/<type>.csv in the same layout as service/write.php,
+so that the existing analysis scripts can be used as is.
+
+"""
+
+import argparse
+import os
+import time
+
+from .results_db import connect, export_csv
+from .results_writer import sanitize
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--test_id", default=None, type=str, help="export only this test. defaults to all tests.")
+    parser.add_argument("db", type=str, help="e.g. results/results.db.")
+    parser.add_argument("outdir", type=str, help="e.g. results.")
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.db):
+        parser.error(f"{args.db} does not exist.")
+
+    start = time.perf_counter()
+    conn = connect(args.db, readonly=True)
+    if args.test_id is not None:
+        test_ids = [args.test_id]
+    else:
+        test_ids = [row[0] for row in conn.execute("SELECT DISTINCT test_id FROM sessions ORDER BY test_id")]
+    for test_id in test_ids:
+        result_names = [row[0] for row in conn.execute(
+            "SELECT DISTINCT t.result_name FROM sessions s JOIN trials t ON t.session_id = s.id "
+            "WHERE s.test_id = ? ORDER BY t.result_name", (test_id,))]
+        test_dir = os.path.join(args.outdir, sanitize(test_id))
+        os.makedirs(test_dir, exist_ok=True)
+        for result_name in result_names:
+            path = os.path.join(test_dir, f"{result_name}.csv")
+            num_rows = export_csv(conn, test_id, result_name, path)
+            print(f"wrote {num_rows} rows to {path}.")
+    conn.close()
+    print(f"exported {len(test_ids)} tests in {time.perf_counter() - start:.2f} sec.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+"""Fast recursive file scanner shared by the scripts in bin/.
+
+Directories are listed with ``os.scandir``. Optionally, listings are kept in an
+on-disk index keyed by directory mtime, so that repeated scans of an unchanged
+tree only need one ``stat`` per directory.
+
+"""
+
+import fnmatch
+import json
+import os
+import time
+
+from .tracing import span
+
+SCAN_INDEX_VERSION = 1
+
+# directories modified within this many seconds before the scan are not cached,
+# since further changes within the mtime granularity would go unnoticed.
+RACY_SECONDS = 2.0
+
+
+class ScanIndex(object):
+    """On-disk index of directory listings.
+
+    Args:
+        path (str): Path of index json. If None, the index is disabled and
+            every directory is listed from disk.
+
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.dirs = {}
+        self.dirty = False
+        if path is not None and os.path.exists(path):
+            with open(path) as f:
+                index = json.load(f)
+            if index.get("version") == SCAN_INDEX_VERSION:
+                self.dirs = index["dirs"]
+
+    def listdir(self, dirpath):
+        """List directory.
+
+        Args:
+            dirpath (str): Directory to list.
+
+        Returns:
+            list: Sorted names of files.
+            list: Sorted names of sub directories (symlinks are followed).
+
+        """
+        if self.path is None:
+            return _scandir(dirpath)
+
+        key = os.path.abspath(dirpath)
+        mtime_ns = os.stat(dirpath).st_mtime_ns
+        entry = self.dirs.get(key)
+        if entry is not None and entry["mtime_ns"] == mtime_ns:
+            return entry["files"], entry["dirs"]
+
+        files, dirs = _scandir(dirpath)
+        if time.time() - mtime_ns / 1e9 > RACY_SECONDS:
+            self.dirs[key] = {"mtime_ns": mtime_ns, "files": files, "dirs": dirs}
+            self.dirty = True
+        return files, dirs
+
+    def save(self):
+        """Write the index atomically if it has been updated."""
+        if self.path is None or not self.dirty:
+            return
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": SCAN_INDEX_VERSION, "dirs": self.dirs}, f)
+        os.replace(tmp_path, self.path)
+        self.dirty = False
+
+
+def _scandir(dirpath):
+    files, dirs = [], []
+    with os.scandir(dirpath) as it:
+        for entry in it:
+            if entry.is_dir():
+                dirs.append(entry.name)
+            else:
+                files.append(entry.name)
+    return sorted(files), sorted(dirs)
+
+
+def find_files(root_dir, query="*.wav", include_root_dir=True, index=None):
+    """Find files recursively.
+
+    Args:
+        root_dir (str): Root root_dir to find.
+        query (str): Query to find.
+        include_root_dir (bool): If False, root_dir name is not included.
+        index (ScanIndex): Index of directory listings. If None, scan the disk.
+
+    Returns:
+        list: List of found filenames.
+
+    """
+    if index is None:
+        index = ScanIndex()
+
+    files = []
+    stack = [""]
+    with span("find_files", root=root_dir) as s:
+        while stack:
+            reldir = stack.pop()
+            filenames, dirnames = index.listdir(os.path.join(root_dir, reldir))
+            for filename in fnmatch.filter(filenames, query):
+                files.append(os.path.join(reldir, filename))
+            stack.extend(os.path.join(reldir, dirname) for dirname in reversed(dirnames))
+        s.set(files=len(files))
+    if include_root_dir:
+        files = [os.path.join(root_dir, file_) for file_ in files]
+
+    return files
@@ -0,0 +1,219 @@
+# -*- coding: utf-8 -*-
+
+"""Generate config with Japanese instruction."""
+
+import sys
+
+from . import config_generator
+from .trial_table import trial_id
+
+
+def response_template():
+    return [
+        {
+            "value": 1,
+            "label": "1: Bad",
+            "img": "configs/resources/images/star_off.png",
+            "imgSelected": "configs/resources/images/star_on.png",
+            "imgHigherResponseSelected": "configs/resources/images/star_on.png",
+        },
+        {
+            "value": 2,
+            "label": "2: Poor",
+            "img": "configs/resources/images/star_off.png",
+            "imgSelected": "configs/resources/images/star_on.png",
+            "imgHigherResponseSelected": "configs/resources/images/star_on.png",
+        },
+        {
+            "value": 3,
+            "label": "3: Fair",
+            "img": "configs/resources/images/star_off.png",
+            "imgSelected": "configs/resources/images/star_on.png",
+            "imgHigherResponseSelected": "configs/resources/images/star_on.png",
+        },
+        {
+            "value": 4,
+            "label": "4: Good",
+            "img": "configs/resources/images/star_off.png",
+            "imgSelected": "configs/resources/images/star_on.png",
+            "imgHigherResponseSelected": "configs/resources/images/star_on.png",
+        },
+        {
+            "value": 5,
+            "label": "5: Excellent",
+            "img": "configs/resources/images/star_off.png",
+            "imgSelected": "configs/resources/images/star_on.png",
+            "imgHigherResponseSelected": "configs/resources/images/star_on.png",
+        },
+    ]
+
+
+def make_page(idx, total_idx, wav_path):
+    wav_id = trial_id(wav_path)
+    return {
+        "type": "likert_single_stimulus",
+        "id": wav_id,
+        "content": "音声を聞いて、その自然性を5段階で評価してください。<br>"
+                   "ここで自然性とは、<strong>音声がどれだけ人間の肉声に近いか</strong>を表し、<strong>人間の肉声が5</strong>に相当します。",
+        "name": f"MOS on Naturalness ({idx}/{total_idx})",
+        "mustRate": True,
+        "mustPlayback": True,
+        "reference": wav_path,
+        "stimuli": {
+            "C1": wav_path,
+        },
+        "response": response_template(),
+    }
+
+
+def make_first_page():
+    return {
+        "type": "generic",
+        "content": "音声の自然性評価へようこそ。"
+                   "<br>[Next]ボタンを押して次へ進んでください。",
+        "id": "welcome",
+        "name": "Audio naturalness evaluation",
+    }
+
+
+def make_explanation_page():
+    return {
+        "type": "generic",
+        "content": "提示された音声を聞いて、その自然性を5段階で評価してください。<br>"
+                   "ここで自然性とは、<strong>音声がどれだけ人間の肉声に近いか</strong>を表し、<strong>人間の肉声が5</strong>に相当します。<br>"
+                   "この後、<strong>人間の肉声のサンプル音声</strong>をいくつか提示しますので、参考にしてください。<br>"
+                   "<br>"
+                   "また、ここからはブラウザを閉じたり更新ボタンを押してしまうと、途中の結果が失われてしまいます。<br>"
+                   "そのため、評価が最後まで終了するまで、その様な行動を取らない様にご注意ください。<br>"
+                   "<br>"
+                   "[Next]ボタンを押して次へ進んでください。",
+        "id": "explanation",
+        "name": "Explanation",
+    }
+
+
+def make_volume_page(sample_wav_path):
+    volume_page = {
+        "type": "volume",
+        "content": "この音声は<strong>人間の自然音声(肉声)</strong>のサンプルです。<br>"
+                   "音声を聞いて、適切なボリュームになるよう調整してください。<br>"
+                   "<strong>静かな部屋</strong>で視聴を行い、必ず<strong>イヤホンもしくはヘッドホンを着用</strong>してください。<br>"
+                   "もし、音声が再生されない場合は、更新ボタンを押してやり直してください。",
+        "id": "Volume check",
+        "stimulus": sample_wav_path,
+        "defaultVolume": 1.0,
+    }
+    return volume_page
+
+
+def make_finish_page():
+    return {
+        "type": "finish",
+        "content": "評価が終了しました。<br>"
+                   "あなたの名前を入力した後、[send Results]ボタンを押してください。",
+        "id": "finish",
+        "name": "Finshed evaluation",
+        "popupContent": "評価が送信されました。ご協力ありがとうございました。",
+        "showResults": False,
+        "writeResults": True,
+        "questionnaire": [
+            {
+                "type": "text",
+                "label": "Name",
+                "name": "name",
+                "optional": False,
+            },
+        ]
+    }
+
+
+def similarity_response_template():
+    return [
+        {
+            "value": 1,
+            "label": "1: 違う",
+            "img": "configs/resources/images/star_off.png",
+            "imgSelected": "configs/resources/images/star_on.png",
+            "imgHigherResponseSelected": "configs/resources/images/star_on.png",
+        },
+        {
+            "value": 2,
+            "label": "2: たぶん違う",
+            "img": "configs/resources/images/star_off.png",
+            "imgSelected": "configs/resources/images/star_on.png",
+            "imgHigherResponseSelected": "configs/resources/images/star_on.png",
+        },
+        {
+            "value": 3,
+            "label": "3: たぶん同じ",
+            "img": "configs/resources/images/star_off.png",
+            "imgSelected": "configs/resources/images/star_on.png",
+            "imgHigherResponseSelected": "configs/resources/images/star_on.png",
+        },
+        {
+            "value": 4,
+            "label": "4: 同じ",
+            "img": "configs/resources/images/star_off.png",
+            "imgSelected": "configs/resources/images/star_on.png",
+            "imgHigherResponseSelected": "configs/resources/images/star_on.png",
+        },
+    ]
+
+
+def make_similarity_page(idx, total_idx, wav_path):
+    wav_id = trial_id(wav_path)
+    return {
+        "type": "likert_single_stimulus",
+        "id": wav_id,
+        "content": "連続する2つの音声を聞いて、その発話者が同じかどうかを4段階で評価してください。<br>"
+                   "なお、2つの音声の間にピッという音が入ります。",
+        "name": f"Speaker similarity ({idx}/{total_idx})",
+        "mustRate": True,
+        "mustPlayback": True,
+        "reference": wav_path,
+        "stimuli": {
+            "C1": wav_path,
+        },
+        "response": similarity_response_template(),
+    }
+
+
+def make_similarity_first_page():
+    return {
+        "type": "generic",
+        "content": "続いて、音声の話者性評価を行います。"
+                   "<br>[Next]ボタンを押して次へ進んでください。",
+        "id": "welcome",
+        "name": "Speaker similarity evaluation",
+    }
+
+
+def make_similarity_explanation_page():
+    return {
+        "type": "generic",
+        "content": "それでは、評価を始めます。<br>"
+                   "連続する2つの音声を聞いて、その発話者が同じかどうかを4段階で評価してください。<br>"
+                   "<br>"
+                   "また、ここからはブラウザを閉じたり更新ボタンを押してしまうと、途中の結果が失われてしまいます。<br>"
+                   "そのため、評価が最後まで終了するまで、その様な行動を取らない様にご注意ください。<br>"
+                   "<br>"
+                   "[Next]ボタンを押して次へ進んでください。",
+        "id": "explanation",
+        "name": "Explanation",
+    }
+
+
+def make_config(wav_path_list, sample_audio_path=None, similarity_wav_path_list=None, seed=777, compact=False,
+                audio_variants=None, waveform_peaks=False, trials=None):
+    """Make config with the pages of this module, see config_generator.make_config."""
+    return config_generator.make_config(sys.modules[__name__], wav_path_list, sample_audio_path,
+                                        similarity_wav_path_list, seed, compact, audio_variants, waveform_peaks,
+                                        trials)
+
+
+def main():
+    config_generator.main(sys.modules[__name__])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,236 @@
+# -*- coding: utf-8 -*-
+
+"""Generate config with English instruction."""
+
+import sys
+
+from . import config_generator
+from .trial_table import trial_id
+
+
+def response_template():
+    return [
+        {
+            "value": 1,
+            "label": "1: Unlike human",
+            "img": "configs/resources/images/star_off.png",
+            "imgSelected": "configs/resources/images/star_on.png",
+            "imgHigherResponseSelected": "configs/resources/images/star_on.png",
+        },
+        {
+            "value": 2,
+            "label": "2",
+            "img": "configs/resources/images/star_off.png",
+            "imgSelected": "configs/resources/images/star_on.png",
+            "imgHigherResponseSelected": "configs/resources/images/star_on.png",
+        },
+        {
+            "value": 3,
+            "label": "3",
+            "img": "configs/resources/images/star_off.png",
+            "imgSelected": "configs/resources/images/star_on.png",
+            "imgHigherResponseSelected": "configs/resources/images/star_on.png",
+        },
+        {
+            "value": 4,
+            "label": "4",
+            "img": "configs/resources/images/star_off.png",
+            "imgSelected": "configs/resources/images/star_on.png",
+            "imgHigherResponseSelected": "configs/resources/images/star_on.png",
+        },
+        {
+            "value": 5,
+            "label": "5: Like human",
+            "img": "configs/resources/images/star_off.png",
+            "imgSelected": "configs/resources/images/star_on.png",
+            "imgHigherResponseSelected": "configs/resources/images/star_on.png",
+        },
+    ]
+
+
+def make_page(idx, total_idx, wav_path):
+    wav_id = trial_id(wav_path)
+    return {
+        "type": "likert_single_stimulus",
+        "id": wav_id,
+        "content": "Listen to a given sample and rate the naturalness with 5-point scale."
+                   "<br>"
+                   "The content of the speech should not effect the score."
+                   "<br>"
+                   "Note that the naturalness means how the sample sound like real-human speech "
+                   "and real-human speech is corresponding to 5.",
+        "name": f"MOS on Naturalness ({idx}/{total_idx})",
+        "mustRate": True,
+        "mustPlayback": True,
+        "reference": wav_path,
+        "stimuli": {
+            "C1": wav_path,
+        },
+        "response": response_template(),
+    }
+
+
+def make_first_page():
+    return {
+        "type": "generic",
+        "content": "Welcome to audio naturalness evaluation."
+                   "<br>"
+                   "Please click [Next] button.",
+        "id": "welcome",
+        "name": "Audio naturalness evaluation",
+    }
+
+
+def make_explanation_page():
+    return {
+        "type": "generic",
+        "content": "Listen to a given sample and rate the naturalness with 5-point scale."
+                   "<br>"
+                   "Note that the naturalness means how the sample sound like real-human speech "
+                   "and real-human speech is corresponding to 5."
+                   "<br>"
+                   "You will be asked to evalutate 25 audio samples."
+                   "<br>"
+                   "In the next page, we will ask you to adjust your volume to a comfortable level."
+                   "<br>"
+                   "The evaluation will start the page after next page."
+                   "<br>"
+                   "<strong>DO NOT CLOSE AND RELOAD THIS PAGE UNTIL THE END OF THIS EVALUATION.</strong>"
+                   "<br>"
+                   "<br>"
+                   "Please click [Next] button.",
+        "id": "explanation",
+        "name": "Explanation",
+    }
+
+
+def make_volume_page(sample_wav_path):
+    volume_page = {
+        "type": "volume",
+        "content": "This is a sample of real-human speech.<br>"
+                   "Listen to the sample and adjust your volume.<br>"
+                   "<br>"
+                   "<strong>DURING THE EVALUATION, PLEASE USE HEADPHONES AND WORK IN A QUIET ROOM.</strong>",
+        "id": "Volume check",
+        "stimulus": sample_wav_path,
+        "defaultVolume": 1.0,
+    }
+    return volume_page
+
+
+def make_finish_page():
+    return {
+        "type": "finish",
+        "content": "The evaluation was finished.<br>"
+                   "Please enter your <strong>WORKER ID</strong> in Amazon mechanical turk. <br>"
+                   "Please click [send Results] button.",
+        "id": "finish",
+        "name": "Finshed evaluation",
+        "popupContent": "The results were recorded. Thank you for your cooperation.",
+        "showResults": False,
+        "writeResults": True,
+        "questionnaire": [
+            {
+                "type": "text",
+                "label": "worker id",
+                "name": "name",
+                "optional": False,
+            },
+        ]
+    }
+
+
+def similarity_response_template():
+    return [
+        {
+            "value": 1,
+            "label": "1: Different (sure)",
+            "img": "configs/resources/images/star_off.png",
+            "imgSelected": "configs/resources/images/star_on.png",
+            "imgHigherResponseSelected": "configs/resources/images/star_on.png",
+        },
+        {
+            "value": 2,
+            "label": "2: Different (not sure)",
+            "img": "configs/resources/images/star_off.png",
+            "imgSelected": "configs/resources/images/star_on.png",
+            "imgHigherResponseSelected": "configs/resources/images/star_on.png",
+        },
+        {
+            "value": 3,
+            "label": "3: Same (not sure)",
+            "img": "configs/resources/images/star_off.png",
+            "imgSelected": "configs/resources/images/star_on.png",
+            "imgHigherResponseSelected": "configs/resources/images/star_on.png",
+        },
+        {
+            "value": 4,
+            "label": "4: Same (sure)",
+            "img": "configs/resources/images/star_off.png",
+            "imgSelected": "configs/resources/images/star_on.png",
+            "imgHigherResponseSelected": "configs/resources/images/star_on.png",
+        },
+    ]
+
+
+def make_similarity_page(idx, total_idx, wav_path):
+    wav_id = trial_id(wav_path)
+    return {
+        "type": "likert_single_stimulus",
+        "id": wav_id,
+        "content": "Listen to continuous two samples and evaluate whether the "
+                   "speakers of two samples are same or not."
+                   "<br>"
+                   "Note that a beep sound is inserted between two samples.",
+        "name": f"Speaker similarity ({idx}/{total_idx})",
+        "mustRate": True,
+        "mustPlayback": True,
+        "reference": wav_path,
+        "stimuli": {
+            "C1": wav_path,
+        },
+        "response": similarity_response_template(),
+    }
+
+
+def make_similarity_first_page():
+    return {
+        "type": "generic",
+        "content": "Next, speaker similarity evaluation."
+                   "<br>"
+                   "Please click [Next] button.",
+        "id": "welcome",
+        "name": "Speaker similarity evaluation",
+    }
+
+
+def make_similarity_explanation_page():
+    return {
+        "type": "generic",
+        "content": "Listen to continuous two samples and evaluate whether the "
+                   "speakers of two samples are same or not."
+                   "<br>"
+                   "<br>"
+                   "<strong>DO NOT CLOSE AND RELOAD THIS PAGE UNTIL THE END OF THIS EVALUATION.</strong>"
+                   "<br>"
+                   "<br>"
+                   "Please click [Next] button.",
+        "id": "explanation",
+        "name": "Explanation",
+    }
+
+
+def make_config(wav_path_list, sample_audio_path=None, similarity_wav_path_list=None, seed=777, compact=False,
+                audio_variants=None, waveform_peaks=False, trials=None):
+    """Make config with the pages of this module, see config_generator.make_config."""
+    return config_generator.make_config(sys.modules[__name__], wav_path_list, sample_audio_path,
+                                        similarity_wav_path_list, seed, compact, audio_variants, waveform_peaks,
+                                        trials)
+
+
+def main():
+    config_generator.main(sys.modules[__name__])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+# -*- coding: utf-8 -*-
+
+"""Generate configs of a balanced design of systems, utterances and page order.
+
+batch_generate_config.py rates every system on the utterances of a subset and
+shuffles the pages of all subsets with the same seed, so the order of the
+systems repeats across subsets. Here each config (HIT) gets --pages_per_config
+pages of different utterances, and
+
+* every stimulus (system, utterance) is rated in exactly --replicates configs
+  (Latin squares: a group of utterances is rated in S configs, in which
+  utterance j gets system (d_j + c) mod S in config c),
+* every pair of systems is rated in about the same number of configs (the
+  systems of a config are a cyclic incomplete block design, whose base blocks
+  d are chosen greedily to even out the differences d_i - d_j over the design),
+* every page position gets every slot of the Latin square equally often and
+  consecutive slots are balanced (Williams squares).
+
+The design is compared with a random design of the same size, in which every
+page is a random stimulus, by the average variance of the differences of two
+system means when the raters (configs) have different biases:
+
+    $ webmushra-tools design --pages_per_config 20 ./configs/resources/samples_stereo ./configs/design
+
+"""
+
+import argparse
+import json
+import math
+import os
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .audio_index import preflight
+from .batch_generate_config import GENERATORS, _generate
+from .file_scanner import ScanIndex, find_files
+from .tracing import span
+from .transcode_audio import AUDIO_VARIANTS
+from .trial_table import label_stimuli
+
+# max entries of the pair arrays of one batch of configs in design_efficiency
+BATCH_ENTRIES = 2 ** 22
+
+
+def williams_orders(n):
+    """Rows of a Williams square of n slots (2n rows if n is odd).
+
+    Each slot is at each position equally often, and each slot is followed by
+    each other slot equally often.
+
+    """
+    first = [0]
+    for i in range(1, n):
+        first.append((i + 1) // 2 if i % 2 == 1 else n - i // 2)
+    rows = [[(slot + r) % n for slot in first] for r in range(n)]
+    if n % 2 == 1:
+        rows += [row[::-1] for row in rows]
+    return rows
+
+
+def base_block(num_systems, size, diff_counts, rng):
+    """Choose the systems of a base block so that their differences are rare in the design so far.
+
+    Args:
+        num_systems (int): Number of systems S.
+        size (int): Number of pages. If larger than S, every system is
+            repeated size // S times and the rest is chosen.
+        diff_counts (ndarray): Count of each difference (mod S) of the design
+            so far, updated in place.
+        rng (Generator): Random generator to break ties.
+
+    Returns:
+        ndarray: Systems of the base block.
+
+    """
+    # full cycles add every difference equally often, so they do not change the choice
+    num_cycles, size = divmod(size, num_systems)
+    candidates = np.arange(num_systems)
+    used = np.zeros(num_systems, dtype=bool)
+    block = []
+    for _ in range(size):
+        # sum of the counts of the differences to the block, least used first and ties at random
+        score = np.zeros(num_systems)
+        if block:
+            diffs = (candidates[:, None] - np.asarray(block)[None, :]) % num_systems
+            score = (diff_counts[diffs] + diff_counts[-diffs % num_systems]).sum(axis=1)
+        new = int(np.argmin(np.where(used, np.inf, score + rng.random(num_systems) * 1e-3)))
+        if block:
+            diffs = (new - np.asarray(block)) % num_systems
+            np.add.at(diff_counts, diffs, 1)
+            np.add.at(diff_counts, -diffs % num_systems, 1)
+        block.append(new)
+        used[new] = True
+    return np.concatenate([np.tile(np.arange(num_systems), num_cycles), np.asarray(block, dtype=np.int64)])
+
+
+def make_design(num_systems, num_utts, pages_per_config, replicates=1, seed=777):
+    """Make a balanced design.
+
+    Args:
+        num_systems (int): Number of systems S.
+        num_utts (int): Number of utterances.
+        pages_per_config (int): Number of pages of a config, each of a different utterance.
+        replicates (int): Number of configs which rate each stimulus.
+        seed (int): Random seed.
+
+    Returns:
+        ndarray: System of each page with shape (#configs, #pages), padded with -1
+            if the configs have different sizes.
+        ndarray: Utterance of each page, same shape.
+
+    """
+    rng = np.random.default_rng(seed)
+    pages_per_config = min(pages_per_config, num_utts)
+    num_groups = math.ceil(num_utts / pages_per_config)
+    diff_counts = np.zeros(num_systems, dtype=np.int64)
+    systems, utts = [], []
+    shifts = np.arange(num_systems)[:, None]
+    for _ in range(replicates):
+        # groups of utterances whose sizes differ by at most one
+        order = rng.permutation(num_utts)
+        bounds = np.linspace(0, num_utts, num_groups + 1).round().astype(int)
+        for group in np.split(order, bounds[1:-1]):
+            size = len(group)
+            block = base_block(num_systems, size, diff_counts, rng)
+            group = group[rng.permutation(size)]
+            rows = np.asarray(williams_orders(size))
+            order_of_config = rows[(np.arange(num_systems) + rng.integers(len(rows))) % len(rows)]
+            # config c rates utterance group[j] by system (block[j] + c) mod S, in the order of a Williams row
+            group_systems = (block[None, :] + shifts) % num_systems
+            systems.append(np.pad(np.take_along_axis(group_systems, order_of_config, axis=1),
+                                  [(0, 0), (0, pages_per_config - size)], constant_values=-1))
+            utts.append(np.pad(group[order_of_config], [(0, 0), (0, pages_per_config - size)],
+                               constant_values=-1))
+    return np.concatenate(systems), np.concatenate(utts)
+
+
+def random_design(num_systems, num_utts, config_sizes, seed=777):
+    """Random design of the same size, every page is a random stimulus."""
+    rng = np.random.default_rng(seed)
+    pages_per_config = config_sizes.max()
+    systems = rng.integers(num_systems, size=(len(config_sizes), pages_per_config))
+    utts = rng.integers(num_utts, size=(len(config_sizes), pages_per_config))
+    padding = np.arange(pages_per_config)[None, :] >= config_sizes[:, None]
+    return np.where(padding, -1, systems), np.where(padding, -1, utts)
+
+
+def design_efficiency(systems, num_systems):
+    """Efficiency of a design for the differences of system means.
+
+    The ratings are modeled as system effect + rater (config) bias + noise of
+    unit variance, and the systems are compared within the configs. The
+    information matrix C = R - N K^-1 N' (R: ratings of each system,
+    N: systems x configs incidence, K: pages of each config) gives the
+    average variance of the difference of two system effects,
+    2 trace(C^+) / (S - 1). A design with complete, equally sized blocks and
+    the same number of ratings has variance 2 / r (r = ratings per system),
+    and the efficiency is their ratio (1 is the best).
+
+    Args:
+        systems (ndarray): System of each page with shape (#configs, #pages), -1 for no page.
+        num_systems (int): Number of systems.
+
+    Returns:
+        dict: efficiency, variance (average variance of a difference),
+            connected (False if some systems are never compared) and
+            ratings_per_system (min, max).
+
+    """
+    sizes = (systems >= 0).sum(axis=1)
+    ratings = np.bincount(systems[systems >= 0], minlength=num_systems).astype(np.float64)
+    nkn = np.zeros(num_systems * num_systems)
+    batch = max(1, BATCH_ENTRIES // max(1, systems.shape[1] ** 2))
+    for start in range(0, len(systems), batch):
+        block, size = systems[start:start + batch], sizes[start:start + batch]
+        valid = (block[:, :, None] >= 0) & (block[:, None, :] >= 0)
+        pairs = block[:, :, None] * num_systems + block[:, None, :]
+        weights = np.broadcast_to(1.0 / np.maximum(size, 1)[:, None, None], pairs.shape)
+        nkn += np.bincount(pairs[valid], weights=weights[valid], minlength=num_systems * num_systems)
+    info = np.diag(ratings) - nkn.reshape(num_systems, num_systems)
+    eigenvalues = np.sort(np.linalg.eigvalsh(info))[1:]
+    connected = bool(len(eigenvalues) == 0 or eigenvalues[0] > 1e-9 * max(1.0, eigenvalues[-1]))
+    variance = 2 * np.sum(1 / eigenvalues) / (num_systems - 1) if connected else float("inf")
+    mean_ratings = ratings.mean()
+    return {
+        "efficiency": (2 / mean_ratings) / variance if connected else 0.0,
+        "variance": float(variance),
+        "connected": connected,
+        "ratings_per_system": [int(ratings.min()), int(ratings.max())],
+    }
+
+
+def stimulus_coverage(systems, utts, num_systems, num_utts):
+    """Min and max number of ratings of a stimulus."""
+    valid = systems >= 0
+    counts = np.bincount(systems[valid] * num_utts + utts[valid], minlength=num_systems * num_utts)
+    return [int(counts.min()), int(counts.max())]
+
+
+def read_stimuli(root_wav_dir, scan_index=None):
+    """Find the stimuli of each system.
+
+    Returns:
+        list: Systems (see trial_table.label_stimuli).
+        list: Utterance ids rated by all systems.
+        dict: Wav path of each (system, utterance id).
+        int: Number of utterances which are dropped since some systems do not have them.
+
+    """
+    stimuli = {}
+    for wav_path, key in label_stimuli(find_files(root_wav_dir, index=scan_index)).items():
+        if key in stimuli:
+            raise ValueError(f"{wav_path} and {stimuli[key]} are the same stimulus {key}.")
+        stimuli[key] = wav_path
+    systems = sorted({system for system, _ in stimuli})
+    all_utts = {utt_id for _, utt_id in stimuli}
+    utts = sorted(utt_id for utt_id in all_utts if all((system, utt_id) in stimuli for system in systems))
+    return systems, utts, stimuli, len(all_utts) - len(utts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pages_per_config", default=20, type=int,
+                        help="rating pages of each config, each of a different utterance.")
+    parser.add_argument("--replicates", default=1, type=int, help="configs which rate each stimulus.")
+    parser.add_argument("--seed", default=777, type=int)
+    parser.add_argument("--lang", default="en", choices=sorted(GENERATORS))
+    parser.add_argument("--sample_audio_path", default=None, type=str, nargs="+")
+    parser.add_argument("--prefix", default="design_", type=str,
+                        help="filename prefix of configs, followed by the config index.")
+    parser.add_argument("--compact", default=False, action="store_true",
+                        help="define response scales once and refer to them by name.")
+    parser.add_argument("--precompress", default=False, action="store_true",
+                        help="also write .gz (and .br) compressed configs.")
+    parser.add_argument("--audio_variants", default=None, nargs="+", choices=sorted(AUDIO_VARIANTS),
+                        help="variants made by transcode_audio.py to load instead of wav, in order of preference.")
+    parser.add_argument("--waveform_peaks", default=False, action="store_true",
+                        help="load waveform peaks sidecars written by compute_waveform_peaks.py.")
+    parser.add_argument("--report", default=None, type=str, help="write the efficiency report as json.")
+    parser.add_argument("--report_only", default=False, action="store_true",
+                        help="only report the efficiency of the design, do not write configs.")
+    parser.add_argument("--jobs", default=1, type=int)
+    parser.add_argument("--scan_index", default=None, type=str,
+                        help="json index of directory listings to speed up repeated scans.")
+    parser.add_argument("--audio_index", default=None, type=str,
+                        help="json index of audio formats to validate only new or modified files.")
+    parser.add_argument("--sample_rates", default=None, nargs="+", type=int,
+                        help="allowed sample rates of the wav files. by default, all of them must have the same rate.")
+    parser.add_argument("--skip_validation", default=False, action="store_true",
+                        help="do not validate the formats of the wav files.")
+    parser.add_argument("root_wav_dir",
+                        help="<root_wav_dir>/<system>/<utterance id>.wav, see trial_table.label_stimuli.")
+    parser.add_argument("outdir")
+    args = parser.parse_args()
+
+    scan_index = ScanIndex(args.scan_index)
+    systems, utts, stimuli, num_dropped = read_stimuli(args.root_wav_dir, scan_index)
+    scan_index.save()
+    if len(systems) < 2 or not utts:
+        parser.error(f"need at least 2 systems with common utterances in {args.root_wav_dir}.")
+    if num_dropped > 0:
+        print(f"{num_dropped} utterances are not rated since some systems do not have them.")
+
+    start = time.perf_counter()
+    with span("make_design", num_systems=len(systems), num_utts=len(utts)):
+        design_systems, design_utts = make_design(len(systems), len(utts), args.pages_per_config,
+                                                  args.replicates, args.seed)
+    elapsed = time.perf_counter() - start
+    sizes = (design_systems >= 0).sum(axis=1)
+    print(f"made a design of {len(design_systems)} configs of {sizes.min()}-{sizes.max()} pages for "
+          f"{len(systems)} systems and {len(utts)} utterances in {elapsed:.2f} sec.")
+
+    baseline_systems, baseline_utts = random_design(len(systems), len(utts), sizes, args.seed)
+    report = {"num_configs": len(design_systems), "num_systems": len(systems), "num_utts": len(utts)}
+    for name, (s, u) in [("design", (design_systems, design_utts)), ("random", (baseline_systems, baseline_utts))]:
+        with span("design_efficiency", design=name):
+            report[name] = design_efficiency(s, len(systems))
+        report[name]["ratings_per_stimulus"] = stimulus_coverage(s, u, len(systems), len(utts))
+        print(f"{name:>6}: efficiency {report[name]['efficiency']:.3f}, "
+              f"variance of a difference {report[name]['variance']:.4f}, "
+              f"ratings per system {report[name]['ratings_per_system']}, "
+              f"ratings per stimulus {report[name]['ratings_per_stimulus']}")
+    if report["random"]["connected"]:
+        report["relative_efficiency"] = report["design"]["efficiency"] / report["random"]["efficiency"]
+        print(f"the random design needs {report['relative_efficiency']:.2f}x the ratings of this design "
+              f"for the same confidence.")
+    if args.report is not None:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.report_only:
+        return
+
+    wav_paths = [[stimuli[systems[s], utts[u]] for s, u in zip(s_row, u_row) if s >= 0]
+                 for s_row, u_row in zip(design_systems, design_utts)]
+    if not args.skip_validation:
+        _, problems = preflight(sorted({path for paths in wav_paths for path in paths}), args.audio_index,
+                                args.jobs, sample_rates=args.sample_rates)
+        if problems:
+            parser.error(f"found {len(problems)} problems in the wav files, see above.")
+
+    # the pages keep the order of the design (seed None)
+    os.makedirs(args.outdir, exist_ok=True)
+    jobs = [(args.lang, paths, f"{args.outdir}/{args.prefix}{i}.yaml", args.sample_audio_path, None,
+             args.compact, args.precompress, args.audio_variants, args.waveform_peaks)
+            for i, paths in enumerate(wav_paths)]
+    start = time.perf_counter()
+    with span("write_configs", files=len(jobs)):
+        if args.jobs > 1:
+            with ProcessPoolExecutor(max_workers=args.jobs) as executor:
+                list(executor.map(_generate, jobs, chunksize=max(1, len(jobs) // (args.jobs * 4))))
+        else:
+            for job in jobs:
+                _generate(job)
+    print(f"generated {len(jobs)} configs in {time.perf_counter() - start:.2f} sec.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+
+"""Incrementally ingest the result csv files into the columnar store.
+
+Only the rows appended to <results_dir>/<type>.csv since the last ingest are
+parsed and written as a new parquet part (see results_store.py).
+
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import shutil
+import time
+
+import pandas as pd
+
+from .results_store import RESULT_TYPES, STATE_FILENAME, convert_types, default_store_dir, load_state
+
+
+def save_state(store_dir, state):
+    path = os.path.join(store_dir, STATE_FILENAME)
+    with open(f"{path}.tmp", "w") as f:
+        json.dump(state, f, indent=2)
+    os.replace(f"{path}.tmp", path)
+
+
+def ingest(csv_path, dataset_dir, state):
+    """Ingest rows appended to a csv file since the last ingest.
+
+    Only complete lines are consumed, since write.php may still be appending.
+    If the csv was truncated or its header changed, the dataset is rebuilt.
+
+    Args:
+        csv_path (str): Result csv.
+        dataset_dir (str): Parquet dataset directory of the result type.
+        state (dict): Ingest state of the csv, updated in place.
+
+    Returns:
+        int: Number of ingested rows.
+
+    """
+    result_type = os.path.basename(dataset_dir)
+    size = os.path.getsize(csv_path)
+    offset = state.get("offset", 0)
+    with open(csv_path, "rb") as f:
+        header = f.readline().decode("utf-8")
+        if not header.endswith("\n"):
+            return 0
+        if size < offset or header != state.get("header"):
+            # new, truncated or rewritten csv
+            shutil.rmtree(dataset_dir, ignore_errors=True)
+            state["header"] = header
+            offset = f.tell()
+        f.seek(offset)
+        data = f.read()
+    data = data[:data.rfind(b"\n") + 1]
+    state["offset"] = offset
+    if not data:
+        return 0
+
+    names = next(csv.reader([header]))
+    df = pd.read_csv(io.BytesIO(data), header=None, names=names, dtype=str, keep_default_na=False)
+    df = convert_types(df, result_type)
+    os.makedirs(dataset_dir, exist_ok=True)
+    # parts are named by their offset, so an interrupted ingest is simply redone
+    df.to_parquet(os.path.join(dataset_dir, f"part-{offset:016d}.parquet"), index=False)
+    state["offset"] = offset + len(data)
+    return len(df)
+
+
+def compact(dataset_dir):
+    """Merge all parts of a dataset into a single part."""
+    df = pd.read_parquet(dataset_dir)
+    parts = sorted(f for f in os.listdir(dataset_dir) if f.endswith(".parquet"))
+    tmp_path = os.path.join(dataset_dir, "compact.tmp")
+    df.to_parquet(tmp_path, index=False)
+    for part in parts:
+        os.remove(os.path.join(dataset_dir, part))
+    os.replace(tmp_path, os.path.join(dataset_dir, parts[0]))
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--store_dir", default=None, type=str,
+                        help="store directory. defaults to <results_dir>/store.")
+    parser.add_argument("--compact", default=False, action="store_true",
+                        help="merge the parts of each dataset after ingesting.")
+    parser.add_argument("results_dir", type=str, help="e.g. results/<testId>.")
+    args = parser.parse_args()
+
+    store_dir = args.store_dir or default_store_dir(args.results_dir)
+    os.makedirs(store_dir, exist_ok=True)
+    state = load_state(store_dir)
+
+    for result_type in RESULT_TYPES:
+        csv_path = os.path.join(args.results_dir, f"{result_type}.csv")
+        if not os.path.exists(csv_path):
+            continue
+        start = time.perf_counter()
+        dataset_dir = os.path.join(store_dir, result_type)
+        num_rows = ingest(csv_path, dataset_dir, state.setdefault(result_type, {}))
+        save_state(store_dir, state)
+        if args.compact and os.path.isdir(dataset_dir):
+            compact(dataset_dir)
+        elapsed = time.perf_counter() - start
+        print(f"{result_type}: ingested {num_rows} rows in {elapsed:.2f} sec "
+              f"({num_rows / max(elapsed, 1e-9):.0f} rows/sec).")
+
+
+if __name__ == "__main__":
+    main()
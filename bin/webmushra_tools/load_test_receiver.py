@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+
+"""Load test of results_receiver.py (or write.php).
+
+Fires synthetic sessions concurrently at a running receiver, like many
+workers pressing [send Results] at the same time, and then checks the
+written csv files: the header must appear exactly once, every line must have
+the columns of the header, and every submitted (rater, trial) pair must be
+found exactly once, i.e. no rows are lost, duplicated or interleaved.
+
+    $ ./bin/results_receiver.py --results_dir /tmp/results &
+    $ ./bin/load_test_receiver.py --num_sessions 5000 --concurrency 1000 /tmp/results
+
+With --db, the database of a receiver with --backend sqlite is exported
+(see results_db.py) and checked in the same way.
+
+"""
+
+import argparse
+import asyncio
+import csv
+import json
+import os
+import time
+
+from .results_db import connect, export_csv
+from .results_writer import RESULT_LAYOUTS, sanitize
+
+
+def make_session(test_id, rater, num_trials):
+    """Make a synthetic session with lss and mushra trials."""
+    trials = []
+    for i in range(num_trials):
+        trials.append({
+            "type": "likert_single_stimulus",
+            "id": f"method_a_system_{i % 5}_{i:04d}.wav",
+            "responses": [{"stimulus": "C1", "stimulusRating": str(1 + i % 5), "time": 1000 + i}],
+        })
+    trials.append({
+        "type": "mushra",
+        "id": "trial_mushra",
+        "responses": [{"stimulus": f"C{j}", "score": j * 10, "time": 2000 + j, "comment": "a, \"quoted\" comment"}
+                      for j in range(1, 5)],
+    })
+    return {
+        "testId": test_id,
+        "participant": {"name": ["name"], "response": [rater]},
+        "trials": trials,
+    }
+
+
+async def post(host, port, path, session):
+    """Post a session like DataSender.js. Returns latency in seconds."""
+    start = time.perf_counter()
+    body = ("sessionJSON=" + json.dumps(session)).encode("utf-8")
+    reader, writer = await asyncio.open_connection(host, port)
+    writer.write((f"POST {path} HTTP/1.1\r\n"
+                  f"Host: {host}:{port}\r\n"
+                  "Content-Type: application/x-www-form-urlencoded\r\n"
+                  f"Content-Length: {len(body)}\r\n"
+                  "Connection: close\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    status = int(response.split(b" ", 2)[1])
+    if status != 200 or not response.endswith(b"\r\n\r\n"):
+        raise RuntimeError(f"session was not accepted: {response[:200]}")
+    return time.perf_counter() - start
+
+
+async def run(args):
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def submit(i):
+        async with semaphore:
+            session = make_session(args.test_id, f"rater{i:06d}", args.num_trials)
+            return await post(args.host, args.port, args.path, session)
+
+    return await asyncio.gather(*[submit(i) for i in range(args.num_sessions)])
+
+
+def check(csv_path, columns, expected):
+    """Check a result csv. Returns the number of errors."""
+    with open(csv_path, newline="") as f:
+        lines = list(csv.reader(f))
+    header, rows = lines[0], lines[1:]
+    num_errors = 0
+    if header[-len(columns):] != columns:
+        print(f"{csv_path}: unexpected header {header}.")
+        num_errors += 1
+    num_headers = sum(row == header for row in rows)
+    malformed = [row for row in rows if len(row) != len(header)]
+    found = {}
+    for row in rows:
+        if len(row) == len(header) and row != header:
+            key = (row[1], row[2], row[3])
+            found[key] = found.get(key, 0) + 1
+    missing = expected - set(found)
+    duplicated = [key for key, count in found.items() if count > 1]
+    for name, count in [("repeated headers", num_headers), ("malformed rows", len(malformed)),
+                        ("missing rows", len(missing)), ("duplicated rows", len(duplicated))]:
+        if count > 0:
+            print(f"{csv_path}: {count} {name}.")
+            num_errors += count
+    print(f"{csv_path}: {len(rows)} rows, {len(expected)} expected.")
+    return num_errors
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1", type=str)
+    parser.add_argument("--port", default=8889, type=int)
+    parser.add_argument("--path", default="/service/write.php", type=str)
+    parser.add_argument("--num_sessions", default=2000, type=int)
+    parser.add_argument("--concurrency", default=200, type=int, help="number of sessions in flight.")
+    parser.add_argument("--num_trials", default=25, type=int, help="number of lss trials per session.")
+    parser.add_argument("--test_id", default=None, type=str, help="defaults to a new id of this run.")
+    parser.add_argument("--db", default=None, type=str,
+                        help="database of a receiver with --backend sqlite. exported to results_dir before checking.")
+    parser.add_argument("results_dir", type=str, help="results directory of the receiver.")
+    args = parser.parse_args()
+    if args.test_id is None:
+        args.test_id = f"load_test_{int(time.time())}"
+
+    start = time.perf_counter()
+    latencies = sorted(asyncio.run(run(args)))
+    elapsed = time.perf_counter() - start
+    print(f"submitted {args.num_sessions} sessions in {elapsed:.2f} sec "
+          f"({args.num_sessions / elapsed:.1f} sessions/sec), latency "
+          f"p50 {latencies[len(latencies) // 2] * 1000:.1f} ms, "
+          f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.1f} ms.")
+
+    test_dir = os.path.join(args.results_dir, sanitize(args.test_id))
+    if args.db is not None:
+        os.makedirs(test_dir, exist_ok=True)
+        conn = connect(args.db, readonly=True)
+        for result_name in ["lss", "mushra"]:
+            export_csv(conn, args.test_id, result_name, os.path.join(test_dir, f"{result_name}.csv"))
+        conn.close()
+    raters = [f"rater{i:06d}" for i in range(args.num_sessions)]
+    # rows are identified by (rater, trial_id, rating or stimulus)
+    lss_trials = [(f"method_a_system_{i % 5}_{i:04d}.wav", f" {1 + i % 5} ") for i in range(args.num_trials)]
+    mushra_trials = [("trial_mushra", f"C{j}") for j in range(1, 5)]
+    num_errors = check(os.path.join(test_dir, "lss.csv"), RESULT_LAYOUTS["likert_single_stimulus"][1],
+                       {(rater, trial, rating) for rater in raters for trial, rating in lss_trials})
+    num_errors += check(os.path.join(test_dir, "mushra.csv"), RESULT_LAYOUTS["mushra"][1],
+                        {(rater, trial, stimulus) for rater in raters for trial, stimulus in mushra_trials})
+    if num_errors > 0:
+        raise RuntimeError(f"found {num_errors} errors.")
+    print("no rows were lost, duplicated or interleaved.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+"""Content manifest for incremental rebuilds of the stimulus preparation pipeline.
+
+The manifest is a json file with two tables:
+
+* ``files``: hash cache of every input, ``{path: {"size", "mtime_ns", "hash"}}``.
+  The hash is only recomputed when the size or mtime of a file has changed.
+* ``stages``: derived outputs of each stage,
+  ``{stage: {output: {"inputs": {path: hash}, "params": ...}}}``.
+
+An output is fresh if it exists, was built with the same params and all of its
+inputs still have the recorded hash.
+
+"""
+
+import hashlib
+import json
+import os
+
+MANIFEST_VERSION = 1
+
+
+def hash_file(path, chunk_size=1 << 20):
+    """Compute blake2b digest of file contents."""
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def hash_params(params):
+    """Compute digest of json serializable params (e.g. a file listing)."""
+    data = json.dumps(params, sort_keys=True, ensure_ascii=False).encode("utf-8")
+    return hashlib.blake2b(data, digest_size=16).hexdigest()
+
+
+class Manifest(object):
+    """Manifest of inputs and derived outputs.
+
+    Args:
+        path (str): Path of manifest json. If None, the manifest is disabled,
+            i.e. every output is stale and nothing is recorded.
+
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.files = {}
+        self.stages = {}
+        if path is not None and os.path.exists(path):
+            with open(path) as f:
+                manifest = json.load(f)
+            if manifest.get("version") == MANIFEST_VERSION:
+                self.files = manifest["files"]
+                self.stages = manifest["stages"]
+
+    @property
+    def enabled(self):
+        return self.path is not None
+
+    def file_hash(self, path):
+        """Return content hash of the file, using the cache if size and mtime match."""
+        st = os.stat(path)
+        entry = self.files.get(path)
+        if entry is None or entry["size"] != st.st_size or entry["mtime_ns"] != st.st_mtime_ns:
+            entry = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "hash": hash_file(path)}
+            self.files[path] = entry
+        return entry["hash"]
+
+    def is_fresh(self, stage, output, inputs, params=None):
+        """Check whether output is up to date.
+
+        Args:
+            stage (str): Stage name.
+            output (str): Output path.
+            inputs (list): Input paths the output is derived from.
+            params (object): Json serializable parameters of the stage.
+
+        Returns:
+            bool: True if the output does not need to be rebuilt.
+
+        """
+        if not self.enabled:
+            return False
+        entry = self.stages.get(stage, {}).get(output)
+        if entry is None or entry["params"] != params or not os.path.exists(output):
+            return False
+        if sorted(entry["inputs"]) != sorted(inputs):
+            return False
+        try:
+            return all(self.file_hash(path) == entry["inputs"][path] for path in inputs)
+        except FileNotFoundError:
+            return False
+
+    def record(self, stage, output, inputs, params=None):
+        """Record that output was built from inputs."""
+        if not self.enabled:
+            return
+        self.stages.setdefault(stage, {})[output] = {
+            "inputs": {path: self.file_hash(path) for path in inputs},
+            "params": params,
+        }
+
+    def drop_stale(self, stage, outputs, root=None):
+        """Forget the recorded outputs of a stage which are not built anymore.
+
+        Args:
+            stage (str): Stage name.
+            outputs (iterable): Output paths of the current build.
+            root (str): If given, only outputs under this directory are dropped,
+                so that builds into other directories sharing the manifest are kept.
+
+        Returns:
+            list: Dropped output paths, which the caller may delete.
+
+        """
+        outputs = set(outputs)
+        prefix = None if root is None else os.path.join(root, "")
+        entries = self.stages.get(stage, {})
+        stale = sorted(output for output in entries
+                       if output not in outputs and (prefix is None or output.startswith(prefix)))
+        for output in stale:
+            del entries[output]
+        return stale
+
+    def save(self):
+        """Write the manifest atomically."""
+        if not self.enabled:
+            return
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"version": MANIFEST_VERSION, "files": self.files, "stages": self.stages}, f)
+        os.replace(tmp_path, self.path)
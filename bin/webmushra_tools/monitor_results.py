@@ -0,0 +1,187 @@
+# -*- coding: utf-8 -*-
+
+"""Monitor results while an evaluation is running.
+
+Tails <results_dir>/<type>.csv appended by service/write.php and keeps running
+statistics of every system and rater (Welford's mean / variance), so that each
+update only costs time proportional to the new rows and memory does not grow
+with the number of ratings. A summary is printed (and written as json) every
+--interval seconds.
+
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import time
+
+from .results_store import RATING_COLUMNS
+from .trial_table import read_trial_tables
+
+
+class RunningStats(object):
+    """Welford's online mean / variance."""
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+
+    def update(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self.m2 += delta * (x - self.mean)
+
+    @property
+    def var(self):
+        return self.m2 / (self.n - 1) if self.n > 1 else float("nan")
+
+    def confidence(self, level=0.95):
+        """Half width of the t-distribution interval of the mean."""
+        from scipy.stats import t
+
+        if self.n < 2:
+            return float("nan")
+        return t.ppf((1 + level) / 2, self.n - 1) * math.sqrt(self.var / self.n)
+
+    def to_dict(self, level=0.95):
+        return {"n": self.n, "mean": self.mean, "var": self.var, "confidence": self.confidence(level)}
+
+
+class CsvTailer(object):
+    """Read rows appended to a csv file since the last read.
+
+    Only complete lines are returned, since write.php may still be appending.
+    If the file is truncated or replaced, it is read again from the start.
+
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.inode = None
+        self.header = None
+        self.num_resets = 0
+
+    def read_rows(self):
+        """Return new rows as dicts keyed by the header."""
+        if not os.path.exists(self.path):
+            return []
+        stat = os.stat(self.path)
+        if stat.st_ino != self.inode or stat.st_size < self.offset:
+            self.inode, self.offset, self.header = stat.st_ino, 0, None
+            self.num_resets += 1
+        with open(self.path, "rb") as f:
+            f.seek(self.offset)
+            data = f.read()
+        data = data[:data.rfind(b"\n") + 1]
+        self.offset += len(data)
+        lines = data.decode("utf-8").splitlines()
+        if self.header is None and lines:
+            self.header = next(csv.reader([lines.pop(0)]))
+        return [dict(zip(self.header, row)) for row in csv.reader(lines)]
+
+
+class Monitor(object):
+    """Running statistics of systems and raters.
+
+    Args:
+        rating_column (str): Column of integer ratings.
+        methods (list): Methods contained in the trial ids. Used if trial_table is None.
+        trial_table (DataFrame): Trial table (see trial_table.py) to label trials exactly.
+        level (float): Confidence level.
+
+    """
+
+    def __init__(self, rating_column, methods=None, trial_table=None, level=0.95):
+        self.rating_column = rating_column
+        self.methods = sorted(methods or [], key=len, reverse=True)
+        self.systems = {} if trial_table is None else trial_table["system"].to_dict()
+        self.use_trial_table = trial_table is not None
+        self.level = level
+        self.system_stats = {}
+        self.rater_stats = {}
+        self.num_rows = 0
+        self.num_unrated = 0
+
+    def system_of(self, trial_id):
+        # the label of each trial id is computed once
+        if trial_id not in self.systems and not self.use_trial_table:
+            self.systems[trial_id] = next((m for m in self.methods if m in trial_id), None)
+        return self.systems.get(trial_id)
+
+    def update(self, rows):
+        for row in rows:
+            self.num_rows += 1
+            try:
+                rating = int(row[self.rating_column])
+            except ValueError:
+                # " NA " if not rated
+                self.num_unrated += 1
+                continue
+            system = self.system_of(row["trial_id"])
+            if system is not None:
+                self.system_stats.setdefault(system, RunningStats()).update(rating)
+            self.rater_stats.setdefault(row["name"], RunningStats()).update(rating)
+
+    def summary(self):
+        return {
+            "num_rows": self.num_rows,
+            "num_unrated": self.num_unrated,
+            "num_raters": len(self.rater_stats),
+            "systems": {k: v.to_dict(self.level) for k, v in sorted(self.system_stats.items())},
+            "raters": {k: v.to_dict(self.level) for k, v in sorted(self.rater_stats.items())},
+        }
+
+    def print_summary(self):
+        print(f"---------- {time.strftime('%H:%M:%S')} {self.num_rows} rows, "
+              f"{len(self.rater_stats)} raters ----------")
+        for system, stats in sorted(self.system_stats.items()):
+            print(f"{system}: {stats.mean:.2f} ± {stats.confidence(self.level):.2f} (#samples={stats.n})")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--result_type", default="lss", choices=sorted(RATING_COLUMNS))
+    parser.add_argument("--methods", default=None, nargs="+", type=str,
+                        help="methods contained in the trial ids.")
+    parser.add_argument("--trial_tables", default=None, nargs="+", type=str,
+                        help="<config>.trials.csv written by generate_config*.py to label trials exactly.")
+    parser.add_argument("--confidence", default=0.95, type=float)
+    parser.add_argument("--interval", default=10.0, type=float, help="seconds between updates.")
+    parser.add_argument("--summary_json", default=None, type=str, help="write summary json at each update.")
+    parser.add_argument("--once", default=False, action="store_true", help="update once and exit.")
+    parser.add_argument("results_dir", type=str, help="e.g. results/<testId>.")
+    args = parser.parse_args()
+
+    if args.methods is None and args.trial_tables is None:
+        parser.error("either --methods or --trial_tables is required.")
+    trial_table = read_trial_tables(args.trial_tables) if args.trial_tables is not None else None
+    monitor = Monitor(RATING_COLUMNS[args.result_type][0], args.methods, trial_table, args.confidence)
+    tailer = CsvTailer(os.path.join(args.results_dir, f"{args.result_type}.csv"))
+    num_resets = 0
+
+    while True:
+        start = time.perf_counter()
+        rows = tailer.read_rows()
+        if tailer.num_resets != num_resets:
+            # the csv was replaced, start over
+            num_resets = tailer.num_resets
+            monitor = Monitor(RATING_COLUMNS[args.result_type][0], args.methods, trial_table, args.confidence)
+        monitor.update(rows)
+        monitor.print_summary()
+        print(f"processed {len(rows)} new rows in {time.perf_counter() - start:.3f} sec.")
+        if args.summary_json is not None:
+            with open(f"{args.summary_json}.tmp", "w") as f:
+                json.dump(monitor.summary(), f, indent=2)
+            os.replace(f"{args.summary_json}.tmp", args.summary_json)
+        if args.once:
+            break
+        time.sleep(args.interval)
+
+
+if __name__ == "__main__":
+    main()
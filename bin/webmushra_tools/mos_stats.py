@@ -0,0 +1,157 @@
+# -*- coding: utf-8 -*-
+
+"""Vectorized MOS statistics.
+
+All functions work on a DataFrame of ratings with (at least) the columns
+
+    name             rater id
+    trial_id         stimulus file name, e.g. method_a_original_0047.wav
+    stimuli_rating   integer rating
+
+as returned by results_store.read_results(). Per-row work is done once by
+pandas / numpy; string matching is only done on the unique trial ids.
+
+"""
+
+import re
+
+import numpy as np
+import pandas as pd
+
+
+def extract_system(trial_ids, methods):
+    """Label each trial with the method contained in its trial id.
+
+    If several methods are contained in a trial id, the longest one is used,
+    so that e.g. "baseline_tf_1f1m" is not labeled as "baseline_tf".
+
+    Args:
+        trial_ids (Series): Trial ids.
+        methods (list): Method names.
+
+    Returns:
+        Series: Categorical method of each trial (NaN if no method matched).
+
+    """
+    trial_ids = trial_ids.astype("category")
+    pattern = "|".join(re.escape(m) for m in sorted(methods, key=len, reverse=True))
+    labels = trial_ids.cat.categories.to_series().str.extract(f"({pattern})", expand=False)
+    codes = pd.Categorical(labels, categories=methods).codes
+    # map the labels of the unique trial ids back to the rows
+    return pd.Series(pd.Categorical.from_codes(np.where(trial_ids.cat.codes >= 0,
+                                                        codes[trial_ids.cat.codes], -1),
+                                               categories=methods), index=trial_ids.index)
+
+
+def find_outlier_raters(df, gt_mask, thres=3, num_acceptable_utts=3):
+    """Find raters who rated ground truth samples low too often.
+
+    Args:
+        df (DataFrame): Ratings.
+        gt_mask (Series): Boolean mask of the ground truth rows of df.
+        thres (int): Ratings <= thres of ground truth samples are counted.
+        num_acceptable_utts (int): Raters with more counted ratings are outliers.
+
+    Returns:
+        list: Outlier rater names.
+
+    """
+    low = df["name"][gt_mask & (df["stimuli_rating"] <= thres)]
+    counts = low.value_counts()
+    return sorted(counts.index[counts > num_acceptable_utts])
+
+
+def rating_array(ratings):
+    """Return the values of a rating column and the mask of missing ratings.
+
+    Nullable integer columns (Int8 of results_store.convert_types) are read
+    without converting them to float with NaN.
+
+    Args:
+        ratings (Series): Ratings.
+
+    Returns:
+        ndarray: Ratings, whose values are undefined where missing.
+        ndarray: Boolean mask of missing ratings.
+
+    """
+    if pd.api.types.is_extension_array_dtype(ratings.dtype) and pd.api.types.is_integer_dtype(ratings.dtype):
+        missing = ratings.isna().to_numpy()
+        return ratings.to_numpy(dtype=ratings.dtype.numpy_dtype, na_value=0), missing
+    values = ratings.to_numpy(dtype=np.float64, na_value=np.nan)
+    return values, np.isnan(values)
+
+
+def summarize(df, systems, ci="t", confidence=0.95, num_bootstrap=10000, seed=0):
+    """Compute mean, variance, #samples and confidence interval of every system.
+
+    Args:
+        df (DataFrame): Ratings. Bootstrap intervals assume integer ratings.
+        systems (Series): System label of each row of df (e.g. by extract_system).
+            Rows without label are ignored.
+        ci (str): "t" for the t-distribution interval or "bootstrap" for the
+            percentile bootstrap interval of the mean.
+        confidence (float): Confidence level.
+        num_bootstrap (int): Number of bootstrap resamples.
+        seed (int): Seed of the bootstrap.
+
+    Returns:
+        DataFrame: Columns mean, var, n, ci_low, ci_high and confidence
+            (half width of the interval), indexed by system.
+
+    """
+    ratings, missing = rating_array(df["stimuli_rating"])
+    systems = systems.astype("category")
+    codes = systems.cat.codes.to_numpy()
+    valid = (codes >= 0) & ~missing
+    # the codes are int8 / int16, which would overflow in the histogram index below
+    codes, ratings = codes[valid].astype(np.int64), ratings[valid]
+
+    # per-system count, mean and squared deviations without a python loop over systems
+    num_systems = len(systems.cat.categories)
+    n = np.bincount(codes, minlength=num_systems)
+    total = np.bincount(codes, weights=ratings, minlength=num_systems)
+    mean = total / np.maximum(n, 1)
+    sq = np.bincount(codes, weights=(ratings - mean[codes]) ** 2, minlength=num_systems)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        var = sq / (n - 1)
+    stats = pd.DataFrame({"mean": mean, "var": var, "n": n}, index=systems.cat.categories)
+    stats = stats[stats["n"] > 0]
+
+    if ci == "t":
+        from scipy.stats import t
+
+        half = t.ppf((1 + confidence) / 2, stats["n"] - 1) * np.sqrt(stats["var"] / stats["n"])
+        stats["ci_low"] = stats["mean"] - half
+        stats["ci_high"] = stats["mean"] + half
+    elif ci == "bootstrap":
+        # ratings take few distinct values, so resampling a system is a multinomial
+        # draw over its histogram, independent of the number of ratings
+        ratings = ratings.astype(np.int64)
+        offset = ratings.min() if len(ratings) > 0 else 0
+        values = np.arange(offset, ratings.max() + 1 if len(ratings) > 0 else 1)
+        hist = np.bincount(codes * len(values) + (ratings - offset),
+                           minlength=num_systems * len(values)).reshape(num_systems, len(values))
+        rng = np.random.default_rng(seed)
+        alpha = (1 - confidence) / 2
+        lows, highs = [], []
+        for code in np.flatnonzero(n):
+            draws = rng.multinomial(n[code], hist[code] / n[code], size=num_bootstrap)
+            low, high = np.quantile(draws @ values / n[code], [alpha, 1 - alpha])
+            lows.append(low)
+            highs.append(high)
+        stats["ci_low"] = lows
+        stats["ci_high"] = highs
+    else:
+        raise ValueError(f"unknown ci: {ci}")
+
+    stats["confidence"] = (stats["ci_high"] - stats["ci_low"]) / 2
+    return stats
+
+
+def print_summary(stats, methods=None):
+    """Print summary in the order of methods."""
+    if methods is not None:
+        stats = stats.reindex([m for m in methods if m in stats.index])
+    for method, row in stats.iterrows():
+        print(f"{method}: {row['mean']:.2f} ± {row['confidence']:.2f} (#samples={int(row['n'])})")
@@ -0,0 +1,275 @@
+# -*- coding: utf-8 -*-
+
+"""Pairwise significance tests between systems.
+
+The ratings are coded once into a rater x utterance x system matrix in
+coordinate form (one entry per rating, sorted by system), which every test
+slices instead of filtering the DataFrame again. For each pair of systems:
+
+    bootstrap      paired two-way bootstrap of the difference of the means,
+                   resampling raters and utterances with replacement. Each
+                   resample is a pair of weight vectors (how often each rater /
+                   utterance was drawn); a batch of resamples is applied to the
+                   sparse rater x utterance matrix of the pair by one product.
+    mannwhitney    Mann-Whitney U test of the ratings of the two systems.
+    wilcoxon       Wilcoxon signed-rank test of the per-utterance means of the
+                   utterances rated in both systems.
+
+The pairs are spread across a process pool and the p-values are corrected for
+multiple comparisons (Holm or Benjamini-Hochberg).
+
+"""
+
+import itertools
+import re
+
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+TESTS = ["bootstrap", "mannwhitney", "wilcoxon"]
+CORRECTIONS = ["holm", "bh", "bonferroni", "none"]
+
+# number of resample x rater entries computed at once
+BATCH_ENTRIES = 2 ** 22
+
+_matrix = None
+
+
+def extract_utterance(trial_ids, methods):
+    """Label each trial with its trial id without the method, e.g. method_a__0047.
+
+    Trials of different systems of the same utterance get the same label.
+
+    Args:
+        trial_ids (Series): Trial ids.
+        methods (list): Method names, see mos_stats.extract_system.
+
+    Returns:
+        Series: Categorical utterance of each trial.
+
+    """
+    trial_ids = trial_ids.astype("category")
+    pattern = re.compile("|".join(re.escape(m) for m in sorted(methods, key=len, reverse=True)))
+    labels = pd.Categorical([re.sub(r"\.wav$", "", pattern.sub("", trial_id, count=1))
+                             for trial_id in trial_ids.cat.categories])
+    codes = np.asarray(trial_ids.cat.codes)
+    return pd.Series(pd.Categorical.from_codes(np.where(codes >= 0, labels.codes[codes], -1),
+                                               categories=labels.categories), index=trial_ids.index)
+
+
+class RatingMatrix(object):
+    """Ratings coded as (rater, utterance, system, rating), sorted by system.
+
+    Args:
+        raters (Series): Rater of each rating.
+        utterances (Series): Utterance of each rating.
+        systems (Series): System of each rating. Rows without system are dropped.
+        ratings (Series): Ratings.
+
+    """
+
+    def __init__(self, raters, utterances, systems, ratings):
+        systems = systems.astype("category")
+        raters = raters.astype("category")
+        utterances = utterances.astype("category")
+        system_codes = np.asarray(systems.cat.codes)
+        rating_values = ratings.to_numpy(dtype=np.float64, na_value=np.nan)
+        valid = (system_codes >= 0) & (np.asarray(utterances.cat.codes) >= 0) & ~np.isnan(rating_values)
+        order = np.argsort(system_codes[valid], kind="stable")
+
+        self.systems = list(systems.cat.categories)
+        self.system = system_codes[valid][order].astype(np.int32)
+        self.rater = np.asarray(raters.cat.codes)[valid][order].astype(np.int64)
+        self.utterance = np.asarray(utterances.cat.codes)[valid][order].astype(np.int64)
+        self.rating = rating_values[valid][order]
+        # rows of system i are offsets[i]:offsets[i + 1]
+        self.offsets = np.searchsorted(self.system, np.arange(len(self.systems) + 1))
+
+    def rows(self, system):
+        return slice(self.offsets[system], self.offsets[system + 1])
+
+    def pair(self, a, b):
+        """Return ratings of two systems with compact rater / utterance codes."""
+        rows = np.r_[self.rows(a), self.rows(b)]
+        raters, rater_codes = np.unique(self.rater[rows], return_inverse=True)
+        utterances, utterance_codes = np.unique(self.utterance[rows], return_inverse=True)
+        is_b = self.system[rows] == b
+        return rater_codes, utterance_codes, is_b, self.rating[rows], len(raters), len(utterances)
+
+
+def resample_weights(rng, num_items, size):
+    """How often each item is drawn in each of size resamples with replacement."""
+    draws = rng.integers(0, num_items, (size, num_items)) + num_items * np.arange(size)[:, None]
+    return np.bincount(draws.ravel(), minlength=size * num_items).reshape(size, num_items).astype(np.float32)
+
+
+def paired_bootstrap(rater_codes, utterance_codes, is_b, ratings, num_raters, num_utterances,
+                     num_bootstrap=10000, seed=0):
+    """Bootstrap the difference of the means of two systems over raters and utterances.
+
+    With rater weights w and utterance weights v of a resample, the sum of the
+    ratings of a system is w^T X v, where X is the sparse rater x utterance
+    matrix of the sums of its ratings (and likewise for the counts), so a
+    batch of resamples costs one sparse matrix product.
+
+    Returns:
+        ndarray: Difference (a - b) of each resample. NaN if a system had no
+            ratings in a resample.
+
+    """
+    from scipy.sparse import coo_matrix
+
+    rng = np.random.default_rng(seed)
+    # stacked sums of a, counts of a, sums of b and counts of b
+    rows = np.concatenate([rater_codes + k * num_raters for k in range(4)])
+    values = np.concatenate([np.where(is_b, 0, ratings), ~is_b, np.where(is_b, ratings, 0), is_b])
+    matrix = coo_matrix((values.astype(np.float32), (rows, np.tile(utterance_codes, 4))),
+                        shape=(4 * num_raters, num_utterances)).tocsr()
+    batch = max(1, BATCH_ENTRIES // (4 * num_raters + num_utterances))
+    diffs = []
+    for start in range(0, num_bootstrap, batch):
+        size = min(batch, num_bootstrap - start)
+        rater_weights = resample_weights(rng, num_raters, size)
+        utterance_weights = resample_weights(rng, num_utterances, size)
+        partial = (matrix @ np.ascontiguousarray(utterance_weights.T)).reshape(4, num_raters, size)
+        sums = np.einsum("krb,br->bk", partial, rater_weights).astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            diffs.append(sums[:, 0] / sums[:, 1] - sums[:, 2] / sums[:, 3])
+    return np.concatenate(diffs)
+
+
+def bootstrap_p_value(diffs):
+    """Two-sided p-value of the difference being zero."""
+    diffs = diffs[~np.isnan(diffs)]
+    if len(diffs) == 0:
+        return np.nan
+    return min(1.0, 2 * min(np.mean(diffs <= 0), np.mean(diffs >= 0)))
+
+
+def _init_worker(matrix):
+    global _matrix
+    _matrix = matrix
+
+
+def compare_pair(args):
+    """Run all tests on a pair of systems (in a worker of the pool)."""
+    from scipy.stats import mannwhitneyu, wilcoxon
+
+    a, b, num_bootstrap, confidence, seed = args
+    rater_codes, utterance_codes, is_b, ratings, num_raters, num_utterances = _matrix.pair(a, b)
+    ratings_a, ratings_b = ratings[~is_b], ratings[is_b]
+    result = {
+        "system_a": _matrix.systems[a],
+        "system_b": _matrix.systems[b],
+        "n_a": len(ratings_a),
+        "n_b": len(ratings_b),
+        "diff": ratings_a.mean() - ratings_b.mean(),
+    }
+
+    diffs = paired_bootstrap(rater_codes, utterance_codes, is_b, ratings, num_raters, num_utterances,
+                             num_bootstrap, seed=[seed, a, b])
+    alpha = (1 - confidence) / 2
+    result["ci_low"], result["ci_high"] = np.nanquantile(diffs, [alpha, 1 - alpha])
+    result["p_bootstrap"] = bootstrap_p_value(diffs)
+
+    result["p_mannwhitney"] = mannwhitneyu(ratings_a, ratings_b).pvalue
+
+    # mean rating of each utterance in each system, for the utterances rated in both
+    cells = is_b * num_utterances + utterance_codes
+    totals = np.bincount(cells, weights=ratings, minlength=2 * num_utterances).reshape(2, num_utterances)
+    counts = np.bincount(cells, minlength=2 * num_utterances).reshape(2, num_utterances)
+    both = (counts > 0).all(axis=0)
+    result["n_paired_utterances"] = int(both.sum())
+    means = totals[:, both] / counts[:, both]
+    if both.sum() > 0 and np.any(means[0] != means[1]):
+        result["p_wilcoxon"] = wilcoxon(means[0], means[1]).pvalue
+    else:
+        result["p_wilcoxon"] = np.nan
+    return result
+
+
+def correct_p_values(p_values, method="holm"):
+    """Correct p-values for multiple comparisons.
+
+    Args:
+        p_values (ndarray): P-values (NaN are ignored).
+        method (str): "holm", "bh" (Benjamini-Hochberg), "bonferroni" or "none".
+
+    Returns:
+        ndarray: Adjusted p-values.
+
+    """
+    p_values = np.asarray(p_values, dtype=np.float64)
+    adjusted = np.full_like(p_values, np.nan)
+    valid = np.flatnonzero(~np.isnan(p_values))
+    m = len(valid)
+    if m == 0 or method == "none":
+        return p_values.copy()
+    p = p_values[valid]
+    if method == "bonferroni":
+        adjusted[valid] = np.minimum(1, p * m)
+    elif method == "holm":
+        order = np.argsort(p)
+        stepped = np.maximum.accumulate((m - np.arange(m)) * p[order])
+        adjusted[valid[order]] = np.minimum(1, stepped)
+    elif method == "bh":
+        order = np.argsort(p)[::-1]
+        stepped = np.minimum.accumulate(m / np.arange(m, 0, -1) * p[order])
+        adjusted[valid[order]] = np.minimum(1, stepped)
+    else:
+        raise ValueError(f"unknown correction: {method}")
+    return adjusted
+
+
+def compare_systems(matrix, num_bootstrap=10000, confidence=0.95, correction="holm", jobs=1, seed=0):
+    """Run all tests on all pairs of systems.
+
+    Args:
+        matrix (RatingMatrix): Ratings.
+        num_bootstrap (int): Number of bootstrap resamples per pair.
+        confidence (float): Confidence level of the bootstrap interval.
+        correction (str): Multiple comparison correction, see correct_p_values.
+        jobs (int): Number of processes.
+        seed (int): Seed of the bootstrap. Results do not depend on jobs.
+
+    Returns:
+        DataFrame: One row per pair with the difference of the means, its
+            bootstrap interval, and raw and adjusted p-values of each test.
+
+    """
+    pairs = [(a, b, num_bootstrap, confidence, seed)
+             for a, b in itertools.combinations(range(len(matrix.systems)), 2)
+             if matrix.offsets[a] < matrix.offsets[a + 1] and matrix.offsets[b] < matrix.offsets[b + 1]]
+    if jobs > 1:
+        with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(matrix,)) as executor:
+            results = list(executor.map(compare_pair, pairs, chunksize=max(1, len(pairs) // (4 * jobs))))
+    else:
+        _init_worker(matrix)
+        results = [compare_pair(pair) for pair in pairs]
+    df = pd.DataFrame(results)
+    for test in TESTS:
+        df[f"p_{test}_adjusted"] = correct_p_values(df[f"p_{test}"], correction) if len(df) else []
+    return df
+
+
+def significance_matrix(pairs, systems, test="bootstrap", alpha=0.05):
+    """Arrange the pairs as a system x system matrix.
+
+    Each cell is the difference of the means of the row and column system,
+    marked with "*" if the adjusted p-value of the test is below alpha.
+
+    Returns:
+        DataFrame: Matrix of strings indexed by systems.
+
+    """
+    matrix = pd.DataFrame("", index=systems, columns=systems)
+    for row in pairs.itertuples(index=False):
+        row = row._asdict()
+        mark = "*" if row[f"p_{test}_adjusted"] < alpha else ""
+        matrix.loc[row["system_a"], row["system_b"]] = f"{row['diff']:+.2f}{mark}"
+        matrix.loc[row["system_b"], row["system_a"]] = f"{-row['diff']:+.2f}{mark}"
+    for system in systems:
+        matrix.loc[system, system] = "-"
+    return matrix
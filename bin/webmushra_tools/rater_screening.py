@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+
+"""Rater quality screening.
+
+Every rule is computed for all raters at once from per-rater sums, which are
+accumulated by np.bincount over the categorical codes of the raters (one pass
+over the ratings, no per-rater loop):
+
+    gt_low      more than num_acceptable_utts ratings <= gt_thres of ground
+                truth stimuli (the check of summarize_results.py)
+    constant    the same score for all of at least min_ratings ratings
+    too_fast    more than max_fast_fraction of the ratings were given in less
+                than min_time_ratio x the duration of the stimulus
+                (rating_time is the time on the page in ms)
+    consensus   Pearson correlation with the leave-one-out consensus, i.e. the
+                mean rating of the same trial by the other raters, below
+                min_consensus_corr (over at least min_ratings ratings)
+
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from .audio_index import read_audio_info
+from .file_scanner import find_files
+from .results_writer import format_csv_field, format_csv_row
+from .trial_table import trial_id
+
+RULES = ["gt_low", "constant", "too_fast", "consensus"]
+
+DEFAULT_PARAMS = {
+    "gt_thres": 3,
+    "num_acceptable_utts": 3,
+    "min_ratings": 5,
+    "min_time_ratio": 1.0,
+    "max_fast_fraction": 0.5,
+    "min_consensus_corr": -0.2,
+}
+
+
+def read_durations(wav_dirs):
+    """Read durations of PCM or IEEE float wav files from their headers (see audio_index.read_audio_info).
+
+    Args:
+        wav_dirs (list): Directories to search recursively.
+
+    Returns:
+        dict: Map from trial id (e.g. method_a_original_0047.wav) to seconds.
+            Files which cannot be read are left out, so their ratings are not checked.
+
+    """
+    durations = {}
+    for wav_dir in wav_dirs:
+        for path in find_files(wav_dir):
+            info = read_audio_info(path)
+            if "error" not in info:
+                durations[trial_id(path)] = info["duration"]
+    return durations
+
+
+def _per_rater(codes, num_raters, weights=None):
+    return np.bincount(codes, weights=weights, minlength=num_raters)
+
+
+def screen_raters(df, gt_mask=None, durations=None, rules=None, **params):
+    """Compute the screening statistics and rules of every rater.
+
+    Args:
+        df (DataFrame): Ratings with columns name, trial_id, stimuli_rating
+            and (for too_fast) rating_time.
+        gt_mask (Series): Boolean mask of the ground truth rows (for gt_low).
+        durations (dict): Map from trial id to seconds (for too_fast).
+        rules (list): Rules to apply. Defaults to all RULES. Rules whose input
+            is missing are skipped.
+        **params: Thresholds, see DEFAULT_PARAMS.
+
+    Returns:
+        DataFrame: Statistics, a column per applied rule (True if violated),
+            removed and reasons, indexed by rater.
+
+    """
+    params = dict(DEFAULT_PARAMS, **params)
+    rules = list(RULES if rules is None else rules)
+    if gt_mask is None and "gt_low" in rules:
+        rules.remove("gt_low")
+    if (durations is None or "rating_time" not in df.columns) and "too_fast" in rules:
+        rules.remove("too_fast")
+
+    df = df[df["stimuli_rating"].notna()]
+    raters = df["name"].astype("category")
+    codes = np.asarray(raters.cat.codes)
+    num_raters = len(raters.cat.categories)
+    x = df["stimuli_rating"].to_numpy(dtype=np.float64)
+
+    n = _per_rater(codes, num_raters)
+    sx = _per_rater(codes, num_raters, x)
+    sxx = _per_rater(codes, num_raters, x * x)
+    report = pd.DataFrame(index=pd.Index(raters.cat.categories, name="name"))
+    report["n"] = n
+    with np.errstate(divide="ignore", invalid="ignore"):
+        report["mean"] = sx / n
+        # ratings are integers, so the sums are exact and constant raters get exactly 0
+        report["std"] = np.sqrt(np.maximum(n * sxx - sx * sx, 0) / (n * (n - 1)))
+
+    if "gt_low" in rules:
+        low = np.asarray(gt_mask.loc[df.index]) & (x <= params["gt_thres"])
+        report["gt_low_count"] = _per_rater(codes[low], num_raters)
+        report["gt_low"] = report["gt_low_count"] > params["num_acceptable_utts"]
+
+    if "constant" in rules:
+        report["constant"] = (n >= params["min_ratings"]) & (report["std"] == 0)
+
+    if "too_fast" in rules:
+        trials = df["trial_id"].astype("category")
+        seconds = trials.cat.categories.map(lambda t: durations.get(t, np.nan)).to_numpy(dtype=np.float64)
+        duration = seconds[np.asarray(trials.cat.codes)]
+        rating_time = pd.to_numeric(df["rating_time"], errors="coerce").to_numpy(dtype=np.float64)
+        known = ~np.isnan(duration) & ~np.isnan(rating_time)
+        fast = known & (rating_time < params["min_time_ratio"] * duration * 1000)
+        num_known = _per_rater(codes[known], num_raters)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            report["fast_fraction"] = _per_rater(codes[fast], num_raters) / num_known
+        report["too_fast"] = report["fast_fraction"] > params["max_fast_fraction"]
+
+    if "consensus" in rules:
+        trial_codes = np.asarray(df["trial_id"].astype("category").cat.codes)
+        trial_n = np.bincount(trial_codes)
+        trial_sum = np.bincount(trial_codes, weights=x)
+        others = trial_n[trial_codes] - 1
+        rated = others > 0
+        y = (trial_sum[trial_codes][rated] - x[rated]) / others[rated]
+        c, xr = codes[rated], x[rated]
+        m = _per_rater(c, num_raters)
+        mx, my = _per_rater(c, num_raters, xr), _per_rater(c, num_raters, y)
+        cov = _per_rater(c, num_raters, xr * y) - mx * my / np.maximum(m, 1)
+        vx = _per_rater(c, num_raters, xr * xr) - mx * mx / np.maximum(m, 1)
+        vy = _per_rater(c, num_raters, y * y) - my * my / np.maximum(m, 1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            report["consensus_corr"] = np.where((vx > 1e-9) & (vy > 1e-9), cov / np.sqrt(vx * vy), np.nan)
+        report["consensus"] = (m >= params["min_ratings"]) & (report["consensus_corr"] < params["min_consensus_corr"])
+
+    flags = report[rules].to_numpy(dtype=bool) if rules else np.zeros((num_raters, 0), dtype=bool)
+    report["removed"] = flags.any(axis=1)
+    # join the names of the violated rules once per distinct combination
+    combination = flags.astype(np.int64) @ (1 << np.arange(len(rules), dtype=np.int64))
+    unique, inverse = np.unique(combination, return_inverse=True)
+    reasons = np.array([",".join(rule for i, rule in enumerate(rules) if c >> i & 1) for c in unique], dtype=object)
+    report["reasons"] = reasons[inverse]
+    return report
+
+
+def write_cleaned(df, report, path):
+    """Write the rows of the raters that were not removed in the layout of write.php.
+
+    Fields are formatted by the fputcsv emulation of results_writer, once per
+    distinct value of a column.
+
+    Returns:
+        int: Number of written rows.
+
+    """
+    keep = ~df["name"].isin(report.index[report["removed"]])
+    cleaned = df[keep]
+    fields = []
+    for column in cleaned.columns:
+        values = cleaned[column]
+        if column == "stimuli_rating":
+            values = pd.Series(np.where(values.isna(), " NA ", " " + values.astype(str) + " "), index=values.index)
+        codes, uniques = pd.factorize(values)
+        # numeric columns are stored as float64, php_str writes whole numbers (e.g. rating_time in ms) as integers
+        formatted = np.array([format_csv_field(value) for value in uniques] + [""], dtype=object)
+        fields.append(formatted[codes])
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write(format_csv_row(cleaned.columns))
+        f.writelines(",".join(row) + "\n" for row in zip(*fields))
+    return len(cleaned)
@@ -0,0 +1,240 @@
+# -*- coding: utf-8 -*-
+
+"""SQLite backend of the results.
+
+Sessions received by results_receiver.py (--backend sqlite) are inserted in
+one transaction each into a database in WAL mode, so readers never block the
+writer and concurrent submissions are safe:
+
+    sessions      one row per submitted session (test id, rater, time)
+    participants  questionnaire answers of a session (field, value)
+    trials        trials of a session (trial id, type, result name)
+    responses     responses of a trial (stimulus, rating, time and the
+                  remaining write.php columns as json)
+
+trial_id, rater and stimulus are indexed, so e.g. the number of ratings of a
+stimulus or the submissions of a rater are answered without a full scan.
+export_csv() reproduces the csv files of write.php (lss.csv, mushra.csv, ...).
+
+"""
+
+import json
+import os
+import sqlite3
+import time
+from urllib.parse import quote
+
+from .results_writer import RESULT_LAYOUTS, format_csv_row
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    test_id TEXT NOT NULL,
+    rater TEXT,
+    received_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS participants (
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    position INTEGER NOT NULL,
+    field TEXT NOT NULL,
+    value TEXT,
+    PRIMARY KEY (session_id, position)
+);
+CREATE TABLE IF NOT EXISTS trials (
+    id INTEGER PRIMARY KEY,
+    session_id INTEGER NOT NULL REFERENCES sessions(id),
+    trial_id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    result_name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS responses (
+    id INTEGER PRIMARY KEY,
+    trial_row_id INTEGER NOT NULL REFERENCES trials(id),
+    stimulus TEXT,
+    rating REAL,
+    time REAL,
+    columns TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS sessions_test_id ON sessions(test_id);
+CREATE INDEX IF NOT EXISTS sessions_rater ON sessions(rater);
+CREATE INDEX IF NOT EXISTS trials_session_id ON trials(session_id);
+CREATE INDEX IF NOT EXISTS trials_trial_id ON trials(trial_id);
+CREATE INDEX IF NOT EXISTS responses_trial_row_id ON responses(trial_row_id);
+CREATE INDEX IF NOT EXISTS responses_stimulus ON responses(stimulus);
+"""
+
+# response key of the rating of each trial type
+RATING_KEYS = {
+    "mushra": "score",
+    "likert_multi_stimulus": "stimulusRating",
+    "likert_single_stimulus": "stimulusRating",
+    "bs1116": "nonReferenceScore",
+}
+
+
+def connect(path, readonly=False):
+    """Open (and create) the results database.
+
+    Args:
+        path (str): Path of the database.
+        readonly (bool): Open an existing database read-only, e.g. for analysis, so that a wrong path does not
+            create an empty database.
+
+    Returns:
+        Connection: Database connection.
+
+    """
+    if readonly:
+        if not os.path.isfile(path):
+            raise FileNotFoundError(f"{path}: no such results database.")
+        return sqlite3.connect(f"file:{quote(os.path.abspath(path))}?mode=ro", uri=True, timeout=30,
+                               check_same_thread=False)
+    conn = sqlite3.connect(path, timeout=30, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA foreign_keys=ON")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def insert_session(conn, session):
+    """Insert a session in one transaction.
+
+    Args:
+        conn (Connection): Database connection.
+        session (dict): Decoded sessionJSON.
+
+    Returns:
+        int: Number of inserted responses.
+
+    """
+    participant = session.get("participant", {})
+    fields = participant.get("name", [])
+    values = participant.get("response", [])
+    values = [values[i] if i < len(values) else None for i in range(len(fields))]
+    rater = values[fields.index("name")] if "name" in fields else (values[0] if values else None)
+
+    num_responses = 0
+    with conn:
+        session_id = conn.execute(
+            "INSERT INTO sessions (test_id, rater, received_at) VALUES (?, ?, ?)",
+            (session.get("testId"), rater, time.time())).lastrowid
+        conn.executemany(
+            "INSERT INTO participants (session_id, position, field, value) VALUES (?, ?, ?, ?)",
+            [(session_id, i, field, value) for i, (field, value) in enumerate(zip(fields, values))])
+        for trial in session.get("trials", []):
+            if trial.get("type") not in RESULT_LAYOUTS or not trial.get("responses"):
+                continue
+            result_name, _, columns = RESULT_LAYOUTS[trial["type"]]
+            trial_row_id = conn.execute(
+                "INSERT INTO trials (session_id, trial_id, type, result_name) VALUES (?, ?, ?, ?)",
+                (session_id, trial.get("id"), trial["type"], result_name)).lastrowid
+            rating_key = RATING_KEYS.get(trial["type"])
+            rows = []
+            for response in trial["responses"]:
+                rating = _number(response.get(rating_key)) if rating_key is not None else None
+                rows.append((trial_row_id, response.get("stimulus"), rating, _number(response.get("time")),
+                             json.dumps(columns(response))))
+            conn.executemany(
+                "INSERT INTO responses (trial_row_id, stimulus, rating, time, columns) VALUES (?, ?, ?, ?, ?)",
+                rows)
+            num_responses += len(rows)
+    return num_responses
+
+
+def iter_result_rows(conn, test_id, result_name):
+    """Yield the header and the rows of a result in the layout of write.php."""
+    header = None
+    session_id = None
+    prefix = None
+    cursor = conn.execute(
+        "SELECT s.id, t.trial_id, t.type, r.columns FROM sessions s "
+        "JOIN trials t ON t.session_id = s.id JOIN responses r ON r.trial_row_id = t.id "
+        "WHERE s.test_id = ? AND t.result_name = ? ORDER BY s.id, t.id, r.id",
+        (test_id, result_name))
+    for sid, trial_id, trial_type, columns in cursor:
+        if sid != session_id:
+            session_id = sid
+            participants = conn.execute(
+                "SELECT field, value FROM participants WHERE session_id = ? ORDER BY position", (sid,)).fetchall()
+            prefix = [test_id] + [value for _, value in participants]
+            if header is None:
+                header = ["session_test_id"] + [field for field, _ in participants] + RESULT_LAYOUTS[trial_type][1]
+                yield header
+        yield prefix + [trial_id] + json.loads(columns)
+
+
+def export_csv(conn, test_id, result_name, path):
+    """Write a result as csv, same as write.php would have written it.
+
+    Returns:
+        int: Number of written rows.
+
+    """
+    num_rows = -1
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        for num_rows, row in enumerate(iter_result_rows(conn, test_id, result_name)):
+            f.write(format_csv_row(row))
+    return max(num_rows, 0)
+
+
+def count_ratings(conn, trial_id=None, stimulus=None):
+    """Count responses of a trial and / or a stimulus (uses the indexes)."""
+    query = "SELECT COUNT(*) FROM trials t JOIN responses r ON r.trial_row_id = t.id WHERE 1"
+    params = []
+    if trial_id is not None:
+        query += " AND t.trial_id = ?"
+        params.append(trial_id)
+    if stimulus is not None:
+        query += " AND r.stimulus = ?"
+        params.append(stimulus)
+    return conn.execute(query, params).fetchone()[0]
+
+
+def rater_responses(conn, rater):
+    """Return (test id, trial id, stimulus, rating, time) of all responses of a rater."""
+    return conn.execute(
+        "SELECT s.test_id, t.trial_id, r.stimulus, r.rating, r.time FROM sessions s "
+        "JOIN trials t ON t.session_id = s.id JOIN responses r ON r.trial_row_id = t.id "
+        "WHERE s.rater = ? ORDER BY s.id, t.id, r.id", (rater,)).fetchall()
+
+
+def read_new_ratings(conn, test_id, result_name="lss", after_id=0):
+    """Return (response id, rater, trial id, rating) of responses inserted after a response id."""
+    return conn.execute(
+        "SELECT r.id, s.rater, t.trial_id, r.rating FROM sessions s "
+        "JOIN trials t ON t.session_id = s.id JOIN responses r ON r.trial_row_id = t.id "
+        "WHERE s.test_id = ? AND t.result_name = ? AND r.id > ? ORDER BY r.id",
+        (test_id, result_name, after_id)).fetchall()
+
+
+def read_ratings(path, test_id, result_name="lss"):
+    """Read ratings for analysis.
+
+    Returns:
+        DataFrame: Columns name, trial_id, stimuli, stimuli_rating and rating_time
+            with the same types as results_store.read_results().
+
+    """
+    import pandas as pd
+
+    conn = connect(path, readonly=True)
+    df = pd.read_sql_query(
+        "SELECT s.rater AS name, t.trial_id, r.stimulus AS stimuli, r.rating AS stimuli_rating, "
+        "r.time AS rating_time FROM sessions s "
+        "JOIN trials t ON t.session_id = s.id JOIN responses r ON r.trial_row_id = t.id "
+        "WHERE s.test_id = ? AND t.result_name = ? ORDER BY s.id, t.id, r.id",
+        conn, params=(test_id, result_name))
+    conn.close()
+    for column in ["name", "trial_id", "stimuli"]:
+        df[column] = df[column].astype("category")
+    df["stimuli_rating"] = df["stimuli_rating"].astype("Int8")
+    return df
+
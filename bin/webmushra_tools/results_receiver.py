@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+
+"""Asynchronous drop-in for service/write.php.
+
+Accepts the same `sessionJSON` POST as write.php and appends the same csv rows
+to <results_dir>/<testId>/<type>.csv (see results_writer.py). All writes to a
+file go through a single writer task, which batches the rows of concurrent
+sessions and appends them with one write call per batch, so rows of different
+sessions never interleave and the header is written exactly once. A session
+is acknowledged after its rows are written.
+
+With --backend sqlite, sessions are inserted into a sqlite database instead
+(see results_db.py), from which the csv files can be exported.
+
+Point `remoteService` of the config to the receiver, e.g.
+
+    remoteService: http://localhost:8889/service/write.php
+
+"""
+
+import abc
+import argparse
+import asyncio
+import fcntl
+import json
+import os
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from . import results_db
+
+from .results_writer import format_csv_row, sanitize, session_rows
+
+
+class BatchWriter(abc.ABC):
+    """Single writer task which flushes queued items in batches.
+
+    Subclasses implement flush.
+
+    Args:
+        batch_size (int): Flush when this many rows are pending.
+        flush_interval (float): Flush pending rows at least this often in seconds.
+
+    """
+
+    def __init__(self, batch_size=1000, flush_interval=0.05):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = asyncio.Queue()
+        self.task = asyncio.ensure_future(self.run())
+
+    async def write(self, item, num_rows):
+        """Queue an item and wait until it is written."""
+        done = asyncio.get_running_loop().create_future()
+        await self.queue.put((item, num_rows, done))
+        await done
+
+    async def run(self):
+        while True:
+            batch = [await self.queue.get()]
+            num_rows = batch[0][1]
+            deadline = time.monotonic() + self.flush_interval
+            while num_rows < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+                num_rows += batch[-1][1]
+            try:
+                await self.flush([item for item, _, _ in batch])
+            except Exception as e:
+                for _, _, done in batch:
+                    done.set_exception(e)
+            else:
+                for _, _, done in batch:
+                    done.set_result(None)
+
+    @abc.abstractmethod
+    async def flush(self, items):
+        """Write a batch of items."""
+
+
+class CsvWriter(BatchWriter):
+    """Single writer of a result csv. Items are (header, rows).
+
+    The file is locked and appended in a worker thread, so that the event loop
+    keeps accepting submissions while another process holds the lock.
+
+    """
+
+    def __init__(self, path, batch_size=1000, flush_interval=0.05):
+        self.path = path
+        super().__init__(batch_size, flush_interval)
+
+    def append(self, items):
+        fd = os.open(self.path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            # exclude other receivers appending to the same file. write.php does not take this lock,
+            # so it must not write to the same results directory at the same time.
+            fcntl.flock(fd, fcntl.LOCK_EX)
+            lines = []
+            if os.fstat(fd).st_size == 0:
+                lines.append(format_csv_row(items[0][0]))
+            for _, rows in items:
+                lines.extend(format_csv_row(row) for row in rows)
+            data = "".join(lines).encode("utf-8")
+            while data:
+                data = data[os.write(fd, data):]
+        finally:
+            os.close(fd)
+
+    async def flush(self, items):
+        await asyncio.get_running_loop().run_in_executor(None, self.append, items)
+
+
+class SqliteWriter(BatchWriter):
+    """Single writer of the results database (see results_db.py). Items are sessions.
+
+    Each session is inserted in its own transaction in a worker thread,
+    so that the event loop keeps accepting submissions.
+
+    """
+
+    def __init__(self, path, batch_size=1000, flush_interval=0.05):
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.conn = self.executor.submit(results_db.connect, path).result()
+        super().__init__(batch_size, flush_interval)
+
+    def insert(self, sessions):
+        for session in sessions:
+            results_db.insert_session(self.conn, session)
+
+    async def flush(self, items):
+        await asyncio.get_running_loop().run_in_executor(self.executor, self.insert, items)
+
+
+class Receiver(object):
+    """Route sessions to the writers of their result files."""
+
+    def __init__(self, results_dir, batch_size=1000, flush_interval=0.05, db_path=None):
+        self.results_dir = results_dir
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.db_path = db_path
+        self.writers = {}
+        self.num_sessions = 0
+        self.num_rows = 0
+
+    def writer(self, path):
+        if path not in self.writers:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            writer_class = SqliteWriter if path == self.db_path else CsvWriter
+            self.writers[path] = writer_class(path, self.batch_size, self.flush_interval)
+        return self.writers[path]
+
+    async def receive(self, session):
+        if self.db_path is not None:
+            num_rows = sum(len(rows) for _, rows in session_rows(session).values())
+            await self.writer(self.db_path).write(session, num_rows)
+            self.num_rows += num_rows
+            self.num_sessions += 1
+            return
+        test_dir = os.path.join(self.results_dir, sanitize(str(session.get("testId", ""))))
+        os.makedirs(test_dir, exist_ok=True)
+        writes = []
+        for result_name, (header, rows) in session_rows(session).items():
+            writes.append(self.writer(os.path.join(test_dir, f"{result_name}.csv")).write((header, rows), len(rows)))
+            self.num_rows += len(rows)
+        await asyncio.gather(*writes)
+        self.num_sessions += 1
+
+
+async def read_request(reader, max_body_bytes):
+    """Read a http request. Returns method, path and body."""
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    method, path, _ = request_line.decode("latin-1").split(" ", 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in [b"\r\n", b"\n", b""]:
+            break
+        key, _, value = line.decode("latin-1").partition(":")
+        headers[key.strip().lower()] = value.strip()
+    length = int(headers.get("content-length", 0))
+    if length > max_body_bytes:
+        raise ValueError(f"request body is too large ({length} bytes).")
+    body = await reader.readexactly(length) if length > 0 else b""
+    return method, path, body
+
+
+def make_response(status, body=b"", content_type="text/plain; charset=utf-8", headers=None):
+    reason = {200: "OK", 204: "No Content", 302: "Found", 400: "Bad Request", 404: "Not Found",
+              500: "Internal Server Error"}[status]
+    extra = "".join(f"{key}: {value}\r\n" for key, value in (headers or {}).items())
+    head = (f"HTTP/1.1 {status} {reason}\r\n"
+            "Access-Control-Allow-Origin: *\r\n"
+            "Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n"
+            "Access-Control-Allow-Headers: Content-Type\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"{extra}"
+            "Connection: close\r\n\r\n")
+    return head.encode("latin-1") + body
+
+
+def handler(receiver, max_body_bytes):
+    async def handle(reader, writer):
+        try:
+            request = await read_request(reader, max_body_bytes)
+            if request is None:
+                writer.close()
+                return
+            method, _, body = request
+            if method == "OPTIONS":
+                response = make_response(204)
+            elif method != "POST":
+                response = make_response(400, b"only POST is supported.")
+            else:
+                # DataSender.js does not url-encode the json, php parses it as a form anyway
+                params = parse_qs(body.decode("utf-8"), keep_blank_values=True)
+                session = json.loads(params["sessionJSON"][0])
+                await receiver.receive(session)
+                # an empty body tells DataSender.js that the results were written
+                response = make_response(200)
+        except (ValueError, KeyError, IndexError, asyncio.IncompleteReadError) as e:
+            response = make_response(400, str(e).encode("utf-8"))
+        except (AttributeError, TypeError) as e:
+            # valid json of another shape, e.g. the participant as a list
+            response = make_response(400, f"unexpected session: {e}".encode("utf-8"))
+        except OSError as e:
+            response = make_response(500, str(e).encode("utf-8"))
+        try:
+            writer.write(response)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+    return handle
+
+
+async def log_progress(receiver, interval):
+    while True:
+        await asyncio.sleep(interval)
+        print(f"received {receiver.num_sessions} sessions ({receiver.num_rows} rows).")
+
+
+async def serve(host, port, receiver, max_body_bytes, log_interval=0.0):
+    server = await asyncio.start_server(handler(receiver, max_body_bytes), host, port, backlog=1024)
+    print(f"receiving results on http://{host}:{port}/ into {receiver.db_path or receiver.results_dir}.")
+    async with server:
+        if log_interval > 0:
+            # keep a reference, so that the task is not garbage collected
+            progress = asyncio.ensure_future(log_progress(receiver, log_interval))
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="0.0.0.0", type=str)
+    parser.add_argument("--port", default=8889, type=int)
+    parser.add_argument("--batch_size", default=1000, type=int,
+                        help="flush a file when this many rows are pending.")
+    parser.add_argument("--flush_interval", default=0.05, type=float,
+                        help="flush pending rows at least this often in seconds.")
+    parser.add_argument("--max_body_bytes", default=16 * 2 ** 20, type=int)
+    parser.add_argument("--log_interval", default=60.0, type=float,
+                        help="print the number of received sessions this often in seconds (0 to disable).")
+    parser.add_argument("--results_dir", default="results", type=str,
+                        help="same directory as write.php writes to.")
+    parser.add_argument("--backend", default="csv", choices=["csv", "sqlite"],
+                        help="append to csv files like write.php, or insert into a sqlite database.")
+    parser.add_argument("--db", default=None, type=str,
+                        help="sqlite database of --backend sqlite. defaults to <results_dir>/results.db.")
+    args = parser.parse_args()
+
+    db_path = None
+    if args.backend == "sqlite":
+        os.makedirs(args.results_dir, exist_ok=True)
+        db_path = args.db or os.path.join(args.results_dir, "results.db")
+    receiver = Receiver(args.results_dir, args.batch_size, args.flush_interval, db_path)
+    try:
+        asyncio.run(serve(args.host, args.port, receiver, args.max_body_bytes, args.log_interval))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+
+"""Columnar store of the results written by service/write.php.
+
+The store is a directory with one parquet dataset per result type:
+
+    <store_dir>/
+        ingest_state.json   # byte offset, size and header of each ingested csv
+        lss/part-<offset>.parquet
+        mushra/part-<offset>.parquet
+        ...
+
+Each part holds the rows appended to <results_dir>/<type>.csv starting at
+<offset>. Ratings are stored as nullable int8 and string columns (trial, rater,
+stimulus, ...) as categoricals. See ingest_results.py.
+
+"""
+
+import csv
+import io
+import json
+import os
+import sys
+
+# csv files written by service/write.php
+RESULT_TYPES = [
+    "mushra",
+    "paired_comparison",
+    "bs1116",
+    "lms",
+    "lss",
+    "spatial_localization",
+    "spatial_asw",
+    "spatial_hwd",
+    "spatial_lev",
+]
+
+# integer rating columns, written as e.g. " 4 " (or " NA " if not rated) by write.php
+RATING_COLUMNS = {
+    "mushra": ["rating_score"],
+    "lms": ["stimuli_rating"],
+    "lss": ["stimuli_rating"],
+}
+
+# other numeric columns, stored as float64. all remaining columns are categoricals.
+NUMERIC_COLUMNS = [
+    "rating_time",
+    "choice_time",
+    "rating_reference_score",
+    "rating_non_reference_score",
+    "height",
+    "depth",
+]
+NUMERIC_COLUMN_PREFIXES = ["position_"]
+
+STATE_FILENAME = "ingest_state.json"
+
+
+def default_store_dir(results_dir):
+    """Return default store directory of results directory."""
+    return os.path.join(results_dir, "store")
+
+
+def load_state(store_dir):
+    """Load the ingest state of a store, {result_type: {"offset", "header"}}."""
+    path = os.path.join(store_dir, STATE_FILENAME)
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def pending_rows(csv_path, state):
+    """Read the complete rows appended to a csv since it was ingested.
+
+    Args:
+        csv_path (str): Result csv.
+        state (dict): Ingest state of the csv (see ingest_results.ingest).
+
+    Returns:
+        bytes: Rows not in the store yet (empty if the store is up to date),
+            or None if the csv was truncated or rewritten since the ingest.
+
+    """
+    if not os.path.exists(csv_path):
+        return b""
+    offset = state.get("offset", 0)
+    with open(csv_path, "rb") as f:
+        header = f.readline().decode("utf-8")
+        if os.fstat(f.fileno()).st_size < offset or header != state.get("header"):
+            return None
+        f.seek(offset)
+        data = f.read()
+    return data[:data.rfind(b"\n") + 1]
+
+
+def convert_types(df, result_type):
+    """Convert columns of raw csv rows to the store schema.
+
+    Args:
+        df (DataFrame): Rows read as strings.
+        result_type (str): One of RESULT_TYPES.
+
+    Returns:
+        DataFrame: Rows with int8 ratings (<NA> if not rated), numeric and categorical columns.
+
+    """
+    import pandas as pd
+
+    df = df.copy()
+    for column in df.columns:
+        if column in RATING_COLUMNS.get(result_type, []):
+            df[column] = pd.to_numeric(df[column].str.strip(), errors="coerce").astype("Int8")
+        elif column in NUMERIC_COLUMNS or column.startswith(tuple(NUMERIC_COLUMN_PREFIXES)):
+            df[column] = pd.to_numeric(df[column], errors="coerce").astype("float64")
+        else:
+            df[column] = df[column].astype("category")
+    return df
+
+
+def read_results(results_dir, result_type="lss", columns=None, store_dir=None):
+    """Read results from the store if it exists, otherwise from the csv.
+
+    Rows appended to the csv since the last ingest are read from the csv and
+    appended to the store. If the csv was rewritten since, the store is
+    ignored with a warning.
+
+    Args:
+        results_dir (str): Directory written by write.php, e.g. results/<testId>.
+        result_type (str): One of RESULT_TYPES.
+        columns (list): Columns to read. If None, all columns are read.
+        store_dir (str): Store directory. Defaults to <results_dir>/store.
+
+    Returns:
+        DataFrame: Results.
+
+    """
+    import pandas as pd
+
+    store_dir = store_dir or default_store_dir(results_dir)
+    dataset_dir = os.path.join(store_dir, result_type)
+    csv_path = os.path.join(results_dir, f"{result_type}.csv")
+    if os.path.isdir(dataset_dir) and any(f.endswith(".parquet") for f in os.listdir(dataset_dir)):
+        state = load_state(store_dir).get(result_type, {})
+        data = pending_rows(csv_path, state)
+        if data == b"":
+            return pd.read_parquet(dataset_dir, columns=columns)
+        if data is not None:
+            df = pd.read_parquet(dataset_dir, columns=columns)
+            names = next(csv.reader([state["header"]]))
+            tail = pd.read_csv(io.BytesIO(data), header=None, names=names, usecols=columns, dtype=str,
+                               keep_default_na=False)
+            tail = convert_types(tail, result_type)[list(df.columns)]
+            # categoricals of different categories are concatenated as objects
+            categorical = [column for column in df.columns if isinstance(df[column].dtype, pd.CategoricalDtype)]
+            df = pd.concat([df, tail], ignore_index=True)
+            return df.astype({column: "category" for column in categorical})
+        print(f"{csv_path} was rewritten since it was ingested into {store_dir}, reading the csv instead. "
+              "run ingest to update the store.", file=sys.stderr)
+    df = pd.read_csv(csv_path, usecols=columns, dtype=str, keep_default_na=False)
+    return convert_types(df, result_type)
@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+"""Convert webMUSHRA sessions to the csv rows written by service/write.php.
+
+A session is the json posted by DataSender.js as `sessionJSON`. Its trials are
+routed to the result files in a single pass:
+
+    mushra                  -> mushra.csv
+    paired_comparison       -> paired_comparison.csv
+    bs1116                  -> bs1116.csv
+    likert_multi_stimulus   -> lms.csv
+    likert_single_stimulus  -> lss.csv
+    localization            -> spatial_localization.csv
+    asw                     -> spatial_asw.csv
+    hwd                     -> spatial_hwd.csv
+    lev                     -> spatial_lev.csv
+
+Each row starts with the test id and the participant responses, followed by
+the columns below. Lines are formatted like php's fputcsv, so files written by
+write.php and by results_receiver.py can be mixed.
+
+"""
+
+import re
+
+POSITION_COLUMNS = ["outerRight", "innerRight", "innerLeft", "outerLeft"]
+
+
+def _positions(response, names):
+    return [response.get(f"position_{name}", [None] * 3)[i] for name in names for i in range(3)]
+
+
+def _position_columns(names):
+    return [f"position_{name}_{axis}" for name in names for axis in "xyz"]
+
+
+# trial type -> (result name, columns after the participant columns, response -> values)
+RESULT_LAYOUTS = {
+    "mushra": (
+        "mushra",
+        ["trial_id", "rating_stimulus", "rating_score", "rating_time", "rating_comment"],
+        lambda r: [r.get("stimulus"), r.get("score"), r.get("time"), r.get("comment")],
+    ),
+    "paired_comparison": (
+        "paired_comparison",
+        ["trial_id", "choice_reference", "choice_non_reference", "choice_answer", "choice_time", "choice_comment"],
+        lambda r: [r.get("reference"), r.get("nonReference"), r.get("answer"), r.get("time"), r.get("comment")],
+    ),
+    "bs1116": (
+        "bs1116",
+        ["trial_id", "rating_reference", "rating_non_reference", "rating_reference_score",
+         "rating_non_reference_score", "rating_time", "choice_comment"],
+        lambda r: [r.get("reference"), r.get("nonReference"), r.get("referenceScore"), r.get("nonReferenceScore"),
+                   r.get("time"), r.get("comment")],
+    ),
+    "likert_multi_stimulus": (
+        "lms",
+        ["trial_id", "stimuli_rating", "stimuli", "rating_time"],
+        lambda r: [f" {php_str(r.get('stimulusRating'))} ", r.get("stimulus"), r.get("time")],
+    ),
+    "likert_single_stimulus": (
+        "lss",
+        ["trial_id", "stimuli_rating", "stimuli", "rating_time"],
+        lambda r: [f" {php_str(r.get('stimulusRating'))} ", r.get("stimulus"), r.get("time")],
+    ),
+    "localization": (
+        "spatial_localization",
+        ["trial_id", "name", "stimulus", "position_x", "position_y", "position_z"],
+        lambda r: [r.get("name"), r.get("stimulus")] + list(r.get("position", [None] * 3)[:3]),
+    ),
+    "asw": (
+        "spatial_asw",
+        ["trial_id", "name", "stimulus"] + _position_columns(POSITION_COLUMNS),
+        lambda r: [r.get("name"), r.get("stimulus")] + _positions(r, POSITION_COLUMNS),
+    ),
+    "hwd": (
+        "spatial_hwd",
+        ["trial_id", "name", "stimulus"] + _position_columns(POSITION_COLUMNS) + ["height", "depth"],
+        lambda r: [r.get("name"), r.get("stimulus")] + _positions(r, POSITION_COLUMNS)
+        + [r.get("height"), r.get("depth")],
+    ),
+    "lev": (
+        "spatial_lev",
+        ["trial_id", "name", "stimulus"] + _position_columns(["center", "height", "width1", "width2"]),
+        lambda r: [r.get("name"), r.get("stimulus")] + _positions(r, ["center", "height", "width1", "width2"]),
+    ),
+}
+
+
+def sanitize(string):
+    """Same as sanitize() of write.php, used for the results directory name."""
+    string = re.sub(r"[^\w\-]+", "-", string)
+    return re.sub(r"--+", "-", string).lower()
+
+
+def php_str(value):
+    """Convert a json value to string like php."""
+    if value is None or value is False:
+        return ""
+    if value is True:
+        return "1"
+    if isinstance(value, float):
+        if value.is_integer() and abs(value) < 1e15:
+            return str(int(value))
+        s = "%.14G" % value
+        if "E" in s:
+            mantissa, exponent = s.split("E")
+            s = f"{mantissa if '.' in mantissa else mantissa + '.0'}E{exponent}"
+        return s
+    if isinstance(value, (list, dict)):
+        return "Array"
+    return str(value)
+
+
+def format_csv_field(value):
+    """Format a field like php's fputcsv (delimiter ",", enclosure '"', escape "\\")."""
+    field = php_str(value)
+    if any(c in field for c in ',"\\\n\r\t '):
+        out = ['"']
+        escaped = False
+        for c in field:
+            if c == "\\":
+                escaped = True
+            elif not escaped and c == '"':
+                out.append('"')
+            else:
+                escaped = False
+            out.append(c)
+        out.append('"')
+        field = "".join(out)
+    return field
+
+
+def format_csv_row(row):
+    """Format a row like php's fputcsv (delimiter ",", enclosure '"', escape "\\")."""
+    return ",".join(format_csv_field(value) for value in row) + "\n"
+
+
+def session_rows(session):
+    """Route the trials of a session to result files.
+
+    Args:
+        session (dict): Decoded sessionJSON.
+
+    Returns:
+        dict: Map from result name (e.g. "lss") to (header, rows). Only results
+            with at least one row are included.
+
+    """
+    participant = session.get("participant", {})
+    names = participant.get("name", [])
+    responses = participant.get("response", [])
+    prefix = [session.get("testId")] + [responses[i] if i < len(responses) else None for i in range(len(names))]
+    results = {}
+    for trial in session.get("trials", []):
+        if trial.get("type") not in RESULT_LAYOUTS:
+            continue
+        result_name, columns, values = RESULT_LAYOUTS[trial["type"]]
+        responses = trial.get("responses", [])
+        if not responses:
+            continue
+        if result_name not in results:
+            results[result_name] = (["session_test_id"] + names + columns, [])
+        rows = results[result_name][1]
+        for response in responses:
+            rows.append(prefix + [trial.get("id")] + values(response))
+    return results
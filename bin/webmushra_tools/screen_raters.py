@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+
+"""Screen raters and write a rater report and a cleaned dataset.
+
+See rater_screening.py for the rules. The cleaned lss.csv has the layout of
+write.php, so summarize_results.py and compare_systems.py read it as is.
+
+    $ ./bin/screen_raters.py --rules gt_low,too_fast --wav_dirs samples_stereo_subset --report raters.csv \
+        results/<testId> results/<testId>_cleaned
+
+"""
+
+import argparse
+import os
+import time
+
+from .rater_screening import DEFAULT_PARAMS, RULES, read_durations, screen_raters, write_cleaned
+from .results_store import read_results
+from .trial_table import join_trials, read_trial_tables
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rules", default=",".join(RULES), type=str,
+                        help=f"comma-separated rules to apply, of {','.join(RULES)}.")
+    parser.add_argument("--gt_method", default="ground_truth", type=str,
+                        help="substring of the ground truth methods (gt_low).")
+    parser.add_argument("--gt_thres", default=DEFAULT_PARAMS["gt_thres"], type=int,
+                        help="ground truth ratings <= gt_thres are counted as low (gt_low).")
+    parser.add_argument("--num_acceptable_utts", default=DEFAULT_PARAMS["num_acceptable_utts"], type=int,
+                        help="raters with more low ground truth ratings are removed (gt_low).")
+    parser.add_argument("--min_ratings", default=DEFAULT_PARAMS["min_ratings"], type=int,
+                        help="raters with fewer ratings are not checked (constant, consensus).")
+    parser.add_argument("--wav_dirs", default=None, nargs="+", type=str,
+                        help="directories of the rated wav files to read the durations from (too_fast).")
+    parser.add_argument("--min_time_ratio", default=DEFAULT_PARAMS["min_time_ratio"], type=float,
+                        help="ratings given in less than this ratio of the duration are fast (too_fast).")
+    parser.add_argument("--max_fast_fraction", default=DEFAULT_PARAMS["max_fast_fraction"], type=float,
+                        help="raters with a larger fraction of fast ratings are removed (too_fast).")
+    parser.add_argument("--min_consensus_corr", default=DEFAULT_PARAMS["min_consensus_corr"], type=float,
+                        help="raters with lower correlation to the other raters are removed (consensus).")
+    parser.add_argument("--trial_tables", default=None, nargs="+", type=str,
+                        help="<config>.trials.csv to find the ground truth trials by their system.")
+    parser.add_argument("--report", default=None, type=str, help="rater report csv.")
+    parser.add_argument("results_dir", type=str, help="directory of lss.csv (and the store of ingest_results.py).")
+    parser.add_argument("output_dir", nargs="?", default=None, type=str,
+                        help="directory to write the cleaned lss.csv to.")
+    args = parser.parse_args()
+    rules = [rule for rule in args.rules.split(",") if rule]
+    unknown = [rule for rule in rules if rule not in RULES]
+    if unknown:
+        parser.error(f"unknown rules {', '.join(unknown)} (choose from {', '.join(RULES)}).")
+
+    start = time.perf_counter()
+    result = read_results(os.path.expanduser(args.results_dir))
+    if args.trial_tables is not None:
+        systems = join_trials(result["trial_id"], read_trial_tables(args.trial_tables))
+        gt_mask = systems.isin([m for m in systems.cat.categories if args.gt_method in m])
+    else:
+        trial_ids = result["trial_id"].astype("category").cat.categories
+        gt_mask = result["trial_id"].isin(trial_ids[trial_ids.str.contains(args.gt_method, regex=False)])
+    durations = None
+    if "too_fast" in rules:
+        if args.wav_dirs is None:
+            print("too_fast is skipped since --wav_dirs is not given.")
+        else:
+            durations = read_durations(args.wav_dirs)
+            print(f"read durations of {len(durations)} wav files.")
+
+    params = {name: getattr(args, name) for name in DEFAULT_PARAMS}
+    report = screen_raters(result, gt_mask, durations, rules, **params)
+    elapsed = time.perf_counter() - start
+    print(f"screened {len(report)} raters ({len(result)} ratings) in {elapsed:.2f} sec "
+          f"({len(report) / elapsed:.1f} raters/sec).")
+    for rule in RULES:
+        if rule in report.columns:
+            print(f"{rule}: {int(report[rule].sum())} raters")
+    print(f"{int(report['removed'].sum())} of {len(report)} raters are removed.")
+
+    if args.report is not None:
+        report.to_csv(args.report)
+    if args.output_dir is not None:
+        path = os.path.join(args.output_dir, "lss.csv")
+        num_rows = write_cleaned(result, report, path)
+        print(f"wrote {num_rows} ratings to {path}.")
+
+
+if __name__ == "__main__":
+    main()
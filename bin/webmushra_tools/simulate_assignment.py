@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+
+"""Simulate a worker population to compare assignment policies.
+
+Synthetic configs of systems with different true MOS and rating noise are
+rated by simulated workers (each with their own bias) until the confidence
+intervals of all systems are narrower than the target width:
+
+    adaptive    the next config is chosen by SubsetAssigner (assignment_service.py)
+    blind       configs are handed out in turn, as with fixed subsets
+
+For each policy the number of HITs and the ratings per system are printed,
+and the ratings of systems which were already closed are counted as wasted.
+
+"""
+
+import argparse
+
+import numpy as np
+
+from .subset_assigner import SubsetAssigner
+
+
+def make_configs(num_systems, num_configs, num_trials, systems_per_config, seed=0):
+    """Make configs of num_trials trials of each of systems_per_config systems.
+
+    Returns:
+        dict: Map from config name to list of (trial id, system).
+
+    """
+    rng = np.random.default_rng(seed)
+    systems = [f"system_{i}" for i in range(num_systems)]
+    configs = {}
+    for c in range(num_configs):
+        chosen = sorted(rng.choice(num_systems, systems_per_config, replace=False))
+        configs[f"subset_{c}.yaml"] = [(f"method_a_{systems[s]}_{c:03d}{t:03d}.wav", systems[s])
+                                       for s in chosen for t in range(num_trials)]
+    return configs
+
+
+def simulate(configs, policy, true_means, noise, rater_bias, num_workers, max_hits, seed=0, **kwargs):
+    """Run a simulation.
+
+    Args:
+        configs (dict): Map from config name to list of (trial id, system).
+        policy (str): "adaptive" or "blind".
+        true_means (dict): True MOS of each system.
+        noise (dict): Standard deviation of the ratings of each system.
+        rater_bias (float): Standard deviation of the bias of workers.
+        num_workers (int): Size of the worker population.
+        max_hits (int): HITs after which the simulation gives up.
+        **kwargs: Passed to SubsetAssigner.
+
+    Returns:
+        dict: Number of HITs, ratings, wasted ratings and the final assigner.
+
+    """
+    rng = np.random.default_rng(seed)
+    bias = rng.normal(0, rater_bias, num_workers)
+    assigner = SubsetAssigner(configs, **kwargs)
+    names = list(configs)
+    turn = 0
+    num_hits = num_ratings = num_wasted = 0
+    while assigner.open_systems() and num_hits < max_hits:
+        worker = int(rng.integers(num_workers))
+        if policy == "adaptive":
+            config = assigner.next_config(f"worker{worker}", now=num_hits)
+        else:
+            done = assigner.worker_configs.get(f"worker{worker}", set())
+            config = None
+            for i in range(len(names)):
+                if names[(turn + i) % len(names)] not in done:
+                    config = names[(turn + i) % len(names)]
+                    turn = (turn + i + 1) % len(names)
+                    break
+        if config is None:
+            # this worker has done everything useful
+            continue
+        open_systems = set(assigner.open_systems())
+        for trial_id, system in configs[config]:
+            rating = true_means[system] + bias[worker] + rng.normal(0, noise[system])
+            rating = int(np.clip(np.round(rating), 1, 5))
+            num_wasted += system not in open_systems
+            assigner.add_rating(f"worker{worker}", trial_id, rating)
+        num_ratings += len(configs[config])
+        num_hits += 1
+    return {"hits": num_hits, "ratings": num_ratings, "wasted": num_wasted, "assigner": assigner,
+            "finished": not assigner.open_systems()}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--num_systems", default=6, type=int)
+    parser.add_argument("--num_configs", default=40, type=int)
+    parser.add_argument("--num_trials", default=4, type=int, help="number of trials of each system in a config.")
+    parser.add_argument("--systems_per_config", default=3, type=int)
+    parser.add_argument("--num_workers", default=300, type=int)
+    parser.add_argument("--rater_bias", default=0.3, type=float, help="standard deviation of the worker bias.")
+    parser.add_argument("--target_width", default=0.2, type=float)
+    parser.add_argument("--confidence", default=0.95, type=float)
+    parser.add_argument("--min_ratings", default=30, type=int)
+    parser.add_argument("--max_hits", default=20000, type=int)
+    parser.add_argument("--seed", default=0, type=int)
+    args = parser.parse_args()
+
+    configs = make_configs(args.num_systems, args.num_configs, args.num_trials, args.systems_per_config, args.seed)
+    systems = [f"system_{i}" for i in range(args.num_systems)]
+    # good systems are rated consistently, bad ones are not
+    true_means = dict(zip(systems, np.linspace(4.3, 2.0, args.num_systems)))
+    noise = dict(zip(systems, np.linspace(0.5, 1.3, args.num_systems)))
+
+    results = {}
+    for policy in ["adaptive", "blind"]:
+        result = simulate(configs, policy, true_means, noise, args.rater_bias, args.num_workers, args.max_hits,
+                          args.seed, target_width=args.target_width, level=args.confidence,
+                          min_ratings=args.min_ratings)
+        results[policy] = result
+        status = "" if result["finished"] else f" (not finished after {args.max_hits} HITs)"
+        print(f"{policy}: {result['hits']} HITs, {result['ratings']} ratings, "
+              f"{result['wasted']} ratings of closed systems{status}.")
+        for system, stats in result["assigner"].summary()["systems"].items():
+            print(f"    {system}: n={stats['n']} mean={stats['mean']:.3f} (true {true_means[system]:.3f}) "
+                  f"width={2 * stats['confidence']:.3f}")
+    if results["adaptive"]["finished"] and results["blind"]["finished"]:
+        print(f"adaptive assignment needs {results['adaptive']['hits'] / results['blind']['hits']:.1%} "
+              f"of the HITs of blind assignment.")
+
+
+if __name__ == "__main__":
+    main()
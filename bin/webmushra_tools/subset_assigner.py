@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+"""Adaptive assignment of subset configs to workers.
+
+Each config (one per subset, see batch_generate_config.py) is described by its
+trial table <config>.trials.csv. Given the ratings received so far, the next
+config for a worker is
+
+    - one the worker has not been assigned before,
+    - with the most trials of open systems, i.e. systems whose confidence
+      interval is still wider than the target width (or which have fewer than
+      min_ratings ratings),
+    - among those, the least rated one, counting the ratings expected from
+      configs which are assigned but not submitted yet.
+
+When all systems are closed, no more configs are handed out.
+
+A trial may be in several configs (e.g. the same subset with different seeds),
+and the results only carry its trial id. Its rating is counted for the config
+leased to the worker, otherwise for a config the worker was assigned before.
+
+"""
+
+import csv
+import os
+import time
+
+from .monitor_results import RunningStats
+from .trial_table import TRIAL_TABLE_EXTENSION
+
+
+def read_configs(trial_table_paths):
+    """Read trial tables.
+
+    Args:
+        trial_table_paths (list): <config>.trials.csv paths.
+
+    Returns:
+        dict: Map from config file name (e.g. naturalness_MOS_sample_subset_0.yaml)
+            to the list of (trial id, system) of its rating pages.
+
+    """
+    configs = {}
+    for path in sorted(trial_table_paths):
+        name = os.path.basename(path)[:-len(TRIAL_TABLE_EXTENSION)] + "yaml"
+        with open(path, newline="") as f:
+            configs[name] = [(row["trial_id"], row["system"]) for row in csv.DictReader(f)]
+    return configs
+
+
+class SubsetAssigner(object):
+    """Assign configs to workers and track the ratings of systems.
+
+    Args:
+        configs (dict): Map from config name to list of (trial id, system).
+        target_width (float): Systems whose interval is narrower are closed.
+        level (float): Confidence level of the interval.
+        min_ratings (int): Systems with fewer ratings are always open.
+        lease_seconds (float): Assignments which are not submitted within this
+            time are given up and no longer counted as expected ratings.
+
+    """
+
+    def __init__(self, configs, target_width=0.2, level=0.95, min_ratings=30, lease_seconds=3600):
+        self.configs = configs
+        self.target_width = target_width
+        self.level = level
+        self.min_ratings = min_ratings
+        self.lease_seconds = lease_seconds
+
+        self.trial_configs = {}
+        self.trial_system = {}
+        self.config_systems = {}
+        for name, trials in configs.items():
+            for trial_id, system in trials:
+                self.trial_configs.setdefault(trial_id, []).append(name)
+                self.trial_system[name, trial_id] = system
+            self.config_systems[name] = {}
+            for _, system in trials:
+                self.config_systems[name][system] = self.config_systems[name].get(system, 0) + 1
+        self.worker_configs = {}
+        self.worker_last_config = {}
+        self.leases = {}
+        self.reset_ratings()
+
+    def reset_ratings(self):
+        """Forget the ratings added so far, e.g. before the results are read again from the start.
+
+        The configs assigned to the workers and the pending leases are kept.
+
+        """
+        self.system_stats = {system: RunningStats() for system in set(self.trial_system.values())}
+        self.config_ratings = {name: 0 for name in self.configs}
+
+    def config_of(self, worker, trial_id):
+        """Return the config a worker rated a trial in, or None if the trial is in no config."""
+        configs = self.trial_configs.get(trial_id)
+        if configs is None:
+            return None
+        leased = self.leases.get(worker, (None,))[0]
+        for config in [leased, self.worker_last_config.get(worker)]:
+            if config in configs:
+                return config
+        assigned = self.worker_configs.get(worker, set())
+        return next((config for config in configs if config in assigned), configs[0])
+
+    def add_rating(self, worker, trial_id, rating):
+        """Add a rating received from write.php (lss.csv or the results database)."""
+        config = self.config_of(worker, trial_id)
+        if config is None:
+            return
+        self.worker_configs.setdefault(worker, set()).add(config)
+        self.worker_last_config[worker] = config
+        if self.leases.get(worker, (None,))[0] == config:
+            del self.leases[worker]
+        if rating is None:
+            return
+        self.config_ratings[config] += 1
+        self.system_stats[self.trial_system[config, trial_id]].update(rating)
+
+    def width(self, system):
+        """Full width of the confidence interval of a system."""
+        return 2 * self.system_stats[system].confidence(self.level)
+
+    def is_open(self, system):
+        stats = self.system_stats[system]
+        return stats.n < self.min_ratings or not self.width(system) <= self.target_width
+
+    def open_systems(self):
+        return sorted(system for system in self.system_stats if self.is_open(system))
+
+    def num_open_trials(self, config, open_systems):
+        return sum(n for system, n in self.config_systems[config].items() if system in open_systems)
+
+    def next_config(self, worker, now=None):
+        """Return the config to assign to a worker, or None if no work is left."""
+        now = time.time() if now is None else now
+        for lease_worker, (_, expires) in list(self.leases.items()):
+            if expires < now:
+                del self.leases[lease_worker]
+        if worker in self.leases:
+            # same answer if the worker asks again before submitting
+            return self.leases[worker][0]
+
+        open_systems = set(self.open_systems())
+        expected = dict(self.config_ratings)
+        for config, _ in self.leases.values():
+            expected[config] += len(self.configs[config])
+        done = self.worker_configs.get(worker, set())
+        candidates = [name for name in self.configs
+                      if name not in done and self.num_open_trials(name, open_systems) > 0]
+        if not candidates:
+            return None
+        config = min(candidates, key=lambda name: (-self.num_open_trials(name, open_systems), expected[name], name))
+        self.leases[worker] = (config, now + self.lease_seconds)
+        self.worker_configs.setdefault(worker, set()).add(config)
+        return config
+
+    def summary(self):
+        return {
+            "open_systems": self.open_systems(),
+            "num_workers": len(self.worker_configs),
+            "num_pending": len(self.leases),
+            "systems": {system: dict(stats.to_dict(self.level), open=self.is_open(system))
+                        for system, stats in sorted(self.system_stats.items())},
+            "configs": dict(sorted(self.config_ratings.items())),
+        }
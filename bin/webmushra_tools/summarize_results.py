@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+
+"""Sumamrize MOS evaluation results."""
+
+import argparse
+import os
+import time
+
+from .mos_stats import extract_system, find_outlier_raters, print_summary, summarize
+from .results_db import read_ratings
+from .results_store import read_results
+from .trial_table import join_trials, read_trial_tables
+
+DEFAULT_METHODS = [
+    "ground_truth_1f1m",
+    "ground_truth_2females",
+    "ground_truth_2males",
+    "baseline_tf_1f1m",
+    "our_method_1f1m",
+    "baseline_tf_2females",
+    "our_method_2females",
+    "baseline_tf_2males",
+    "our_method_2males",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--methods", default=None, nargs="+", type=str,
+                        help="methods contained in the trial ids. with --trial_tables, "
+                             "the systems to report (default: all).")
+    parser.add_argument("--trial_tables", default=None, nargs="+", type=str,
+                        help="<config>.trials.csv written by generate_config*.py to label trials exactly.")
+    parser.add_argument("--gt_method", default="ground_truth", type=str,
+                        help="substring of the ground truth methods used to check raters.")
+    parser.add_argument("--thres", default=3, type=int,
+                        help="ground truth ratings <= thres are counted as low.")
+    parser.add_argument("--num_acceptable_utts", default=3, type=int,
+                        help="raters with more low ground truth ratings are removed.")
+    parser.add_argument("--ci", default="t", choices=["t", "bootstrap"])
+    parser.add_argument("--confidence", default=0.95, type=float)
+    parser.add_argument("--num_bootstrap", default=10000, type=int)
+    parser.add_argument("--db", default=None, type=str,
+                        help="read ratings from the database of results_receiver.py --backend sqlite.")
+    parser.add_argument("--test_id", default=None, type=str,
+                        help="test id in --db. defaults to the name of results_dir.")
+    parser.add_argument("results_dir", nargs="?", default="~/results/subjective_evalaution", type=str,
+                        help="directory of lss.csv (and the store of ingest_results.py).")
+    args = parser.parse_args()
+    if args.db is not None and not os.path.isfile(args.db):
+        parser.error(f"{args.db} does not exist.")
+
+    start = time.perf_counter()
+    if args.db is not None:
+        test_id = args.test_id or os.path.basename(os.path.normpath(args.results_dir))
+        result = read_ratings(args.db, test_id)[["name", "trial_id", "stimuli_rating"]]
+    else:
+        result = read_results(os.path.expanduser(args.results_dir), columns=["name", "trial_id", "stimuli_rating"])
+    result = result.dropna(subset=["stimuli_rating"]).reset_index(drop=True)
+    if args.trial_tables is not None:
+        # exact labels by a hash join on the trial ids
+        systems = join_trials(result["trial_id"], read_trial_tables(args.trial_tables))
+        methods = args.methods or sorted(systems.cat.categories)
+        gt_mask = systems.isin([m for m in systems.cat.categories if args.gt_method in m])
+    else:
+        methods = args.methods or DEFAULT_METHODS
+        systems = extract_system(result["trial_id"], methods)
+        trial_ids = result["trial_id"].astype("category").cat.categories
+        gt_mask = result["trial_id"].isin(trial_ids[trial_ids.str.contains(args.gt_method, regex=False)])
+
+    # check evaluator
+    removed = find_outlier_raters(result, gt_mask, args.thres, args.num_acceptable_utts)
+    for spk in removed:
+        print(f"{spk} is removed.")
+    keep = ~result["name"].isin(removed)
+
+    print(f"Number of scores = {keep.sum()}")
+    print("---------- raw results ----------")
+    print_summary(summarize(result, systems, args.ci, args.confidence, args.num_bootstrap), methods)
+    print("-------- cleaned results --------")
+    print_summary(summarize(result[keep], systems[keep], args.ci, args.confidence, args.num_bootstrap),
+                  methods)
+    print(f"summarized {len(result)} ratings in {time.perf_counter() - start:.2f} sec.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,332 @@
+# -*- coding: utf-8 -*-
+
+"""Profiling spans of the pipeline stages.
+
+Spans are written as Chrome trace events, which can be opened in
+https://ui.perfetto.dev or chrome://tracing, and compared with
+
+    $ webmushra-tools --profile before.json generate-batch ...
+    $ webmushra-tools --profile after.json generate-batch ...
+    $ webmushra-tools trace before.json after.json
+
+Tracing is enabled by `--profile <trace>` of webmushra-tools, or by the
+environment variable WEBMUSHRA_PROFILE=<trace> for the scripts in bin/.
+The variable is inherited, so the stages run as subprocesses (e.g. by
+benchmark_pipeline.py) and worker processes write to the same trace. If the
+trace ends with ".jsonl", one event is written per line, otherwise it is a
+json array. `--profile` starts a new trace, and the variable appends to it.
+
+Each span records its wall time, the CPU time and the bytes read and written
+(read() / write() calls, including the page cache, see /proc/self/io) of the
+process and of the child processes it waited for, and the number of files if
+the stage sets it. If `--profile-dir <dir>` or WEBMUSHRA_PROFILE_DIR is also
+given, each span is profiled with cProfile and dumped to
+<dir>/<pid>.<index>.<name>.prof. The profile of a span excludes the spans
+nested in it.
+
+When tracing is disabled, span() returns a shared no-op span, so the spans
+can stay in the code at no cost.
+
+"""
+
+import argparse
+import json
+import os
+import re
+import threading
+import time
+
+TRACE_ENV = "WEBMUSHRA_PROFILE"
+PROFILE_DIR_ENV = "WEBMUSHRA_PROFILE_DIR"
+
+
+def _read_io():
+    """Return bytes read and written by read() / write() calls, or None if unknown."""
+    try:
+        with open("/proc/self/io", "rb") as f:
+            counters = dict(line.split(b":") for line in f.read().splitlines())
+        return int(counters[b"rchar"]), int(counters[b"wchar"])
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def _cpu_seconds():
+    """Return CPU time of the process and of its waited children."""
+    times = os.times()
+    return time.process_time() + times.children_user + times.children_system
+
+
+class Tracer(object):
+    """Writer of trace events.
+
+    Args:
+        path (str): Path of the trace. ".jsonl" for one event per line,
+            otherwise a json array.
+        profile_dir (str): Directory of cProfile dumps. If None, spans are
+            not profiled.
+        truncate (bool): If True, start a new trace, otherwise append to it.
+
+    """
+
+    def __init__(self, path, profile_dir=None, truncate=False):
+        self.path = path
+        self.profile_dir = profile_dir
+        self.suffix = "\n" if path.endswith(".jsonl") else ",\n"
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        if profile_dir is not None:
+            os.makedirs(profile_dir, exist_ok=True)
+        flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND | (os.O_TRUNC if truncate else 0)
+        self.fd = os.open(path, flags, 0o644)
+        # the closing bracket of the array is optional in the trace event format
+        if self.suffix != "\n" and os.fstat(self.fd).st_size == 0:
+            os.write(self.fd, b"[\n")
+        self.local = threading.local()
+        self.num_profiles = 0
+
+    def write(self, event):
+        # a single write with O_APPEND, so that processes do not mix their events
+        os.write(self.fd, (json.dumps(event) + self.suffix).encode())
+
+    def stack(self):
+        """Return the stack of open spans of the current thread."""
+        if not hasattr(self.local, "stack"):
+            self.local.stack = []
+        return self.local.stack
+
+    def after_fork(self):
+        # spans of the parent are not closed in forked workers
+        for span_ in self.stack():
+            if span_.profiler is not None:
+                span_.profiler.disable()
+        self.local = threading.local()
+
+    def process_name(self, name):
+        self.write({"name": "process_name", "ph": "M", "pid": os.getpid(), "tid": 0, "args": {"name": name}})
+
+    def profile_path(self, name):
+        self.num_profiles += 1
+        name = re.sub(r"[^\w.-]+", "_", name)
+        return os.path.join(self.profile_dir, f"{os.getpid()}.{self.num_profiles:03d}.{name}.prof")
+
+
+class Span(object):
+    """Span of a stage, see span()."""
+
+    def __init__(self, tracer, name, args):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.profiler = None
+
+    def set(self, **args):
+        """Set args shown with the span, e.g. files=<number of files>."""
+        self.args.update(args)
+
+    def __enter__(self):
+        stack = self.tracer.stack()
+        if self.tracer.profile_dir is not None:
+            import cProfile
+
+            if stack and stack[-1].profiler is not None:
+                stack[-1].profiler.disable()
+            self.profiler = cProfile.Profile()
+        stack.append(self)
+        self.io = _read_io()
+        self.cpu = _cpu_seconds()
+        self.ts = time.time_ns() // 1000
+        self.start = time.perf_counter()
+        if self.profiler is not None:
+            self.profiler.enable()
+        return self
+
+    def __exit__(self, *exc):
+        if self.profiler is not None:
+            self.profiler.disable()
+        elapsed = time.perf_counter() - self.start
+        args = {"cpu_ms": round((_cpu_seconds() - self.cpu) * 1e3, 3)}
+        io = _read_io()
+        if io is not None and self.io is not None:
+            args["read_bytes"] = io[0] - self.io[0]
+            args["write_bytes"] = io[1] - self.io[1]
+        args.update(self.args)
+        if exc[0] is not None and not (exc[0] is SystemExit and exc[1].code in (None, 0)):
+            args["error"] = exc[0].__name__
+        stack = self.tracer.stack()
+        stack.pop()
+        if self.profiler is not None:
+            self.profiler.dump_stats(self.tracer.profile_path(self.name))
+            if stack and stack[-1].profiler is not None:
+                stack[-1].profiler.enable()
+        self.tracer.write({
+            "name": self.name, "cat": "stage", "ph": "X", "ts": self.ts, "dur": round(elapsed * 1e6),
+            "pid": os.getpid(), "tid": threading.get_ident() % 2 ** 31, "args": args,
+        })
+
+
+class NullSpan(object):
+    """Span which does nothing, returned while tracing is disabled."""
+
+    def set(self, **args):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+NULL_SPAN = NullSpan()
+
+_tracer = None
+
+
+def enable(path, profile_dir=None):
+    """Start a new trace, which the child processes also write to.
+
+    Args:
+        path (str): Path of the trace (see Tracer).
+        profile_dir (str): Directory of cProfile dumps, or None.
+
+    """
+    global _tracer
+    if _tracer is not None:
+        os.close(_tracer.fd)
+    _tracer = Tracer(path, profile_dir, truncate=True)
+    os.environ[TRACE_ENV] = os.path.abspath(path)
+    if profile_dir is not None:
+        os.environ[PROFILE_DIR_ENV] = os.path.abspath(profile_dir)
+
+
+def enabled():
+    return _tracer is not None
+
+
+def span(name, **args):
+    """Return a context manager which records a span of a stage.
+
+        with span("find_files", root=root_dir) as s:
+            files = ...
+            s.set(files=len(files))
+
+    Args:
+        name (str): Name of the stage.
+        **args: Values shown with the span.
+
+    Returns:
+        Span: Span, or NULL_SPAN if tracing is disabled.
+
+    """
+    if _tracer is None:
+        return NULL_SPAN
+    return Span(_tracer, name, args)
+
+
+def process_name(name):
+    """Name the current process in the trace."""
+    if _tracer is not None:
+        _tracer.process_name(name)
+
+
+def _after_fork():
+    if _tracer is not None:
+        _tracer.after_fork()
+
+
+if os.environ.get(TRACE_ENV):
+    _tracer = Tracer(os.environ[TRACE_ENV], os.environ.get(PROFILE_DIR_ENV) or None)
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_after_fork)
+
+
+def load_trace(path):
+    """Load the complete events of a trace.
+
+    Args:
+        path (str): Trace written as a json array (with or without the closing
+            bracket), a json object with "traceEvents", or json lines.
+
+    Returns:
+        list: Events whose "ph" is "X".
+
+    """
+    with open(path) as f:
+        text = f.read().strip()
+    if text.startswith("["):
+        text = text.rstrip(",")
+        events = json.loads(text if text.endswith("]") else text + "]")
+    elif text.startswith("{") and "traceEvents" in text.split("\n", 1)[0]:
+        events = json.loads(text)["traceEvents"]
+    else:
+        events = [json.loads(line) for line in text.splitlines() if line]
+    return [event for event in events if event.get("ph") == "X"]
+
+
+def summarize_trace(events):
+    """Sum the spans of each name.
+
+    Args:
+        events (list): Complete events (see load_trace).
+
+    Returns:
+        dict: Name -> dict of "count", "wall" and "cpu" in seconds,
+            "read_bytes", "write_bytes" and "files", in the order of the first span.
+
+    """
+    stages = {}
+    for event in sorted(events, key=lambda event: event["ts"]):
+        args = event.get("args", {})
+        stage = stages.setdefault(event["name"], {"count": 0, "wall": 0.0, "cpu": 0.0,
+                                                  "read_bytes": 0, "write_bytes": 0, "files": 0})
+        stage["count"] += 1
+        stage["wall"] += event["dur"] / 1e6
+        stage["cpu"] += args.get("cpu_ms", 0.0) / 1e3
+        for key in ["read_bytes", "write_bytes", "files"]:
+            value = args.get(key, 0)
+            stage[key] += value if isinstance(value, (int, float)) else 0
+    return stages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize traces written with --profile, and compare them "
+                                                 "with the first one.")
+    parser.add_argument("traces", nargs="+", help="traces written with --profile or WEBMUSHRA_PROFILE.")
+    args = parser.parse_args()
+
+    summaries = []
+    for path in args.traces:
+        try:
+            summaries.append(summarize_trace(load_trace(path)))
+        except (OSError, ValueError) as e:
+            parser.error(f"cannot read {path}: {e}")
+
+    names = []
+    for summary in summaries:
+        names.extend(name for name in summary if name not in names)
+    width = max([len(name) for name in names] + [5])
+    for path, summary in zip(args.traces, summaries):
+        print(f"{path}:")
+        print(f"  {'stage':<{width}} {'count':>7} {'wall sec':>10} {'cpu sec':>10} "
+              f"{'read MiB':>10} {'write MiB':>10} {'files':>9}")
+        for name, stage in summary.items():
+            print(f"  {name:<{width}} {stage['count']:>7} {stage['wall']:>10.3f} {stage['cpu']:>10.3f} "
+                  f"{stage['read_bytes'] / 2 ** 20:>10.1f} {stage['write_bytes'] / 2 ** 20:>10.1f} "
+                  f"{stage['files']:>9}")
+
+    if len(summaries) > 1:
+        print(f"wall time relative to {args.traces[0]}:")
+        print(f"  {'stage':<{width}} " + " ".join(f"{'#' + str(i):>10}" for i in range(1, len(summaries))))
+        for name in names:
+            base = summaries[0].get(name)
+            ratios = []
+            for summary in summaries[1:]:
+                if base is None or name not in summary or base["wall"] <= 0:
+                    ratios.append(f"{'-':>10}")
+                else:
+                    ratios.append(f"{summary[name]['wall'] / base['wall']:>9.2f}x")
+            print(f"  {name:<{width}} " + " ".join(ratios))
+
+
+if __name__ == "__main__":
+    main()
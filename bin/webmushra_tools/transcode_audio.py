@@ -0,0 +1,175 @@
+# -*- coding: utf-8 -*-
+
+"""Transcode stimuli to smaller variants which browsers can decode.
+
+For each <name>.wav under the root directory, <name>.flac (lossless) and
+optionally <name>.opus / <name>.m4a (high bitrate lossy) are written next to
+it. webMUSHRA loads the first variant listed in "audioVariants" of the config
+which the browser can play, and falls back to the wav file otherwise
+(see generate_config_en.py --audio_variants).
+
+"""
+
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import time
+
+from concurrent.futures import ProcessPoolExecutor
+
+from .file_scanner import ScanIndex, find_files
+from .manifest import Manifest
+from .tracing import span
+
+AUDIO_VARIANTS = {
+    "flac": {"extension": "flac", "mimeType": "audio/flac"},
+    "opus": {"extension": "opus", "mimeType": "audio/ogg; codecs=\"opus\""},
+    "aac": {"extension": "m4a", "mimeType": "audio/mp4; codecs=\"mp4a.40.2\""},
+}
+
+FFMPEG_CODEC_ARGS = {
+    "flac": ["-c:a", "flac", "-compression_level", "8"],
+    "opus": ["-c:a", "libopus", "-b:a", "{bitrate}"],
+    "aac": ["-c:a", "aac", "-b:a", "{bitrate}"],
+}
+
+
+def _soundfile():
+    try:
+        import soundfile
+    except ImportError:
+        return None
+    return soundfile
+
+
+def variant_path(wav_path, variant):
+    """Return path of variant of wav file."""
+    return f"{os.path.splitext(wav_path)[0]}.{AUDIO_VARIANTS[variant]['extension']}"
+
+
+def encode(wav_path, out_path, variant, bitrate="128k"):
+    """Encode a wav file.
+
+    FLAC is written with soundfile (libsndfile) if available. Otherwise, and
+    for lossy variants, ffmpeg is used.
+
+    Args:
+        wav_path (str): Input wav path.
+        out_path (str): Output path.
+        variant (str): One of AUDIO_VARIANTS.
+        bitrate (str): Bitrate of lossy variants.
+
+    Returns:
+        tuple: Variant, size of input and size of output in bytes.
+
+    """
+    sf = _soundfile()
+    if variant == "flac" and sf is not None:
+        info = sf.info(wav_path)
+        subtype = info.subtype if info.subtype in ["PCM_S8", "PCM_16", "PCM_24"] else "PCM_24"
+        data, sr = sf.read(wav_path, dtype="int32")
+        sf.write(out_path, data, sr, format="FLAC", subtype=subtype)
+    else:
+        codec_args = [arg.format(bitrate=bitrate) for arg in FFMPEG_CODEC_ARGS[variant]]
+        command = ["ffmpeg", "-nostdin", "-loglevel", "error", "-y", "-i", wav_path] + codec_args + [out_path]
+        subprocess.check_call(command)
+    return variant, os.path.getsize(wav_path), os.path.getsize(out_path)
+
+
+def decode_seconds(path):
+    """Measure the time to decode a file to PCM."""
+    sf = _soundfile()
+    start = time.perf_counter()
+    if sf is not None and os.path.splitext(path)[1] in [".wav", ".flac"]:
+        sf.read(path, dtype="float32")
+    else:
+        command = ["ffmpeg", "-nostdin", "-loglevel", "error", "-i", path, "-f", "f32le", "-"]
+        subprocess.check_call(command, stdout=subprocess.DEVNULL)
+    return time.perf_counter() - start
+
+
+def _encode(job):
+    return encode(*job)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--variants", default=["flac"], nargs="+", choices=sorted(AUDIO_VARIANTS))
+    parser.add_argument("--bitrate", default="128k", type=str,
+                        help="bitrate of lossy variants (opus, aac).")
+    parser.add_argument("--jobs", default=os.cpu_count(), type=int)
+    parser.add_argument("--num_decode_files", default=50, type=int,
+                        help="number of files per variant to measure the decode time.")
+    parser.add_argument("--report", default=None, type=str,
+                        help="write size / decode time report as json.")
+    parser.add_argument("--manifest", default=None, type=str,
+                        help="manifest json to skip files which are already up to date.")
+    parser.add_argument("--scan_index", default=None, type=str,
+                        help="json index of directory listings to speed up repeated scans.")
+    parser.add_argument("root_wav_dir", type=str)
+    args = parser.parse_args()
+
+    if _soundfile() is None or set(args.variants) != {"flac"}:
+        if shutil.which("ffmpeg") is None:
+            raise RuntimeError("ffmpeg is required to transcode to "
+                               f"{', '.join(args.variants)} (flac only needs soundfile).")
+
+    scan_index = ScanIndex(args.scan_index)
+    wav_filenames = sorted(find_files(args.root_wav_dir, index=scan_index))
+    scan_index.save()
+
+    manifest = Manifest(args.manifest)
+    jobs = []
+    for variant in args.variants:
+        params = {"bitrate": args.bitrate} if variant != "flac" else None
+        for wav_path in wav_filenames:
+            out_path = variant_path(wav_path, variant)
+            if not manifest.is_fresh(f"transcode_{variant}", out_path, [wav_path], params):
+                jobs.append((wav_path, out_path, variant, args.bitrate))
+    print(f"{len(wav_filenames) * len(args.variants) - len(jobs)} files are up to date.")
+
+    start = time.perf_counter()
+    chunksize = max(1, len(jobs) // (args.jobs * 16))
+    with span("encode", files=len(jobs)), ProcessPoolExecutor(max_workers=args.jobs) as executor:
+        list(executor.map(_encode, jobs, chunksize=chunksize))
+    elapsed = time.perf_counter() - start
+    print(f"transcoded {len(jobs)} files in {elapsed:.2f} sec "
+          f"({len(jobs) / max(elapsed, 1e-9):.1f} files/sec, {args.jobs} jobs).")
+
+    for wav_path, out_path, variant, _ in jobs:
+        params = {"bitrate": args.bitrate} if variant != "flac" else None
+        manifest.record(f"transcode_{variant}", out_path, [wav_path], params)
+    manifest.save()
+
+    # size / decode time report
+    decode_files = wav_filenames[:args.num_decode_files]
+    report = {}
+    for variant in ["wav"] + args.variants:
+        paths = wav_filenames if variant == "wav" else [variant_path(f, variant) for f in wav_filenames]
+        decode_paths = decode_files if variant == "wav" else [variant_path(f, variant) for f in decode_files]
+        num_bytes = sum(os.path.getsize(path) for path in paths)
+        decode_time = sum(decode_seconds(path) for path in decode_paths)
+        report[variant] = {
+            "num_files": len(paths),
+            "bytes": num_bytes,
+            "mean_bytes": num_bytes / max(len(paths), 1),
+            "mean_decode_ms": decode_time * 1000 / max(len(decode_paths), 1),
+        }
+    wav_bytes = max(report["wav"]["bytes"], 1)
+    print(f"{'variant':>8} {'files':>8} {'MiB':>10} {'ratio':>7} {'decode ms':>10}")
+    for variant, r in sorted(report.items(), key=lambda x: x[1]["bytes"]):
+        r["ratio"] = r["bytes"] / wav_bytes
+        print(f"{variant:>8} {r['num_files']:>8} {r['bytes'] / 2 ** 20:>10.2f} "
+              f"{r['ratio']:>7.3f} {r['mean_decode_ms']:>10.2f}")
+    smallest_first = [v for v, _ in sorted(report.items(), key=lambda x: x[1]["bytes"]) if v != "wav"]
+    print(f"use `--audio_variants {' '.join(smallest_first)}` to prefer the smallest variants.")
+
+    if args.report is not None:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
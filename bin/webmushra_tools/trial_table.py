@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+
+"""Table of the trials in a config, written next to it by generate_config*.py.
+
+<config>.yaml gets a sidecar <config>.trials.csv with one row per rating page:
+
+    trial_id     page id, which write.php stores as trial_id in the results
+    task         naturalness or similarity
+    system       model directory of the wav file (<root_wav_dir>/<model_dir>/<wav_files>)
+    utt_id       file name without extension (e.g. tacotron/p225_001.wav -> p225_001)
+    model_dir    directory of the wav file
+    subset       <i> of subset_<i> in the wav path (empty if none)
+    seed         seed of the page order
+    page_index   index of the page in the config
+    path         wav path
+
+If all wav files of a task are in a single directory, the systems can only
+be told by the file names, and the name is split at the trailing utterance
+number instead (e.g. method_a/original_0047.wav -> system original, utt_id
+0047), see split_stem.
+
+The analysis scripts join results to this table on trial_id instead of
+searching system names in the trial ids.
+
+"""
+
+import csv
+import os
+import re
+
+TRIAL_COLUMNS = ["trial_id", "task", "system", "utt_id", "model_dir", "subset", "seed", "page_index", "path"]
+TRIAL_TABLE_EXTENSION = "trials.csv"
+
+
+def trial_id(wav_path):
+    """Return the page id of wav file, e.g. method_a_original_0047.wav."""
+    wav_dir_id = os.path.basename(os.path.dirname(wav_path))
+    wav_file_id = os.path.basename(wav_path)
+    return f"{wav_dir_id}_{wav_file_id}"
+
+
+def trial_table_path(config_path):
+    """Return path of trial table of config."""
+    return f"{os.path.splitext(config_path)[0]}.{TRIAL_TABLE_EXTENSION}"
+
+
+def split_stem(wav_path):
+    """Split wav file name into system and utterance id, e.g. original_0047.wav -> (original, 0047).
+
+    This is the fallback of label_stimuli for a single directory of all
+    systems. It cannot tell a system from e.g. a speaker prefix
+    (p225_001.wav -> (p225, 001)). If the file name has no trailing number,
+    the system is the directory and the utterance id is the file name.
+
+    """
+    stem = os.path.splitext(os.path.basename(wav_path))[0]
+    m = re.match(r"(.+)_(\d+)$", stem)
+    if m is None:
+        return os.path.basename(os.path.dirname(wav_path)), stem
+    return m.group(1), m.group(2)
+
+
+def label_stimuli(wav_paths):
+    """Label wav files by system and utterance id.
+
+    In the <root_wav_dir>/<model_dir>/<wav_files> layout, the system is the
+    model directory and the utterance id is the file name without extension,
+    e.g. tacotron/p225_001.wav -> (tacotron, p225_001). If all files are in a
+    single directory, they are labeled by split_stem instead.
+
+    Args:
+        wav_paths (list): Wav paths of a task.
+
+    Returns:
+        dict: Wav path -> (system, utterance id).
+
+    """
+    if len({os.path.dirname(wav_path) for wav_path in wav_paths}) <= 1:
+        return {wav_path: split_stem(wav_path) for wav_path in wav_paths}
+    return {wav_path: (os.path.basename(os.path.dirname(wav_path)), os.path.splitext(os.path.basename(wav_path))[0])
+            for wav_path in wav_paths}
+
+
+def trial_row(wav_path, task, page_index, seed, label=None):
+    """Make a row of the trial table.
+
+    Args:
+        wav_path (str): Wav path of the page.
+        task (str): naturalness or similarity.
+        page_index (int): Index of the page in the config.
+        seed (int): Seed of the page order.
+        label (tuple): (system, utterance id) made by label_stimuli from all
+            wav paths of the task. If None, the wav path is labeled alone.
+
+    Returns:
+        dict: Row with TRIAL_COLUMNS.
+
+    """
+    model_dir = os.path.basename(os.path.dirname(wav_path))
+    system, utt_id = label if label is not None else label_stimuli([wav_path])[wav_path]
+    m = re.search(r"subset_(\d+)/", wav_path)
+    return {
+        "trial_id": trial_id(wav_path),
+        "task": task,
+        "system": system,
+        "utt_id": utt_id,
+        "model_dir": model_dir,
+        "subset": m.group(1) if m is not None else "",
+        "seed": seed,
+        "page_index": page_index,
+        "path": wav_path,
+    }
+
+
+def write_trial_table(rows, path):
+    """Write rows made by trial_row as csv."""
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=TRIAL_COLUMNS)
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def read_trial_tables(paths):
+    """Read and concatenate trial tables.
+
+    A trial id may appear in several configs (e.g. the same subset with
+    different seeds); its labels are the same, so only the first row is kept.
+
+    Args:
+        paths (list): Trial table paths.
+
+    Returns:
+        DataFrame: Trial table indexed by trial_id.
+
+    """
+    import pandas as pd
+
+    table = pd.concat([pd.read_csv(path, dtype=str, keep_default_na=False) for path in paths],
+                      ignore_index=True)
+    return table.drop_duplicates("trial_id").set_index("trial_id")
+
+
+def join_trials(trial_ids, table, column="system"):
+    """Label trials by a column of the trial table.
+
+    The lookup is a hash join on the unique trial ids, whose result is
+    broadcast to the rows through the categorical codes.
+
+    Args:
+        trial_ids (Series): Trial ids of the results.
+        table (DataFrame): Trial table (see read_trial_tables).
+        column (str): One of TRIAL_COLUMNS.
+
+    Returns:
+        Series: Categorical label of each trial (NaN if the trial is not in table).
+
+    """
+    import numpy as np
+    import pandas as pd
+
+    trial_ids = trial_ids.astype("category")
+    labels = pd.Categorical(trial_ids.cat.categories.map(table[column]))
+    codes = np.asarray(trial_ids.cat.codes)
+    return pd.Series(pd.Categorical.from_codes(np.where(codes >= 0, labels.codes[codes], -1),
+                                               categories=labels.categories), index=trial_ids.index)
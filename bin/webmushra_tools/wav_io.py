@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+
+"""Minimal PCM / IEEE float wav reader and writer backed by NumPy.
+
+IEEE float files are read as float32 (or float64) samples and written back
+as float, so that the sample format of stimuli is kept.
+
+NumPy is imported by the functions of the samples only, so that the commands
+which only read the headers (validate, divide, generate, ...) do not load it.
+
+"""
+
+import os
+import struct
+
+# sample width in bytes -> (dtype, full scale)
+_PCM_FORMATS = {
+    1: ("u1", 128),
+    2: ("<i2", 2 ** 15),
+    3: ("<i4", 2 ** 23),
+    4: ("<i4", 2 ** 31),
+}
+
+# sample width in bytes -> dtype of IEEE float samples
+_FLOAT_FORMATS = {
+    4: "<f4",
+    8: "<f8",
+}
+
+
+def read_wav(path):
+    """Read PCM or IEEE float wav file.
+
+    Args:
+        path (str): Path of wav file.
+
+    Returns:
+        ndarray: Samples with shape (#frames, #channels), integer for PCM and
+            float for IEEE float files.
+        int: Sampling rate.
+        int: Sample width in bytes.
+
+    """
+    import numpy as np
+
+    header = read_wav_header(path, allow_float=True)
+    channels, sampwidth, sample_rate = header["channels"], header["sampwidth"], header["sample_rate"]
+    frame_bytes = channels * sampwidth
+    with open(path, "rb") as f:
+        f.seek(header["data_offset"])
+        raw = f.read(header["num_frames"] * frame_bytes)
+    # a truncated file ends at the last complete frame
+    raw = raw[:len(raw) // frame_bytes * frame_bytes]
+
+    if header["is_float"]:
+        if sampwidth not in _FLOAT_FORMATS:
+            raise ValueError(f"{path}: unsupported float sample width {sampwidth}.")
+        data = np.frombuffer(raw, dtype=_FLOAT_FORMATS[sampwidth])
+    elif sampwidth not in _PCM_FORMATS:
+        raise ValueError(f"{path}: unsupported sample width {sampwidth}.")
+    elif sampwidth == 3:
+        # pack 24 bit little endian samples into the upper bytes of int32
+        buf = np.frombuffer(raw, dtype=np.uint8).reshape(-1, 3)
+        padded = np.zeros((len(buf), 4), dtype=np.uint8)
+        padded[:, 1:] = buf
+        data = padded.view("<i4").reshape(-1) >> 8
+    else:
+        data = np.frombuffer(raw, dtype=_PCM_FORMATS[sampwidth][0])
+
+    return data.reshape(-1, channels), sample_rate, sampwidth
+
+
+def write_wav(path, data, sample_rate, sampwidth):
+    """Write PCM or IEEE float wav file.
+
+    Args:
+        path (str): Output path.
+        data (ndarray): Samples with shape (#frames, #channels). Float samples
+            are written as IEEE float, integer samples as PCM.
+        sample_rate (int): Sampling rate.
+        sampwidth (int): Sample width in bytes.
+
+    """
+    is_float = data.dtype.kind == "f"
+    with open(path, "wb") as f:
+        f.write(wav_header_bytes(len(data), data.shape[1], sample_rate, sampwidth, is_float))
+        f.write(to_bytes(data, sampwidth, is_float))
+
+
+def to_bytes(data, sampwidth, is_float=False):
+    """Pack samples into little endian PCM (or IEEE float if is_float) bytes."""
+    import numpy as np
+
+    if is_float:
+        return data.astype(_FLOAT_FORMATS[sampwidth]).tobytes()
+    if sampwidth == 3:
+        buf = data.astype("<i4").reshape(-1, 1).view(np.uint8)[:, :3]
+        return np.ascontiguousarray(buf).tobytes()
+    return data.astype(_PCM_FORMATS[sampwidth][0]).tobytes()
+
+
+def read_wav_header(path, allow_float=False):
+    """Read the format of PCM wav file without reading the samples.
+
+    Args:
+        path (str): Path of wav file.
+        allow_float (bool): If True, IEEE float wav files are also accepted.
+
+    Returns:
+        dict: channels, sampwidth, sample_rate, num_frames, data_offset
+            (byte offset of the samples in the file) and is_float.
+
+    """
+    with open(path, "rb") as f:
+        riff, _, wave_id = struct.unpack("<4sI4s", f.read(12))
+        if riff != b"RIFF" or wave_id != b"WAVE":
+            raise ValueError(f"{path}: not a wav file.")
+        header = None
+        while True:
+            chunk = f.read(8)
+            if len(chunk) < 8:
+                raise ValueError(f"{path}: no data chunk.")
+            chunk_id, size = struct.unpack("<4sI", chunk)
+            if chunk_id == b"fmt ":
+                fmt = f.read(size + (size & 1))
+                format_tag, channels, sample_rate, _, block_align, bits = struct.unpack("<HHIIHH", fmt[:16])
+                if format_tag == 0xFFFE and len(fmt) >= 26:
+                    # WAVE_FORMAT_EXTENSIBLE, the format is the first 2 bytes of the sub format GUID
+                    format_tag = struct.unpack("<H", fmt[24:26])[0]
+                if format_tag not in ([1, 3] if allow_float else [1]):
+                    raise ValueError(f"{path}: unsupported format {format_tag}.")
+                header = {"channels": channels, "sampwidth": (bits + 7) // 8, "sample_rate": sample_rate,
+                          "is_float": format_tag == 3}
+            elif chunk_id == b"data":
+                if header is None:
+                    raise ValueError(f"{path}: no fmt chunk before data.")
+                header["data_offset"] = f.tell()
+                header["num_frames"] = size // (header["channels"] * header["sampwidth"])
+                return header
+            else:
+                f.seek(size + (size & 1), os.SEEK_CUR)
+
+
+def wav_header_bytes(num_frames, channels, sample_rate, sampwidth, is_float=False):
+    """Return the header of wav file up to the samples.
+
+    PCM files have the 44 byte header the wave module writes. IEEE float files
+    (format 3) have an 18 byte fmt chunk and a fact chunk as required for
+    non-PCM formats, as sox and libsndfile write them.
+
+    """
+    data_size = num_frames * channels * sampwidth
+    byte_rate, block_align, bits = sample_rate * channels * sampwidth, channels * sampwidth, sampwidth * 8
+    if not is_float:
+        return struct.pack("<4sI4s4sIHHIIHH4sI", b"RIFF", 36 + data_size, b"WAVE", b"fmt ", 16, 1, channels,
+                           sample_rate, byte_rate, block_align, bits, b"data", data_size)
+    return struct.pack("<4sI4s4sIHHIIHHH4sII4sI", b"RIFF", 50 + data_size, b"WAVE", b"fmt ", 18, 3, channels,
+                       sample_rate, byte_rate, block_align, bits, 0, b"fact", 4, num_frames, b"data", data_size)
+
+
+def to_float(data, sampwidth):
+    """Convert integer samples to float in [-1, 1). Float samples are returned as float64."""
+    if data.dtype.kind == "f":
+        return data.astype("float64")
+    scale = _PCM_FORMATS[sampwidth][1]
+    data = data.astype("float64")
+    if sampwidth == 1:
+        data -= 128
+    return data / scale
+
+
+def from_float(data, sampwidth, is_float=False):
+    """Convert float samples in [-1, 1) to integer samples with clipping.
+
+    If is_float, the samples are only cast to the float type of sampwidth.
+
+    """
+    import numpy as np
+
+    if is_float:
+        return data.astype(_FLOAT_FORMATS[sampwidth])
+    dtype, scale = _PCM_FORMATS[sampwidth]
+    data = np.clip(np.round(data * scale), -scale, scale - 1)
+    if sampwidth == 1:
+        data += 128
+    return data.astype(dtype)
@@ -6,17 +6,38 @@ This source code is protected by copyright law and international treaties. This
 **************************************************************************/
 
 
-function AudioFileLoader(_audioContext, _errorHandler) {
+function AudioFileLoader(_audioContext, _errorHandler, _audioVariants, _waveformPeaks) {
     this.audioContext = _audioContext;
     this.errorHandler = _errorHandler;
     this.callbackSuccess = null;
     this.files = [];
+    this.waveformPeaks = _waveformPeaks == true; // load <name>.peaks.json sidecars of wav files
+    this.extensions = []; // extensions of variants of wav files the browser can play, in order of preference
+    if (_audioVariants) {
+      var audio = document.createElement("audio");
+      for (var i = 0; i < _audioVariants.length; ++i) {
+        if (audio.canPlayType && audio.canPlayType(_audioVariants[i].mimeType) !== "") {
+          this.extensions.push(_audioVariants[i].extension);
+        }
+      }
+    }
 }
 
 AudioFileLoader.prototype.addFile = function(_url, _callback, _callbackArgument) {
     this.files[this.files.length] = {url: _url, callback: _callback, callbackArgument: _callbackArgument};
 };
 
+AudioFileLoader.prototype.getCandidateUrls = function(_url) {
+    var urls = [];
+    if (/\.wav$/i.test(_url)) {
+      for (var i = 0; i < this.extensions.length; ++i) {
+        urls.push(_url.replace(/\.wav$/i, "." + this.extensions[i]));
+      }
+    }
+    urls.push(_url);
+    return urls;
+};
+
 
 
 AudioFileLoader.prototype.startLoading = function(_callbackSuccess) {
@@ -27,40 +48,94 @@ AudioFileLoader.prototype.startLoading = function(_callbackSuccess) {
     }
     
     for (var i = 0; i < this.files.length; ++i) {
+      var argument = this.files[i].callbackArgument;
+      var loadPeaks = this.waveformPeaks && /\.wav$/i.test(this.files[i].url) && argument && argument.setWaveformPeaks;
+      this.files[i].pending = loadPeaks ? 2 : 1;
+      if (loadPeaks) {
+        this.loadWaveformPeaks(i, this.files[i].url.replace(/\.wav$/i, ".peaks.json"));
+      }
+      this.loadFile(i, this.getCandidateUrls(this.files[i].url));
+    }
+};
 
-      var req = new XMLHttpRequest(); 
-      req.open("GET", this.files[i].url, true);
-      req.responseType = "arraybuffer"; 
-      req.onerror = (function (e) {
-        this.errorHandler.sendError("Loading audio file failed: " + e);
-        _callbackSuccess();
-      }).bind(this);
-      
-      var param = {index: i, loader: this, request: req};
-      req.onload = (function() { 
-        this.loader.audioContext.decodeAudioData(this.request.response, (function(buffer) {
-          this.loader.files[this.index].callback(buffer, this.loader.files[this.index].callbackArgument);
-          this.loader.files[this.index] = null;
-          for (var j = 0; j < this.loader.files.length; ++j) {
-            if(this.loader.files[j] != null) {
-              return;
-            }
-          }
-          _callbackSuccess();
-          }).bind(this),
-        (function(e){
-          this.errorHandler.sendError("Loading audio file failed: " + e);          
-          return;
-        }).bind(this));
-      }).bind(param);           
-      req.send();
+AudioFileLoader.prototype.finishFile = function(_index) {
+    this.files[_index].pending -= 1;
+    if (this.files[_index].pending > 0) {
+      return;
     }
-    
-    
-      
-    
+    this.files[_index] = null;
+    for (var j = 0; j < this.files.length; ++j) {
+      if(this.files[j] != null) {
+        return;
+      }
+    }
+    this.callbackSuccess();
+};
+
+AudioFileLoader.prototype.loadWaveformPeaks = function(_index, _url) {
+    var req = new XMLHttpRequest();
+    req.open("GET", _url, true);
+    req.responseType = "text";
+    req.onerror = (function () {
+      console.log("webMUSHRA: Could not load waveform peaks " + _url);
+      this.finishFile(_index);
+    }).bind(this);
+    req.onload = (function () {
+      try {
+        if (req.status >= 400) {
+          throw req.status;
+        }
+        var sidecar = JSON.parse(req.responseText);
+        var raw = atob(sidecar.peaks);
+        sidecar.peaks = new Float32Array(raw.length);
+        for (var k = 0; k < raw.length; ++k) {
+          var value = raw.charCodeAt(k);
+          sidecar.peaks[k] = (value > 127 ? value - 256 : value) / 127.0; // int8 min/max pairs
+        }
+        this.files[_index].callbackArgument.setWaveformPeaks(sidecar);
+      } catch (e) {
+        console.log("webMUSHRA: Could not load waveform peaks " + _url);
+      }
+      this.finishFile(_index);
+    }).bind(this);
+    req.send();
+};
+
+AudioFileLoader.prototype.loadFile = function(_index, _urls) {
+    var url = _urls.shift();
+    var fallback = _urls.length > 0; // if loading a variant fails, the next url (finally the wav file) is loaded
+
+    var req = new XMLHttpRequest(); 
+    req.open("GET", url, true);
+    req.responseType = "arraybuffer"; 
+    req.onerror = (function (e) {
+      if (fallback) {
+        this.loadFile(_index, _urls);
+        return;
+      }
+      this.errorHandler.sendError("Loading audio file failed: " + e);
+      this.callbackSuccess();
+    }).bind(this);
 
-           
+    req.onload = (function() { 
+      if (fallback && req.status >= 400) {
+        this.loadFile(_index, _urls);
+        return;
+      }
+      this.audioContext.decodeAudioData(req.response, (function(buffer) {
+        this.files[_index].callback(buffer, this.files[_index].callbackArgument);
+        this.finishFile(_index);
+        }).bind(this),
+      (function(e){
+        if (fallback) {
+          this.loadFile(_index, _urls);
+          return;
+        }
+        this.errorHandler.sendError("Loading audio file failed: " + e);          
+        return;
+      }).bind(this));
+    }).bind(this);           
+    req.send();
 };
 
 
@@ -13,11 +13,13 @@ This source code is protected by copyright law and international treaties. This
  * @property {String} id Identifier of the stimulus.
  * @property {String} filepath Filepath
  * @property {AudioBuffer} audioBuffer Web Audio API audio buffer.
+ * @property {Object} waveformPeaks Precomputed waveform peaks and duration (see bin/compute_waveform_peaks.py).
  */
 function Stimulus(_id, _filepath) {
   this.id = _id;
   this.filepath = _filepath;
   this.audioBuffer = null;
+  this.waveformPeaks = null;
 }
 
 Stimulus.prototype.getId = function() {
@@ -32,6 +34,14 @@ Stimulus.prototype.setAudioBuffer = function(_audioBuffer) {
   this.audioBuffer = _audioBuffer;
 };
 
+Stimulus.prototype.getWaveformPeaks = function() {
+  return this.waveformPeaks;
+};
+
+Stimulus.prototype.setWaveformPeaks = function(_waveformPeaks) {
+  this.waveformPeaks = _waveformPeaks;
+};
+
 Stimulus.prototype.getFilepath = function() {
   return this.filepath;
 };
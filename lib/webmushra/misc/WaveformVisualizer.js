@@ -28,24 +28,30 @@ function WaveformVisualizer(_variableName, _parent, _stimulus, _showWaveform, _e
   }
 
   var audioBuffer = _stimulus.getAudioBuffer();
-  var numberOfChannels = audioBuffer.numberOfChannels;
-  this.avgOriginalSamples = new Float32Array(audioBuffer.length);
-  
-  for(var i = 0; i < audioBuffer.length; ++i) {
-    var sum = 0;
-    for(var j = 0; j < numberOfChannels; j++){
-      sum += audioBuffer.getChannelData(j)[i];
-    }
-    var avg = sum * (1.0/numberOfChannels);
-    this.avgOriginalSamples[i] = avg;
+  this.numberOfSamples = audioBuffer.length;
+  this.waveformPeaks = _stimulus.getWaveformPeaks(); // precomputed peaks, no need to scan the audio buffer
+  this.avgOriginalSamples = null;
+
+  if (this.waveformPeaks === null) {
+    var numberOfChannels = audioBuffer.numberOfChannels;
+    this.avgOriginalSamples = new Float32Array(audioBuffer.length);
     
+    for(var i = 0; i < audioBuffer.length; ++i) {
+      var sum = 0;
+      for(var j = 0; j < numberOfChannels; j++){
+        sum += audioBuffer.getChannelData(j)[i];
+      }
+      var avg = sum * (1.0/numberOfChannels);
+      this.avgOriginalSamples[i] = avg;
+      
+    }
   }
   
-  this.resampledSamples = this.avgOriginalSamples;
+  this.resampledSamples = [];
   
   this.currentPosition = 0; // samples
   this.leftRegionPosition = 0; // samples
-  this.rightRegionPosition = this.resampledSamples.length; // samples
+  this.rightRegionPosition = this.numberOfSamples; // samples
   
     this.numberEventListener = this.mushraAudioControl.addEventListener((function (_event) {
       if (_event.name == 'processUpdate') {
@@ -84,7 +90,7 @@ function WaveformVisualizer(_variableName, _parent, _stimulus, _showWaveform, _e
 };
 
 WaveformVisualizer.prototype.translateOrigToResampled = function(_i) {
-  return Number.parseInt((this.resampledSamples.length / this.avgOriginalSamples.length) * _i);
+  return Number.parseInt((this.resampledSamples.length / this.numberOfSamples) * _i);
 }
 
 WaveformVisualizer.prototype.resample = function() {
@@ -94,6 +100,18 @@ WaveformVisualizer.prototype.resample = function() {
     for(var l = 0; l < this.canvas.width; l++){
       this.resampledSamples[l] = 0.3;
     }
+  }else if(this.waveformPeaks !== null){
+    var peaks = this.waveformPeaks.peaks;
+    var numPeaks = peaks.length / 2;
+    for(var m = 0; m < this.canvas.width; m++){
+      var start = Math.floor(m * numPeaks / this.canvas.width);
+      var end = Math.max(start + 1, Math.floor((m + 1) * numPeaks / this.canvas.width));
+      var max = 0;
+      for(var p = start; p < end && p < numPeaks; p++){
+        max = Math.max(max, Math.abs(peaks[2 * p]), Math.abs(peaks[2 * p + 1]));
+      }
+      this.resampledSamples[m] = max;
+    }
   }else{
     var blockCount = Math.ceil(this.avgOriginalSamples.length / this.canvas.width);
     var k = 0;
@@ -210,7 +228,7 @@ WaveformVisualizer.prototype.create = function(){
   this.parentWavesurfer.append(this.canvas);
   this.canvas.height = this.parentWavesurfer.height();
   this.canvas.width = this.parentWavesurfer.width();
-  this.scale = this.canvas.offsetWidth/this.resampledSamples.length;
+  this.scale = this.canvas.offsetWidth/this.numberOfSamples;
   this.resample();
   this.scaleToHeight();
 
@@ -112,6 +112,24 @@ function addPagesToPageManager(_pageManager, _pages) {
   }
 }
 
+function expandResponses(_responses, _pages) {// replaces names of response scales by the scales defined in config.responses
+  for (var i = 0; i < _pages.length; ++i) {
+    if (Array.isArray(_pages[i])) {
+      expandResponses(_responses, _pages[i]);
+    } else if (_pages[i] !== null && typeof _pages[i] === "object") {
+      var elements = [_pages[i]].concat(_pages[i].questionnaire || []);
+      for (var j = 0; j < elements.length; ++j) {
+        if (typeof elements[j].response === "string") {
+          if (_responses[elements[j].response] === undefined) {
+            errorHandler.sendError("Response scale '" + elements[j].response + "' is not defined.");
+          }
+          elements[j].response = _responses[elements[j].response];
+        }
+      }
+    }
+  }
+}
+
 for (var i = 0; i < $("body").children().length; i++) {
   if ($("body").children().eq(i).attr('id') != "popupErrors" && $("body").children().eq(i).attr('id') != "popupDialog") {
     $("body").children().eq(i).addClass('ui-disabled');
@@ -181,7 +199,7 @@ function startup(config) {
   }
   audioContext.volume = 1.0;
 
-  audioFileLoader = new AudioFileLoader(audioContext, errorHandler);
+  audioFileLoader = new AudioFileLoader(audioContext, errorHandler, config.audioVariants, config.waveformPeaks);
   mushraValidator = new MushraValidator(errorHandler);
   dataSender = new DataSender(config);
 
@@ -195,6 +213,9 @@ function startup(config) {
   pageTemplateRenderer = new PageTemplateRenderer(pageManager, config.showButtonPreviousPage, config.language);
   pageManager.addCallbackPageEventChanged(pageTemplateRenderer.refresh.bind(pageTemplateRenderer));
 
+  if (config.responses !== undefined) {
+    expandResponses(config.responses, config.pages);
+  }
   addPagesToPageManager(pageManager, config.pages);
 
   interval2 = setInterval(function() {
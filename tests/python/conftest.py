@@ -0,0 +1,38 @@
+# -*- coding: utf-8 -*-
+
+"""Fixtures of the tests of webmushra_tools."""
+
+import struct
+
+import numpy as np
+import pytest
+
+
+def write_float_wav(path, data, sample_rate):
+    """Write float32 samples as IEEE float wav, laid out as sox writes it (fmt of 18 bytes and fact chunk).
+
+    Args:
+        path (str): Output path.
+        data (ndarray): Samples with shape (#frames, #channels).
+        sample_rate (int): Sampling rate.
+
+    """
+    data = np.asarray(data, dtype="<f4")
+    frames, channels = data.shape
+    raw = data.tobytes()
+    with open(path, "wb") as f:
+        f.write(struct.pack("<4sI4s", b"RIFF", 50 + len(raw), b"WAVE"))
+        f.write(struct.pack("<4sIHHIIHHH", b"fmt ", 18, 3, channels, sample_rate, sample_rate * channels * 4,
+                            channels * 4, 32, 0))
+        f.write(struct.pack("<4sII", b"fact", 4, frames))
+        f.write(struct.pack("<4sI", b"data", len(raw)) + raw)
+
+
+@pytest.fixture
+def float_mono_wav(tmp_path):
+    """IEEE float mono wav of 0.5 sec at 16 kHz, and its samples."""
+    t = np.arange(8000) / 16000
+    data = (0.5 * np.sin(2 * np.pi * 440 * t)).astype(np.float32).reshape(-1, 1)
+    path = tmp_path / "float_mono.wav"
+    write_float_wav(path, data, 16000)
+    return str(path), data
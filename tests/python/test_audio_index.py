@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+import sys
+
+import numpy as np
+import pytest
+
+from webmushra_tools import divide_audio_dir
+from webmushra_tools.audio_index import preflight
+from webmushra_tools.wav_io import write_wav
+
+
+@pytest.fixture
+def mixed_rate_dir(tmp_path):
+    """Two systems of stereo PCM files, one of which has a file at 16 kHz instead of 22.05 kHz."""
+    paths = []
+    for model in ["gt", "tts"]:
+        (tmp_path / model).mkdir()
+        for j in range(3):
+            sample_rate = 16000 if (model, j) == ("tts", 1) else 22050
+            path = str(tmp_path / model / f"utt_{j:04d}.wav")
+            write_wav(path, np.zeros((sample_rate // 10, 2), dtype=np.int16), sample_rate, 2)
+            paths.append(path)
+    return tmp_path, paths
+
+
+def test_preflight_requires_one_sample_rate(mixed_rate_dir):
+    _, paths = mixed_rate_dir
+    infos, problems = preflight(paths)
+    assert len(infos) == 6
+    assert problems == [(paths[4], "sample rate 16000 is not one of [22050].")]
+
+
+def test_preflight_allowed_sample_rates(mixed_rate_dir):
+    _, paths = mixed_rate_dir
+    assert preflight(paths, sample_rates=[16000, 22050])[1] == []
+    assert len(preflight(paths, sample_rates=[16000])[1]) == 5
+
+
+def test_divide_rejects_mixed_sample_rates(mixed_rate_dir, monkeypatch, capsys):
+    root, _ = mixed_rate_dir
+    monkeypatch.setattr(sys, "argv", ["divide_audio_dir.py", str(root), str(root / "subsets")])
+    with pytest.raises(SystemExit):
+        divide_audio_dir.main()
+    assert "sample rate 16000" in capsys.readouterr().out
+    assert not (root / "subsets").exists()
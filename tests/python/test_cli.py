@@ -0,0 +1,21 @@
+# -*- coding: utf-8 -*-
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+from webmushra_tools.cli import COMMANDS
+
+
+@pytest.mark.parametrize("command", ["validate", "divide", "generate", "generate-ja", "generate-batch", "bundle",
+                                     "receive", "assign", "monitor", "trace"])
+def test_command_does_not_import_heavy_dependencies(command):
+    module = COMMANDS[command][0]
+    code = (f"import sys, webmushra_tools.{module}; "
+            "print(sorted(m for m in ['numpy', 'pandas', 'pyarrow', 'scipy'] if m in sys.modules))")
+    bin_dir = os.path.join(os.path.dirname(__file__), "..", "..", "bin")
+    out = subprocess.run([sys.executable, "-c", code], env=dict(os.environ, PYTHONPATH=bin_dir),
+                         stdout=subprocess.PIPE, check=True, universal_newlines=True).stdout
+    assert out.strip() == "[]"
@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+
+import base64
+import json
+
+import numpy as np
+
+from webmushra_tools.compute_waveform_peaks import write_peaks
+
+
+def test_write_peaks_of_float_wav(tmp_path, float_mono_wav):
+    path, data = float_mono_wav
+    out_path = str(tmp_path / "float_mono.peaks.json")
+    duration = write_peaks(path, out_path, num_peaks=16)
+
+    with open(out_path) as f:
+        sidecar = json.load(f)
+    assert duration == sidecar["duration"] == 0.5
+    assert (sidecar["sampleRate"], sidecar["length"], sidecar["numPeaks"]) == (16000, len(data), 16)
+    peaks = np.frombuffer(base64.b64decode(sidecar["peaks"]), dtype=np.int8)
+    # a 0.5 amplitude sine in every block
+    assert np.all(np.abs(peaks - np.tile([-64, 64], 16)) <= 1)
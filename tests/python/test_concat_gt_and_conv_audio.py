@@ -0,0 +1,46 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pytest
+
+from webmushra_tools.concat_gt_and_conv_audio import concat_pair, get_beep, stem_index
+from webmushra_tools.wav_io import read_wav, read_wav_header, write_wav
+
+
+@pytest.mark.parametrize("dtype, sampwidth", [(np.float32, 4), (np.int16, 2)])
+def test_concat_pair_keeps_format(tmp_path, dtype, sampwidth):
+    gt = (np.arange(200).reshape(-1, 2) * 10).astype(dtype)
+    conv = (-np.arange(300).reshape(-1, 2) * 10).astype(dtype)
+    gt_path, conv_path, out_path = (str(tmp_path / name) for name in ["gt.wav", "conv.wav", "out.wav"])
+    write_wav(gt_path, gt, 8000, sampwidth)
+    write_wav(conv_path, conv, 8000, sampwidth)
+
+    num_frames = concat_pair((gt_path, conv_path, out_path))
+
+    is_float = dtype == np.float32
+    beep = np.frombuffer(get_beep(8000, 2, sampwidth, is_float), dtype=dtype).reshape(-1, 2)
+    out, sample_rate, width = read_wav(out_path)
+    assert read_wav_header(out_path, allow_float=True)["is_float"] == is_float
+    assert (sample_rate, width, len(out)) == (8000, sampwidth, num_frames)
+    np.testing.assert_array_equal(out, np.concatenate([gt, beep, conv]))
+
+
+def test_concat_float_sample(tmp_path, float_mono_wav):
+    path, data = float_mono_wav
+    out_path = str(tmp_path / "out.wav")
+    concat_pair((path, path, out_path))
+    out = read_wav(out_path)[0]
+    assert out.dtype == np.float32
+    np.testing.assert_array_equal(out[:len(data)], data)
+    np.testing.assert_array_equal(out[-len(data):], data)
+
+
+def test_stem_index_keeps_speaker_prefix():
+    gt = stem_index(["gt/p225_001.wav", "gt/p226_001.wav"])
+    conv = stem_index(["conv/p226_001.wav", "conv/p225_001.wav"])
+    assert {stem: (gt[stem], conv[stem]) for stem in gt} == {
+        "p225_001": ("gt/p225_001.wav", "conv/p225_001.wav"),
+        "p226_001": ("gt/p226_001.wav", "conv/p226_001.wav"),
+    }
+    with pytest.raises(ValueError):
+        stem_index(["a/x_001.wav", "b/x_001.wav"])
@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+
+from webmushra_tools.convert_mono_to_stereo import convert
+from webmushra_tools.wav_io import read_wav, read_wav_header, write_wav
+
+
+def test_convert_float_mono(tmp_path, float_mono_wav):
+    path, data = float_mono_wav
+    out_path = str(tmp_path / "out" / "stereo.wav")
+    convert(path, out_path, pad=0.1)
+
+    out, sample_rate, sampwidth = read_wav(out_path)
+    assert read_wav_header(out_path, allow_float=True)["is_float"]
+    assert out.dtype == np.float32
+    assert (sample_rate, sampwidth) == (16000, 4)
+    assert out.shape == (len(data) + 2 * 1600, 2)
+    np.testing.assert_array_equal(out[1600:-1600], np.repeat(data, 2, axis=1))
+    assert not out[:1600].any() and not out[-1600:].any()
+
+
+def test_convert_float_stereo_is_mixed_down(tmp_path):
+    data = np.stack([np.full(100, 0.25), np.full(100, -0.75)], axis=1).astype(np.float32)
+    path, out_path = str(tmp_path / "in.wav"), str(tmp_path / "out.wav")
+    write_wav(path, data, 8000, 4)
+    convert(path, out_path, pad=0.0)
+    out = read_wav(out_path)[0]
+    assert out.dtype == np.float32
+    np.testing.assert_allclose(out, -0.25)
+
+
+def test_convert_pcm_keeps_width(tmp_path):
+    data = np.arange(-50, 50, dtype=np.int16).reshape(-1, 1) * 100
+    path, out_path = str(tmp_path / "in.wav"), str(tmp_path / "out.wav")
+    write_wav(path, data, 8000, 2)
+    convert(path, out_path, pad=0.01)
+    out, sample_rate, sampwidth = read_wav(out_path)
+    assert out.dtype == np.int16 and sampwidth == 2
+    np.testing.assert_array_equal(out[80:-80], np.repeat(data, 2, axis=1))
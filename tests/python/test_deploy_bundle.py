@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import numpy as np
+import yaml
+
+from webmushra_tools.deploy_bundle import build_bundle
+from webmushra_tools.wav_io import write_wav
+
+
+def make_config(root):
+    os.makedirs(root / "samples" / "gt")
+    os.makedirs(root / "samples" / "tts")
+    for model in ["gt", "tts"]:
+        write_wav(str(root / "samples" / model / "utt_0001.wav"), np.zeros((80, 2), dtype=np.int16), 8000, 2)
+    # a copy under another name gets the same digest
+    write_wav(str(root / "samples" / "tts" / "utt_0002.wav"), np.zeros((80, 2), dtype=np.int16), 8000, 2)
+    (root / "samples" / "gt" / "utt_0001.peaks.json").write_text("[0, 0]")
+    config = {
+        "testname": "test",
+        "pages": [
+            ["random",
+             {"type": "likert_single_stimulus", "id": "gt_utt_0001.wav",
+              "stimuli": {"C1": "samples/gt/utt_0001.wav"}},
+             {"type": "likert_single_stimulus", "id": "tts_utt_0001.wav",
+              "stimuli": {"C1": "samples/tts/utt_0001.wav"}}],
+            {"type": "mushra", "id": "trial", "reference": "samples/gt/utt_0001.wav",
+             "stimuli": {"C1": "samples/tts/utt_0002.wav", "C2": "https://example.com/x.wav"}},
+        ],
+    }
+    path = root / "configs" / "test.yaml"
+    os.makedirs(path.parent)
+    path.write_text(yaml.safe_dump(config))
+    return str(path)
+
+
+def test_build_bundle_rewrites_urls_by_contents(tmp_path):
+    root, outdir = tmp_path / "root", str(tmp_path / "bundle")
+    config_path = make_config(root)
+    bundle = build_bundle([config_path], outdir, "https://cdn/stimuli/", root=str(root))
+
+    with open(os.path.join(outdir, "configs", "test.yaml")) as f:
+        pages = yaml.safe_load(f)["pages"]
+    gt_url = pages[0][1]["stimuli"]["C1"]
+    assert gt_url.startswith("https://cdn/stimuli/") and gt_url.endswith(".wav")
+    assert pages[1]["reference"] == gt_url
+    # the peaks file of gt is part of its digest
+    assert pages[1]["stimuli"]["C1"] == pages[0][2]["stimuli"]["C1"] != gt_url
+    assert pages[1]["stimuli"]["C2"] == "https://example.com/x.wav"
+    digest = gt_url[len("https://cdn/stimuli/"):-len(".wav")]
+    assert os.path.exists(os.path.join(outdir, "stimuli", f"{digest}.peaks.json"))
+    assert set(bundle.changed) == set(bundle.files)
+    bundle.save("https://cdn/stimuli/")
+
+    bundle = build_bundle([config_path], outdir, "https://cdn/stimuli/", root=str(root))
+    assert bundle.changed == [] and bundle.stale_files() == []
+
+
+def test_build_bundle_replaces_changed_stimuli(tmp_path):
+    root, outdir = tmp_path / "root", str(tmp_path / "bundle")
+    config_path = make_config(root)
+    first = build_bundle([config_path], outdir, "/stimuli/", root=str(root))
+    first.save("/stimuli/")
+
+    (root / "samples" / "gt" / "utt_0001.peaks.json").write_text("[0, 1]")
+    second = build_bundle([config_path], outdir, "/stimuli/", root=str(root))
+    new_files = sorted(set(second.files) - set(first.files))
+    assert [os.path.splitext(path)[1] for path in new_files] == [".json", ".wav"]
+    assert sorted(second.changed) == sorted(new_files + ["configs/test.yaml"])
+    assert second.stale_files() == sorted(set(first.files) - set(second.files))
+    assert len(second.stale_files()) == 2
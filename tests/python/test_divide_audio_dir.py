@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sys
+
+import numpy as np
+import pytest
+
+from webmushra_tools import divide_audio_dir
+from webmushra_tools.wav_io import write_wav
+
+
+def make_models(root, num_utts=6):
+    for model in ["gt", "tts"]:
+        os.makedirs(root / model)
+        for j in range(num_utts):
+            write_wav(str(root / model / f"utt_{j:04d}.wav"), np.zeros((80 * (j + 1), 2), dtype=np.int16), 8000, 2)
+
+
+def run_divide(monkeypatch, *args):
+    monkeypatch.setattr(sys, "argv", ["divide_audio_dir.py"] + [str(arg) for arg in args])
+    divide_audio_dir.main()
+
+
+def list_outputs(outdir):
+    return sorted(os.path.relpath(os.path.join(d, f), outdir) for d, _, files in os.walk(outdir) for f in files)
+
+
+def test_manifest_removes_previous_layout(tmp_path, monkeypatch):
+    root, outdir, manifest = tmp_path / "wavs", tmp_path / "subsets", tmp_path / "manifest.json"
+    make_models(root)
+    run_divide(monkeypatch, "--manifest", manifest, "--num_wavs_in_each_subset", 2, root, outdir)
+    assert len(list_outputs(outdir)) == 12 and os.path.isdir(outdir / "subset_2")
+
+    run_divide(monkeypatch, "--manifest", manifest, "--num_wavs_in_each_subset", 3, "--seed", 1, root, outdir)
+    outputs = list_outputs(outdir)
+    assert len(outputs) == 12
+    assert sorted(os.listdir(outdir)) == ["subset_0", "subset_1"]
+    for model in ["gt", "tts"]:
+        assert sorted(os.path.basename(f) for f in outputs if f"/{model}/" in f) == \
+            [f"utt_{j:04d}.wav" for j in range(6)]
+
+
+def test_manifest_rebuilds_on_mode_change(tmp_path, monkeypatch):
+    root, outdir, manifest = tmp_path / "wavs", tmp_path / "subsets", tmp_path / "manifest.json"
+    make_models(root, num_utts=2)
+    run_divide(monkeypatch, "--manifest", manifest, root, outdir)
+    out_path = outdir / "subset_0" / "gt" / "utt_0000.wav"
+    assert not os.path.islink(out_path)
+
+    run_divide(monkeypatch, "--manifest", manifest, "--mode", "symlink", root, outdir)
+    assert os.path.islink(out_path)
+    assert os.path.samefile(out_path, root / "gt" / "utt_0000.wav")
+
+
+def test_partition_by_duration_reports_files_without_duration(tmp_path, monkeypatch, capsys):
+    root, outdir, manifest = tmp_path / "wavs", tmp_path / "subsets", tmp_path / "manifest.json"
+    make_models(root, num_utts=2)
+    (root / "tts" / "utt_0001.wav").write_bytes(b"not a wav file")
+    with pytest.raises(SystemExit):
+        run_divide(monkeypatch, "--manifest", manifest, "--skip_validation", "--partition", "duration", root, outdir)
+    assert "tts/utt_0001.wav" in capsys.readouterr().out
+    assert not os.path.exists(outdir)
+
+
+def test_partition_by_duration_bound_without_size_cap():
+    rng = np.random.default_rng(0)
+    for num_subsets in [2, 3, 7]:
+        durations = list(rng.exponential(3.0, 50) ** 2)
+        subsets = divide_audio_dir.partition_by_duration(durations, num_subsets, equal_sizes=False)
+        assert sorted(idx for subset in subsets for idx in subset) == list(range(50))
+        totals = [sum(durations[idx] for idx in subset) for subset in subsets]
+        assert max(totals) - min(totals) <= max(durations)
+
+
+def test_partition_by_duration_equal_sizes():
+    durations = [10.0, 9.0, 1.0, 1.0, 1.0, 0.5, 0.5]
+    subsets = divide_audio_dir.partition_by_duration(durations, 3)
+    assert sorted(len(subset) for subset in subsets) == [2, 2, 3]
+    assert sorted(idx for subset in subsets for idx in subset) == list(range(7))
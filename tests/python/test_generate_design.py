@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pytest
+
+from webmushra_tools.generate_design import (design_efficiency, make_design, random_design, stimulus_coverage,
+                                             williams_orders)
+
+
+@pytest.mark.parametrize("n", [1, 2, 5, 6])
+def test_williams_orders_balance_positions(n):
+    rows = np.asarray(williams_orders(n))
+    for row in rows:
+        assert sorted(row) == list(range(n))
+    for column in rows.T:
+        counts = np.bincount(column, minlength=n)
+        assert counts.min() == counts.max()
+
+
+@pytest.mark.parametrize("num_systems,num_utts,pages,replicates", [(4, 10, 4, 1), (7, 23, 5, 2)])
+def test_make_design_rates_every_stimulus_replicates_times(num_systems, num_utts, pages, replicates):
+    systems, utts = make_design(num_systems, num_utts, pages, replicates, seed=1)
+    assert systems.shape == utts.shape and systems.shape[1] == pages
+    assert stimulus_coverage(systems, utts, num_systems, num_utts) == [replicates, replicates]
+    for config_utts in utts:
+        config_utts = config_utts[config_utts >= 0]
+        assert len(set(config_utts)) == len(config_utts)
+
+
+def test_balanced_design_is_more_efficient_than_random():
+    systems, utts = make_design(6, 60, 6, seed=1)
+    balanced = design_efficiency(systems, 6)
+    random_systems, _ = random_design(6, 60, (systems >= 0).sum(axis=1), seed=1)
+    assert balanced["connected"] and balanced["ratings_per_system"] == [60, 60]
+    assert balanced["efficiency"] == pytest.approx(1.0)
+    assert design_efficiency(random_systems, 6)["efficiency"] < balanced["efficiency"]
+
+
+def test_disconnected_design():
+    systems = np.array([[0, 1], [0, 1], [2, 3], [2, 3]])
+    assert design_efficiency(systems, 4)["connected"] is False
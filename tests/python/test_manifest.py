@@ -0,0 +1,44 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+from webmushra_tools.manifest import Manifest
+
+
+def test_output_is_fresh_until_inputs_or_params_change(tmp_path):
+    path = str(tmp_path / "manifest.json")
+    src, out = tmp_path / "in.wav", tmp_path / "out.wav"
+    src.write_bytes(b"a")
+    out.write_bytes(b"a")
+    manifest = Manifest(path)
+    assert not manifest.is_fresh("copy", str(out), [str(src)], {"mode": "copy"})
+    manifest.record("copy", str(out), [str(src)], {"mode": "copy"})
+    manifest.save()
+
+    manifest = Manifest(path)
+    assert manifest.is_fresh("copy", str(out), [str(src)], {"mode": "copy"})
+    assert not manifest.is_fresh("copy", str(out), [str(src)], {"mode": "symlink"})
+    src.write_bytes(b"bb")
+    assert not manifest.is_fresh("copy", str(out), [str(src)], {"mode": "copy"})
+    os.remove(str(out))
+    assert not manifest.is_fresh("copy", str(out), [], {"mode": "copy"})
+
+
+def test_drop_stale_keeps_other_roots(tmp_path):
+    src = tmp_path / "in.wav"
+    src.write_bytes(b"a")
+    manifest = Manifest(str(tmp_path / "manifest.json"))
+    for output in ["a/subset_0/x.wav", "a/subset_1/x.wav", "b/subset_0/x.wav"]:
+        manifest.record("divide", output, [str(src)])
+    assert manifest.drop_stale("divide", ["a/subset_0/x.wav"], root="a") == ["a/subset_1/x.wav"]
+    assert sorted(manifest.stages["divide"]) == ["a/subset_0/x.wav", "b/subset_0/x.wav"]
+
+
+def test_disabled_manifest_rebuilds_everything(tmp_path):
+    src = tmp_path / "in.wav"
+    src.write_bytes(b"a")
+    manifest = Manifest()
+    manifest.record("copy", str(src), [str(src)])
+    manifest.save()
+    assert not manifest.is_fresh("copy", str(src), [str(src)])
+    assert os.listdir(str(tmp_path)) == ["in.wav"]
@@ -0,0 +1,53 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("scipy")
+
+from webmushra_tools.mos_stats import extract_system, summarize  # noqa: E402
+
+
+def make_ratings(num_systems, num_ratings=40, seed=0):
+    rng = np.random.default_rng(seed)
+    systems = [f"sys{i:02d}" for i in range(num_systems)]
+    labels = np.repeat(systems, num_ratings)
+    ratings = pd.array(rng.integers(1, 6, len(labels)), dtype="Int8")
+    ratings[::7] = pd.NA
+    df = pd.DataFrame({"trial_id": [f"{s}_0001.wav" for s in labels], "stimuli_rating": ratings})
+    return df, pd.Series(pd.Categorical(labels, categories=systems)), systems
+
+
+@pytest.mark.parametrize("ci", ["t", "bootstrap"])
+def test_many_systems(ci):
+    # codes * 5 values overflows int8 from 26 systems on
+    df, systems, names = make_ratings(30)
+    stats = summarize(df, systems, ci=ci, num_bootstrap=200)
+    assert list(stats.index) == names
+    assert (stats["ci_low"] <= stats["mean"]).all() and (stats["mean"] <= stats["ci_high"]).all()
+
+
+def test_int8_same_as_float():
+    df, systems, _ = make_ratings(3)
+    as_float = df.assign(stimuli_rating=df["stimuli_rating"].astype("float64"))
+    pd.testing.assert_frame_equal(summarize(df, systems), summarize(as_float, systems))
+    expected = df["stimuli_rating"].astype("float64").groupby(systems, observed=True).agg(["mean", "var", "count"])
+    stats = summarize(df, systems)
+    np.testing.assert_allclose(stats["mean"], expected["mean"])
+    np.testing.assert_allclose(stats["var"], expected["var"])
+    np.testing.assert_array_equal(stats["n"], expected["count"])
+
+
+@pytest.mark.parametrize("ci", ["t", "bootstrap"])
+def test_empty(ci):
+    df = pd.DataFrame({"stimuli_rating": pd.array([pd.NA, pd.NA], dtype="Int8")})
+    stats = summarize(df, pd.Series(pd.Categorical(["a", "b"])), ci=ci)
+    assert len(stats) == 0
+
+
+def test_extract_system_prefers_longest_method():
+    trial_ids = pd.Series(["baseline_tf_1f1m_0001.wav", "baseline_tf_0001.wav", "other.wav"])
+    systems = extract_system(trial_ids, ["baseline_tf", "baseline_tf_1f1m"])
+    assert systems.tolist()[:2] == ["baseline_tf_1f1m", "baseline_tf"]
+    assert pd.isna(systems[2])
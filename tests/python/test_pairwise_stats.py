@@ -0,0 +1,56 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("scipy")
+
+from webmushra_tools.pairwise_stats import (  # noqa: E402
+    RatingMatrix, compare_systems, correct_p_values, extract_utterance, paired_bootstrap, significance_matrix)
+
+
+def make_matrix(offsets, num_raters=8, num_utts=10, seed=0):
+    rng = np.random.default_rng(seed)
+    rows = [(f"R{r}", f"utt_{u:04d}", f"sys{s}", min(5, max(1, round(3 + offset + rng.normal(0, 0.5)))))
+            for s, offset in enumerate(offsets) for r in range(num_raters) for u in range(num_utts)]
+    df = pd.DataFrame(rows, columns=["rater", "utterance", "system", "rating"])
+    return RatingMatrix(df["rater"], df["utterance"], df["system"], df["rating"])
+
+
+def test_correct_p_values():
+    p = np.array([0.01, np.nan, 0.04, 0.03])
+    np.testing.assert_allclose(correct_p_values(p, "bonferroni"), [0.03, np.nan, 0.12, 0.09])
+    np.testing.assert_allclose(correct_p_values(p, "holm"), [0.03, np.nan, 0.06, 0.06])
+    np.testing.assert_allclose(correct_p_values(p, "bh"), [0.03, np.nan, 0.04, 0.04])
+    np.testing.assert_allclose(correct_p_values(p, "none"), p)
+    with pytest.raises(ValueError):
+        correct_p_values(p, "unknown")
+
+
+def test_extract_utterance():
+    trial_ids = pd.Series(["method_a_system_x_0001.wav", "method_a_system_y_0001.wav", "method_a_system_x_0002.wav"])
+    utterances = extract_utterance(trial_ids, ["system_x", "system_y"])
+    assert list(utterances) == ["method_a__0001", "method_a__0001", "method_a__0002"]
+
+
+def test_paired_bootstrap_of_a_constant_difference():
+    rater_codes = np.repeat(np.arange(3), 4)
+    utterance_codes = np.tile(np.arange(2), 6)
+    is_b = np.tile([False, False, True, True], 3)
+    ratings = np.where(is_b, 2.0, 3.0) + utterance_codes
+    diffs = paired_bootstrap(rater_codes, utterance_codes, is_b, ratings, 3, 2, num_bootstrap=50)
+    assert len(diffs) == 50
+    np.testing.assert_allclose(diffs, 1.0)
+
+
+def test_compare_systems_does_not_depend_on_jobs():
+    matrix = make_matrix([0, 0, 1.5])
+    pairs = compare_systems(matrix, num_bootstrap=500, jobs=1)
+    pd.testing.assert_frame_equal(pairs, compare_systems(matrix, num_bootstrap=500, jobs=2))
+    assert len(pairs) == 3
+    better = pairs[(pairs["system_a"] == "sys0") & (pairs["system_b"] == "sys2")].iloc[0]
+    assert better["diff"] < 0 and better["ci_high"] < 0 and better["p_bootstrap_adjusted"] < 0.05
+
+    matrix = significance_matrix(pairs, matrix.systems)
+    assert matrix.loc["sys2", "sys0"].endswith("*") and matrix.loc["sys0", "sys0"] == "-"
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+import csv
+import sys
+
+import pytest
+
+from webmushra_tools.wav_io import write_wav
+
+pd = pytest.importorskip("pandas")
+
+from webmushra_tools.rater_screening import read_durations, screen_raters, write_cleaned  # noqa: E402
+from webmushra_tools.results_store import read_results  # noqa: E402
+from webmushra_tools.results_writer import format_csv_row  # noqa: E402
+from webmushra_tools.screen_raters import main as screen_raters_main  # noqa: E402
+
+
+def test_read_durations_of_float_wavs(tmp_path, float_mono_wav):
+    path, data = float_mono_wav
+    wav_dir = tmp_path / "wavs" / "method_a"
+    wav_dir.mkdir(parents=True)
+    (wav_dir / "original_0001.wav").write_bytes(open(path, "rb").read())
+    write_wav(str(wav_dir / "original_0002.wav"), (data * 100).astype("int16"), 8000, 2)
+    (wav_dir / "broken_0003.wav").write_bytes(b"not a wav file")
+
+    durations = read_durations([str(tmp_path / "wavs")])
+    assert durations == {"method_a_original_0001.wav": 0.5, "method_a_original_0002.wav": 1.0}
+
+
+def test_write_cleaned_keeps_integer_rating_time(tmp_path):
+    results_dir = tmp_path / "results"
+    results_dir.mkdir()
+    rows = [f"subjective_evalaution,R{r},method_a_original_000{u}.wav,\" {r + u} \",C1,{12345 + u}"
+            for r in range(2) for u in range(3)]
+    (results_dir / "lss.csv").write_text("session_test_id,name,trial_id,stimuli_rating,stimuli,rating_time\n"
+                                         + "\n".join(rows) + "\n")
+    df = read_results(str(results_dir))
+    report = screen_raters(df, rules=["constant"], min_ratings=1)
+
+    out_path = str(tmp_path / "cleaned" / "lss.csv")
+    assert write_cleaned(df, report, out_path) == 6
+    with open(out_path) as f:
+        cleaned = list(csv.DictReader(f))
+    assert [row["rating_time"] for row in cleaned] == [str(12345 + u) for _ in range(2) for u in range(3)]
+    assert cleaned[0]["stimuli_rating"] == " 0 "
+
+
+def test_write_cleaned_uses_the_layout_of_write_php(tmp_path):
+    results_dir = tmp_path / "results"
+    results_dir.mkdir()
+    (results_dir / "lss.csv").write_text("session_test_id,name,trial_id,stimuli_rating,stimuli,rating_time\n"
+                                         "subjective_evalaution,R0,method_a_original_0001.wav,\" 4 \",C1,1200\n"
+                                         "subjective_evalaution,\"R 1\",method_a_original_0001.wav,,C1,850.5\n")
+    df = read_results(str(results_dir))
+    report = screen_raters(df, rules=["constant"], min_ratings=5)
+
+    out_path = str(tmp_path / "cleaned" / "lss.csv")
+    assert write_cleaned(df, report, out_path) == 2
+    with open(out_path) as f:
+        lines = f.readlines()
+    assert lines == [
+        format_csv_row(["session_test_id", "name", "trial_id", "stimuli_rating", "stimuli", "rating_time"]),
+        format_csv_row(["subjective_evalaution", "R0", "method_a_original_0001.wav", " 4 ", "C1", 1200]),
+        format_csv_row(["subjective_evalaution", "R 1", "method_a_original_0001.wav", " NA ", "C1", 850.5]),
+    ]
+    assert lines[1] == 'subjective_evalaution,R0,method_a_original_0001.wav," 4 ",C1,1200\n'
+
+
+def test_rules_option_is_followed_by_the_positionals(tmp_path, monkeypatch):
+    results_dir = tmp_path / "results"
+    results_dir.mkdir()
+    rows = [f"subjective_evalaution,R{r},method_a_original_000{u}.wav,\" {r} \",C1,1000" for r in range(2) for u in range(3)]
+    (results_dir / "lss.csv").write_text("session_test_id,name,trial_id,stimuli_rating,stimuli,rating_time\n"
+                                         + "\n".join(rows) + "\n")
+    output_dir = tmp_path / "cleaned"
+    monkeypatch.setattr(sys, "argv", ["screen_raters.py", "--rules", "constant,consensus", "--min_ratings", "1",
+                                      str(results_dir), str(output_dir)])
+    screen_raters_main()
+    assert (output_dir / "lss.csv").read_text().count("\n") == 1
+
+    monkeypatch.setattr(sys, "argv", ["screen_raters.py", "--rules", "constant,unknown", str(results_dir)])
+    with pytest.raises(SystemExit):
+        screen_raters_main()
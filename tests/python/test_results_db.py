@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+import os
+import sqlite3
+
+import pytest
+
+from webmushra_tools.load_test_receiver import make_session
+from webmushra_tools.results_db import connect, insert_session, read_new_ratings
+
+
+def test_readonly_connection_does_not_create_a_database(tmp_path):
+    path = str(tmp_path / "results" / "results.db")
+    with pytest.raises(FileNotFoundError):
+        connect(path, readonly=True)
+    assert not os.path.exists(path)
+
+
+def test_readonly_connection_reads_but_does_not_write(tmp_path):
+    path = str(tmp_path / "results db" / "results.db")
+    os.makedirs(os.path.dirname(path))
+    conn = connect(path)
+    insert_session(conn, make_session("t", "rater0", 3))
+    conn.close()
+
+    conn = connect(path, readonly=True)
+    ratings = read_new_ratings(conn, "t")
+    assert [(rater, rating) for _, rater, _, rating in ratings] == [("rater0", 1.0), ("rater0", 2.0), ("rater0", 3.0)]
+    with pytest.raises(sqlite3.OperationalError):
+        insert_session(conn, make_session("t", "rater1", 3))
+    conn.close()
+
+
+def test_read_ratings_of_a_missing_database(tmp_path):
+    pytest.importorskip("pandas")
+    from webmushra_tools.results_db import read_ratings
+
+    path = str(tmp_path / "results.db")
+    with pytest.raises(FileNotFoundError):
+        read_ratings(path, "t")
+    assert not os.path.exists(path)
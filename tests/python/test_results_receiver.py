@@ -0,0 +1,72 @@
+# -*- coding: utf-8 -*-
+
+import asyncio
+import fcntl
+import os
+import json
+import threading
+from urllib.parse import quote
+
+import pytest
+
+from webmushra_tools.results_receiver import BatchWriter, CsvWriter, Receiver, handler
+
+
+def test_batch_writer_is_abstract():
+    with pytest.raises(TypeError):
+        BatchWriter()
+
+
+def test_csv_writer_waits_for_lock_off_the_event_loop(tmp_path):
+    path = str(tmp_path / "lss.csv")
+    lock_fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o644)
+    fcntl.flock(lock_fd, fcntl.LOCK_EX)
+    unlock = threading.Timer(0.3, fcntl.flock, (lock_fd, fcntl.LOCK_UN))
+
+    async def receive():
+        writer = CsvWriter(path, flush_interval=0.01)
+        write = asyncio.ensure_future(writer.write((["session_test_id", "trial_id"], [["t", "a_0001.wav"]]), 1))
+        unlock.start()
+        # the loop keeps running while the writer waits for the lock
+        await asyncio.sleep(0.1)
+        assert not write.done()
+        await write
+
+    try:
+        asyncio.run(receive())
+    finally:
+        unlock.join()
+        os.close(lock_fd)
+    with open(path) as f:
+        assert f.read() == "session_test_id,trial_id\nt,a_0001.wav\n"
+
+
+class FakeWriter(object):
+    def __init__(self):
+        self.data = b""
+
+    def write(self, data):
+        self.data += data
+
+    async def drain(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def test_handler_rejects_session_of_unexpected_shape(tmp_path):
+    session = {"testId": "t", "participant": ["name", "response"], "trials": []}
+    body = f"sessionJSON={quote(json.dumps(session))}".encode("utf-8")
+
+    async def post():
+        reader = asyncio.StreamReader()
+        reader.feed_data(b"POST /service/write.php HTTP/1.1\r\n"
+                         + f"Content-Length: {len(body)}\r\n\r\n".encode("latin-1") + body)
+        reader.feed_eof()
+        writer = FakeWriter()
+        await handler(Receiver(str(tmp_path)), 2 ** 16)(reader, writer)
+        return writer.data
+
+    response = asyncio.run(post())
+    assert response.startswith(b"HTTP/1.1 400 Bad Request\r\n")
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+
+import json
+import os
+
+import pytest
+
+pd = pytest.importorskip("pandas")
+pytest.importorskip("pyarrow")
+
+from webmushra_tools.ingest_results import ingest  # noqa: E402
+from webmushra_tools.results_store import read_results  # noqa: E402
+
+HEADER = "session_test_id,name,trial_id,stimuli_rating,stimuli,rating_time\n"
+
+
+def write_rows(path, rows, mode="a"):
+    with open(path, mode) as f:
+        f.writelines(f"t,{name},{trial_id},\" {rating} \",{trial_id},1200\n" for name, trial_id, rating in rows)
+
+
+@pytest.fixture
+def results_dir(tmp_path):
+    with open(tmp_path / "lss.csv", "w") as f:
+        f.write(HEADER)
+    write_rows(tmp_path / "lss.csv", [("r1", "a_0001.wav", 4), ("r1", "b_0001.wav", "NA")])
+    return tmp_path
+
+
+def ingest_lss(results_dir, state):
+    return ingest(str(results_dir / "lss.csv"), str(results_dir / "store" / "lss"), state)
+
+
+def save_state(results_dir, state):
+    with open(results_dir / "store" / "ingest_state.json", "w") as f:
+        json.dump({"lss": state}, f)
+
+
+def test_ingest_is_incremental(results_dir):
+    state = {}
+    assert ingest_lss(results_dir, state) == 2
+    assert ingest_lss(results_dir, state) == 0
+    write_rows(results_dir / "lss.csv", [("r2", "a_0001.wav", 5)])
+    # an incomplete line is left for the next ingest
+    with open(results_dir / "lss.csv", "a") as f:
+        f.write("t,r2,b_0001")
+    assert ingest_lss(results_dir, state) == 1
+    assert len(os.listdir(results_dir / "store" / "lss")) == 2
+    df = pd.read_parquet(results_dir / "store" / "lss")
+    assert df["stimuli_rating"].dtype == "Int8"
+    assert df["stimuli_rating"].isna().tolist() == [False, True, False]
+    assert df["stimuli_rating"].sum() == 9
+
+
+def test_read_results_appends_rows_not_ingested(results_dir):
+    state = {}
+    ingest_lss(results_dir, state)
+    save_state(results_dir, state)
+    write_rows(results_dir / "lss.csv", [("r2", "c_0001.wav", 3)])
+
+    df = read_results(str(results_dir))
+    assert df["trial_id"].tolist() == ["a_0001.wav", "b_0001.wav", "c_0001.wav"]
+    assert df["stimuli_rating"].dtype == "Int8" and df["stimuli_rating"].tolist()[2] == 3
+    assert df["trial_id"].dtype == "category"
+    assert read_results(str(results_dir), columns=["stimuli_rating", "name"])["name"].tolist() == ["r1", "r1", "r2"]
+
+
+def test_read_results_falls_back_to_rewritten_csv(results_dir, capsys):
+    state = {}
+    ingest_lss(results_dir, state)
+    save_state(results_dir, state)
+    with open(results_dir / "lss.csv", "w") as f:
+        f.write(HEADER)
+    write_rows(results_dir / "lss.csv", [("r3", "d_0001.wav", 2)])
+
+    df = read_results(str(results_dir))
+    assert df["trial_id"].tolist() == ["d_0001.wav"]
+    assert "rewritten" in capsys.readouterr().err
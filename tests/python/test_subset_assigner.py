@@ -0,0 +1,43 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+from webmushra_tools.assignment_service import RatingSource, add_new_ratings
+from webmushra_tools.subset_assigner import SubsetAssigner
+
+
+CONFIGS = {
+    "seed_1.yaml": [("a_0001.wav", "a"), ("b_0001.wav", "b")],
+    "seed_2.yaml": [("b_0001.wav", "b"), ("a_0001.wav", "a")],
+}
+
+
+def test_shared_trials_count_for_assigned_config():
+    assigner = SubsetAssigner(CONFIGS, min_ratings=1)
+    assert assigner.next_config("w1", now=0) == "seed_1.yaml"
+    assert assigner.next_config("w2", now=0) == "seed_2.yaml"
+    for trial_id, _ in CONFIGS["seed_2.yaml"]:
+        assigner.add_rating("w2", trial_id, 4)
+    assert assigner.config_ratings == {"seed_1.yaml": 0, "seed_2.yaml": 2}
+    assert "w2" not in assigner.leases and "w1" in assigner.leases
+
+
+def test_ratings_are_reset_when_csv_starts_over(tmp_path):
+    path = tmp_path / "lss.csv"
+    rows = "session_test_id,name,trial_id,stimuli_rating\nt,w1,a_0001.wav,4\nt,w1,b_0001.wav,3\n"
+    path.write_text(rows)
+    source = RatingSource(csv_path=str(path))
+    assigner = SubsetAssigner(CONFIGS)
+
+    add_new_ratings(assigner, source)
+    assert sum(assigner.config_ratings.values()) == 2
+    add_new_ratings(assigner, source)
+    assert not source.started_over and sum(assigner.config_ratings.values()) == 2
+
+    # replaced by a copy with one more row
+    path.with_suffix(".tmp").write_text(rows + "t,w2,a_0001.wav,5\n")
+    os.replace(path.with_suffix(".tmp"), path)
+    add_new_ratings(assigner, source)
+    assert source.started_over
+    assert sum(assigner.config_ratings.values()) == 3
+    assert assigner.system_stats["a"].n == 2 and assigner.system_stats["b"].n == 1
@@ -0,0 +1,47 @@
+# -*- coding: utf-8 -*-
+
+import os
+
+import pytest
+
+from webmushra_tools import tracing
+
+
+@pytest.mark.parametrize("name", ["trace.json", "trace.jsonl"])
+def test_spans_are_summarized_by_name(tmp_path, monkeypatch, name):
+    path = str(tmp_path / name)
+    monkeypatch.setattr(tracing, "_tracer", tracing.Tracer(path, truncate=True))
+    tracing.process_name("test")
+    with tracing.span("stage", mode="copy") as outer:
+        for _ in range(2):
+            with tracing.span("inner") as s:
+                s.set(files=3)
+        outer.set(files=1)
+    with pytest.raises(ValueError):
+        with tracing.span("failing"):
+            raise ValueError("failed")
+
+    events = tracing.load_trace(path)
+    assert [event["name"] for event in events] == ["inner", "inner", "stage", "failing"]
+    assert events[2]["args"]["mode"] == "copy" and events[3]["args"]["error"] == "ValueError"
+    summary = tracing.summarize_trace(events)
+    assert list(summary) == ["stage", "inner", "failing"]
+    assert summary["inner"]["count"] == 2 and summary["inner"]["files"] == 6
+    assert summary["stage"]["wall"] >= summary["inner"]["wall"]
+
+
+def test_span_is_a_no_op_while_disabled(monkeypatch):
+    monkeypatch.setattr(tracing, "_tracer", None)
+    assert tracing.span("stage") is tracing.NULL_SPAN
+    with tracing.span("stage") as s:
+        s.set(files=1)
+
+
+def test_spans_are_profiled(tmp_path, monkeypatch):
+    profile_dir = str(tmp_path / "profiles")
+    monkeypatch.setattr(tracing, "_tracer", tracing.Tracer(str(tmp_path / "trace.json"), profile_dir))
+    with tracing.span("outer"):
+        with tracing.span("inner/stage"):
+            sum(range(1000))
+    assert sorted(name.split(".", 1)[1] for name in os.listdir(profile_dir)) == \
+        ["001.inner_stage.prof", "002.outer.prof"]
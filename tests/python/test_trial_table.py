@@ -0,0 +1,26 @@
+# -*- coding: utf-8 -*-
+
+from webmushra_tools.trial_table import label_stimuli, trial_row
+
+
+def test_system_is_model_dir():
+    paths = ["root/tacotron/p225_001.wav", "root/tacotron/utt_0001.wav", "root/fastspeech/p225_001.wav"]
+    assert label_stimuli(paths) == {
+        "root/tacotron/p225_001.wav": ("tacotron", "p225_001"),
+        "root/tacotron/utt_0001.wav": ("tacotron", "utt_0001"),
+        "root/fastspeech/p225_001.wav": ("fastspeech", "p225_001"),
+    }
+
+
+def test_single_dir_falls_back_to_stem():
+    paths = ["subset_0/method_a/original_0047.wav", "subset_0/method_a/vocoder_waveglow_0047.wav"]
+    assert label_stimuli(paths) == {
+        "subset_0/method_a/original_0047.wav": ("original", "0047"),
+        "subset_0/method_a/vocoder_waveglow_0047.wav": ("vocoder_waveglow", "0047"),
+    }
+
+
+def test_trial_row_uses_label():
+    row = trial_row("root/subset_3/tacotron/p225_001.wav", "naturalness", 2, 777, ("tacotron", "p225_001"))
+    assert (row["system"], row["utt_id"], row["model_dir"], row["subset"]) == ("tacotron", "p225_001", "tacotron", "3")
+    assert row["trial_id"] == "tacotron_p225_001.wav"
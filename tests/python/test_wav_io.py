@@ -0,0 +1,41 @@
+# -*- coding: utf-8 -*-
+
+import numpy as np
+import pytest
+
+from webmushra_tools.wav_io import from_float, read_wav, read_wav_header, wav_header_bytes, write_wav
+
+
+@pytest.mark.parametrize("sampwidth", [1, 2, 3, 4])
+def test_pcm_round_trip(tmp_path, sampwidth):
+    data = from_float(np.random.default_rng(0).uniform(-1, 1, (101, 2)), sampwidth)
+    path = str(tmp_path / "pcm.wav")
+    write_wav(path, data, 22050, sampwidth)
+    read, sample_rate, width = read_wav(path)
+    assert (sample_rate, width) == (22050, sampwidth)
+    np.testing.assert_array_equal(read, data)
+    assert not read_wav_header(path)["is_float"]
+
+
+def test_read_float(float_mono_wav):
+    path, data = float_mono_wav
+    read, sample_rate, sampwidth = read_wav(path)
+    assert read.dtype == np.float32
+    assert (sample_rate, sampwidth) == (16000, 4)
+    np.testing.assert_array_equal(read, data)
+
+
+def test_write_float_keeps_layout(tmp_path, float_mono_wav):
+    path, data = float_mono_wav
+    out_path = str(tmp_path / "out.wav")
+    write_wav(out_path, data, 16000, 4)
+    with open(path, "rb") as f, open(out_path, "rb") as g:
+        assert f.read() == g.read()
+    header = read_wav_header(out_path, allow_float=True)
+    assert header["is_float"]
+    assert header["data_offset"] == len(wav_header_bytes(len(data), 1, 16000, 4, is_float=True))
+
+
+def test_float_header_requires_allow_float(float_mono_wav):
+    with pytest.raises(ValueError, match="unsupported format 3"):
+        read_wav_header(float_mono_wav[0])